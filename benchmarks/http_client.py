@@ -0,0 +1,98 @@
+import asyncio
+import ssl
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from httpx import AsyncClient
+from src.viewers_leaderboard.twitch.http_client import create_http_client
+
+REQUESTS = 200
+RESPONSE_BODY = b'{"access_token":"token","expires_in":3600,"token_type":"bearer"}'
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            headers = await reader.readuntil(b"\r\n\r\n")
+            content_length = 0
+            for line in headers.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.lower() == b"content-length":
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (len(RESPONSE_BODY), RESPONSE_BODY)
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def create_tls_context(directory: Path):
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes"]
+        + ["-keyout", str(key), "-out", str(cert), "-days", "1"]
+        + ["-subj", "/CN=localhost"],
+        check=True,
+        capture_output=True,
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    # The stand-in server only speaks HTTP/1.1, clients offering h2 fall back
+    context.set_alpn_protocols(["http/1.1"])
+
+    return context
+
+
+async def per_call_clients(url: str):
+    for _ in range(REQUESTS):
+        async with AsyncClient(verify=False) as http_client:
+            response = await http_client.post(
+                url, json={"grant_type": "client_credentials"}
+            )
+
+    return response.http_version
+
+
+async def shared_client(url: str):
+    async with create_http_client(verify=False) as http_client:
+        for _ in range(REQUESTS):
+            response = await http_client.post(
+                url, json={"grant_type": "client_credentials"}
+            )
+
+    return response.http_version
+
+
+async def run():
+    with TemporaryDirectory() as directory:
+        server = await asyncio.start_server(
+            handle_connection,
+            "127.0.0.1",
+            0,
+            ssl=create_tls_context(Path(directory)),
+        )
+        port = server.sockets[0].getsockname()[1]
+        url = f"https://127.0.0.1:{port}/oauth2/token"
+
+        async with server:
+            print(f"{REQUESTS} sequential token requests against a local TLS server")
+            for scenario in [per_call_clients, shared_client]:
+                started_at = perf_counter()
+                http_version = await scenario(url)
+                elapsed = perf_counter() - started_at
+                print(
+                    f"  {scenario.__name__:<18} {elapsed * 1000:8.1f} ms total "
+                    f"{elapsed / REQUESTS * 1000:6.2f} ms/request ({http_version})"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
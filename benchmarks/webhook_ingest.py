@@ -0,0 +1,75 @@
+import hmac
+import json
+from hashlib import sha256
+from timeit import repeat
+from typing import Union
+from pydantic import TypeAdapter
+from src.viewers_leaderboard.webhook.transport import (
+    ChallengePayload,
+    ChatMessagePayload,
+    notification_payload_adapter,
+)
+
+SECRET = b"w3bh00k_s3cr3t"
+MESSAGE_ID = "e76c6bd4-55c9-4987-8304-da1588d8988b"
+MESSAGE_TIMESTAMP = "2024-12-14T16:45:30.634234626Z"
+
+# The payload union the webhook route validated before the single-pass ingest
+legacy_payload_adapter = TypeAdapter(Union[ChatMessagePayload, ChallengePayload])
+
+
+def build_body(message_size: int):
+    return json.dumps(
+        {
+            "subscription": {"type": "channel.chat.message"},
+            "event": {
+                "broadcaster_user_id": "1971641",
+                "chatter_user_id": "4145994",
+                "chatter_user_name": "viewer",
+                "message": {"text": "x" * message_size, "fragments": []},
+            },
+        }
+    ).encode()
+
+
+def sign(body: bytes):
+    data = MESSAGE_ID.encode() + MESSAGE_TIMESTAMP.encode() + body
+    return "sha256=" + hmac.new(SECRET, data, digestmod=sha256).hexdigest()
+
+
+def legacy_ingest(body: bytes, header_signature: str):
+    data = MESSAGE_ID + MESSAGE_TIMESTAMP + body.decode()
+    signature = hmac.new(SECRET, data.encode(), digestmod=sha256).hexdigest()
+    assert f"sha256={signature}" == header_signature
+
+    return legacy_payload_adapter.validate_python(json.loads(body))
+
+
+def single_pass_ingest(body: bytes, header_signature: str):
+    signature = hmac.new(SECRET, digestmod=sha256)
+    signature.update(bytes(MESSAGE_ID, "utf-8"))
+    signature.update(bytes(MESSAGE_TIMESTAMP, "utf-8"))
+    signature.update(body)
+    assert hmac.compare_digest(f"sha256={signature.hexdigest()}", header_signature)
+
+    return notification_payload_adapter.validate_json(body)
+
+
+def run():
+    for name, message_size, number in [
+        ("typical", 64, 20_000),
+        ("large", 256_000, 200),
+    ]:
+        body = build_body(message_size)
+        header_signature = sign(body)
+
+        print(f"{name} payload ({len(body)} bytes)")
+        for ingest in [legacy_ingest, single_pass_ingest]:
+            best = min(
+                repeat(lambda: ingest(body, header_signature), number=number, repeat=5)
+            )
+            print(f"  {ingest.__name__:<20} {best / number * 1_000_000:10.2f} us/op")
+
+
+if __name__ == "__main__":
+    run()
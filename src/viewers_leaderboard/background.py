@@ -0,0 +1,101 @@
+import asyncio
+from time import monotonic
+from typing import Awaitable, Callable
+from fastapi import FastAPI
+from pymongo.errors import PyMongoError
+from src.viewers_leaderboard.leases import JobLease, get_worker_id
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.presence.poller import view_poller_loop
+from src.viewers_leaderboard.twitch.auth import app_token_refresh_loop
+from src.viewers_leaderboard.users.directory import user_directory_refresh_loop
+
+BackgroundJob = Callable[[], Awaitable[None]]
+
+
+def get_background_jobs() -> dict[str, BackgroundJob]:
+    return {
+        "app_token_refresh": app_token_refresh_loop,
+    }
+
+
+def get_leader_jobs() -> dict[str, BackgroundJob]:
+    return {
+        "user_directory_refresh": user_directory_refresh_loop,
+        "view_poller": view_poller_loop,
+    }
+
+
+async def stop_task(task: asyncio.Task | None):
+    if task is None:
+        return
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+async def run_as_leader(name: str, job: BackgroundJob):
+    ttl = get_settings().background_job_lease_ttl
+    lease = JobLease(name, owner=get_worker_id(), ttl=ttl)
+    renew_interval = ttl / 3
+    renewed_at = None
+    task: asyncio.Task | None = None
+
+    try:
+        while True:
+            try:
+                is_leader = await lease.acquire()
+                renewed_at = monotonic() if is_leader else None
+            except PyMongoError as ex:
+                logger.error(f"Error renewing lease of {name}: {ex}")
+                # Keep running only while the last renewal still holds
+                is_leader = renewed_at is not None and monotonic() - renewed_at < ttl
+
+            if task is not None and task.done():
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error(f"Background job {name} failed: {task.exception()}")
+                task = None
+
+            if is_leader and task is None:
+                logger.info(f"Acquired lease of {name}, starting job...")
+                task = asyncio.create_task(job(), name=f"{name}_job")
+            elif not is_leader and task is not None:
+                logger.warning(f"Lost lease of {name}, stopping job...")
+                await stop_task(task)
+                task = None
+
+            await asyncio.sleep(renew_interval)
+    finally:
+        await stop_task(task)
+
+        if renewed_at is not None:
+            try:
+                await lease.release()
+            except PyMongoError as ex:
+                logger.error(f"Error releasing lease of {name}: {ex}")
+
+
+async def start_background_jobs(app: FastAPI):
+    app.background_tasks = []
+
+    if get_settings().background_jobs_enabled is False:
+        return
+
+    for name, job in get_background_jobs().items():
+        logger.info(f"Starting background job {name}...")
+        app.background_tasks.append(asyncio.create_task(job(), name=name))
+
+    for name, job in get_leader_jobs().items():
+        logger.info(f"Starting background job {name} on its elected worker...")
+        app.background_tasks.append(
+            asyncio.create_task(run_as_leader(name, job), name=name)
+        )
+
+
+async def stop_background_jobs(app: FastAPI):
+    for task in app.background_tasks:
+        task.cancel()
+
+    await asyncio.gather(*app.background_tasks, return_exceptions=True)
+
+    logger.info("Background jobs stopped.")
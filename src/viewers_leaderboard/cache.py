@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+from cachetools import TLRUCache
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.shared_cache import SharedCache
+
+
+class SingleFlightCache:
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float,
+        negative_ttl: float | None = None,
+        shared: SharedCache | None = None,
+    ):
+        self.name = name
+        self.shared = shared
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._cache = TLRUCache(maxsize=maxsize, ttu=self._time_to_use)
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    def _time_to_use(self, _key: Hashable, value: Any, now: float):
+        return now + (self.negative_ttl if value is None else self.ttl)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        try:
+            value = self._cache[key]
+            metrics.increment(f"{self.name}.hits")
+            return value
+        except KeyError:
+            pass
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            metrics.increment(f"{self.name}.coalesced")
+            return await asyncio.shield(in_flight)
+
+        metrics.increment(f"{self.name}.misses")
+        if self.shared is not None:
+            task = asyncio.ensure_future(self.shared.load_through(key, loader))
+        else:
+            task = asyncio.ensure_future(loader())
+        self._in_flight[key] = task
+
+        def on_done(done: asyncio.Future):
+            self._in_flight.pop(key, None)
+            if not done.cancelled() and done.exception() is None:
+                self._cache[key] = done.result()
+
+        task.add_done_callback(on_done)
+
+        return await asyncio.shield(task)
@@ -1,14 +1,32 @@
+import asyncio
+from beanie import Document, init_beanie
 from fastapi import FastAPI
 from motor.motor_asyncio import AsyncIOMotorClient
-from beanie import init_beanie
+from pymongo import IndexModel
+from src.viewers_leaderboard.leases import Lease
 from src.viewers_leaderboard.log import logger
 from src.viewers_leaderboard.settings import get_settings
 
-from src.viewers_leaderboard.ranking.models import Score
+from src.viewers_leaderboard.presence.models import BroadcasterToken
+from src.viewers_leaderboard.shared_cache import SharedCacheEntry
+from src.viewers_leaderboard.ranking.models import Score, LeaderboardTotal
+from src.viewers_leaderboard.streams.models import StreamSession
+from src.viewers_leaderboard.users.models import TwitchUser
+from src.viewers_leaderboard.webhook.models import WebhookMessage
 
 
 async def setup_database_connection(app: FastAPI):
     settings = get_settings()
+    document_models = [
+        Score,
+        LeaderboardTotal,
+        TwitchUser,
+        StreamSession,
+        WebhookMessage,
+        BroadcasterToken,
+        Lease,
+        SharedCacheEntry,
+    ]
 
     logger.info("Setting up database connection...")
     app.db_client = AsyncIOMotorClient(settings.mongo_conn_str)
@@ -16,16 +34,46 @@ async def setup_database_connection(app: FastAPI):
     logger.info("Initializing ODM...")
     await init_beanie(
         database=app.db_client[settings.mongo_db_name],
-        document_models=[
-            Score,
-        ],
+        document_models=document_models,
+        skip_indexes=settings.mongo_background_index_build,
     )
 
+    app.index_build_task = None
+    if settings.mongo_background_index_build:
+        app.index_build_task = asyncio.create_task(
+            build_indexes_in_background(document_models)
+        )
+
     logger.info("Database connected.")
 
 
+async def build_indexes_in_background(document_models: list[type[Document]]):
+    for document_model in document_models:
+        indexes = [
+            IndexModel(
+                list(index.document["key"].items()),
+                background=True,
+                **{k: v for k, v in index.document.items() if k != "key"},
+            )
+            for index in getattr(document_model.Settings, "indexes", [])
+        ]
+
+        if not indexes:
+            continue
+
+        try:
+            logger.info(f"Building {document_model.__name__} indexes in background...")
+            await document_model.get_motor_collection().create_indexes(indexes)
+            logger.info(f"{document_model.__name__} indexes built.")
+        except Exception as ex:
+            logger.error(f"Error building {document_model.__name__} indexes: {ex}")
+
+
 async def shutdown_database_connection(app: FastAPI):
     logger.info("Shutting down database connection...")
+    if app.index_build_task is not None and not app.index_build_task.done():
+        app.index_build_task.cancel()
+
     app.db_client.close()
 
     logger.info("Database disconnected.")
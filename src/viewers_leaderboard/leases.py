@@ -0,0 +1,66 @@
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from uuid import uuid4
+from beanie import Document
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class Lease(Document):
+    id: str
+    owner: str
+    expires_at: datetime
+
+    class Settings:
+        name = "leases"
+        indexes = [
+            IndexModel(
+                [("expires_at", ASCENDING)],
+                name="expires_at_ttl",
+                expireAfterSeconds=0,
+            ),
+        ]
+
+
+@lru_cache
+def get_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class JobLease:
+    def __init__(self, name: str, owner: str, ttl: float):
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+
+    async def acquire(self) -> bool:
+        now = datetime.now(timezone.utc)
+
+        try:
+            # Matches when the lease is ours or expired, otherwise the upsert
+            # collides with the current holder's document.
+            await Lease.get_motor_collection().find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [{"owner": self.owner}, {"expires_at": {"$lte": now}}],
+                },
+                {
+                    "$set": {
+                        "owner": self.owner,
+                        "expires_at": now + timedelta(seconds=self.ttl),
+                    }
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+
+        return True
+
+    async def release(self):
+        await Lease.get_motor_collection().delete_one(
+            {"_id": self.name, "owner": self.owner}
+        )
@@ -1,13 +1,45 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from src.viewers_leaderboard.background import (
+    start_background_jobs,
+    stop_background_jobs,
+)
 from src.viewers_leaderboard.database import (
     setup_database_connection,
     shutdown_database_connection,
 )
+from src.viewers_leaderboard.ranking.buffer import (
+    setup_score_write_buffer,
+    shutdown_score_write_buffer,
+)
+from src.viewers_leaderboard.streams.sessions import setup_stream_sessions
+from src.viewers_leaderboard.twitch.http_client import (
+    setup_http_client,
+    shutdown_http_client,
+)
+from src.viewers_leaderboard.twitch.client import (
+    setup_twitch_client,
+    shutdown_twitch_client,
+)
+from src.viewers_leaderboard.webhook.queue import (
+    setup_webhook_event_queue,
+    shutdown_webhook_event_queue,
+)
 
 
 @asynccontextmanager
 async def app_lifespan(app: FastAPI):
     await setup_database_connection(app)
+    await setup_stream_sessions(app)
+    await setup_http_client(app)
+    await setup_twitch_client(app)
+    await setup_score_write_buffer(app)
+    await setup_webhook_event_queue(app)
+    await start_background_jobs(app)
     yield
+    await stop_background_jobs(app)
+    await shutdown_webhook_event_queue(app)
+    await shutdown_score_write_buffer(app)
+    await shutdown_twitch_client(app)
+    await shutdown_http_client(app)
     await shutdown_database_connection(app)
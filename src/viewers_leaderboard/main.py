@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.viewers_leaderboard.lifespan import app_lifespan
+from src.viewers_leaderboard.metrics import get_metrics
 import src.viewers_leaderboard.webhook.routes as webhook_routes
 import src.viewers_leaderboard.ranking.routes as ranking_routes
 
@@ -11,6 +12,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
@@ -19,5 +21,10 @@ async def root():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return get_metrics()
+
+
 app.include_router(webhook_routes.router)
 app.include_router(ranking_routes.router)
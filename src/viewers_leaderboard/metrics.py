@@ -0,0 +1,34 @@
+from collections import defaultdict
+
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_summaries: dict[str, dict[str, float]] = {}
+
+
+def increment(name: str, value: float = 1):
+    _counters[name] += value
+
+
+def set_gauge(name: str, value: float):
+    _gauges[name] = value
+
+
+def observe(name: str, value: float):
+    summary = _summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": value})
+    summary["count"] += 1
+    summary["sum"] += value
+    summary["max"] = max(summary["max"], value)
+
+
+def get_metrics():
+    return {
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+        "summaries": {name: dict(summary) for name, summary in _summaries.items()},
+    }
+
+
+def reset_metrics():
+    _counters.clear()
+    _gauges.clear()
+    _summaries.clear()
@@ -0,0 +1,11 @@
+from beanie import Document
+from src.viewers_leaderboard.mixins import TimestampMixin
+
+
+class BroadcasterToken(Document, TimestampMixin):
+    id: str
+    access_token: str
+    refresh_token: str
+
+    class Settings:
+        name = "broadcaster_tokens"
@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime
+from time import monotonic
+from zlib import crc32
+from beanie.operators import In
+from httpx import HTTPStatusError
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.presence.models import BroadcasterToken
+from src.viewers_leaderboard.presence.tokens import refresh_broadcaster_token
+from src.viewers_leaderboard.ranking.buffer import PendingScore, to_update_operation
+from src.viewers_leaderboard.ranking.models import Score, ScoreType
+from src.viewers_leaderboard.ranking.response_cache import invalidate_channel_ranking
+from src.viewers_leaderboard.ranking.totals import (
+    increment_leaderboard_totals,
+    to_total_operation,
+)
+from src.viewers_leaderboard.streams.models import StreamSession
+from src.viewers_leaderboard.streams.sessions import (
+    end_stream_session,
+    find_open_sessions,
+    start_stream_session,
+)
+from src.viewers_leaderboard.twitch.stream import get_current_stream_state
+from src.viewers_leaderboard.twitch.chatters import fetch_chatters_page
+from src.viewers_leaderboard.twitch.transport import Chatter
+from src.viewers_leaderboard.users.directory import record_chatters
+
+
+def get_poll_shard(broadcaster_user_id: str, shards: int):
+    return crc32(broadcaster_user_id.encode()) % shards
+
+
+async def award_view_points(
+    broadcaster_user_id: str, stream_hash: str, chatters: list[Chatter]
+):
+    if not chatters:
+        return 0
+
+    points = get_settings().score_view_points
+    now = datetime.now()
+
+    await Score.get_motor_collection().bulk_write(
+        [
+            to_update_operation(
+                (broadcaster_user_id, chatter.user_id, ScoreType.VIEW, stream_hash),
+                PendingScore(
+                    viewer_username=chatter.user_name,
+                    value=points,
+                    first_awarded_at=now,
+                    last_awarded_at=now,
+                    cooldown_seconds=None,
+                ),
+            )
+            for chatter in chatters
+        ],
+        ordered=False,
+    )
+    await increment_leaderboard_totals(
+        [
+            to_total_operation(
+                broadcaster_user_id, chatter.user_id, chatter.user_name, points, now
+            )
+            for chatter in chatters
+        ]
+    )
+    await record_chatters({chatter.user_id: chatter.user_name for chatter in chatters})
+
+    metrics.increment("view_poller.points_awarded", points * len(chatters))
+
+    return len(chatters)
+
+
+async def fetch_chatters(token: BroadcasterToken, cursor: str | None):
+    try:
+        return await fetch_chatters_page(token.id, token.id, token.access_token, cursor)
+    except HTTPStatusError as ex:
+        if ex.response.status_code != 401:
+            raise
+
+    await refresh_broadcaster_token(token)
+
+    return await fetch_chatters_page(token.id, token.id, token.access_token, cursor)
+
+
+async def poll_broadcaster_chatters(token: BroadcasterToken, stream_hash: str):
+    started_at = monotonic()
+    awarded = 0
+    cursor = None
+
+    while True:
+        page = await fetch_chatters(token, cursor)
+        awarded += await award_view_points(token.id, stream_hash, page.data)
+        metrics.increment("view_poller.pages")
+
+        cursor = page.pagination.cursor
+        if not cursor:
+            break
+
+    if awarded:
+        invalidate_channel_ranking(token.id)
+
+    metrics.observe("view_poller.chatters", awarded)
+    metrics.observe("view_poller.poll_latency_ms", (monotonic() - started_at) * 1000)
+
+    return awarded
+
+
+async def confirm_live_stream(session: StreamSession):
+    broadcaster_user_id = session.broadcaster_user_id
+
+    try:
+        stream_state = await get_current_stream_state(broadcaster_user_id)
+    except Exception as ex:
+        logger.error(f"Error checking stream of {broadcaster_user_id}: {ex}")
+        metrics.increment("view_poller.liveness_failures")
+        return None
+
+    # A lost stream.offline/online notification leaves the session open
+    if stream_state is None:
+        logger.info(f"Closing stream session of {broadcaster_user_id}, it is offline")
+        await end_stream_session(broadcaster_user_id)
+        metrics.increment("view_poller.closed_sessions")
+    elif stream_state.stream_hash != session.id:
+        await start_stream_session(broadcaster_user_id, stream_state.stream.started_at)
+
+    return stream_state
+
+
+async def poll_view_shard(shard: int, shards: int):
+    # Read from the database so every worker sees the same live streams,
+    # not only the ones whose stream.online notification it handled.
+    sessions = [
+        session
+        for session in await find_open_sessions()
+        if get_poll_shard(session.broadcaster_user_id, shards) == shard
+    ]
+    stream_states = await asyncio.gather(
+        *[confirm_live_stream(session) for session in sessions]
+    )
+    live_streams = {
+        session.broadcaster_user_id: stream_state
+        for session, stream_state in zip(sessions, stream_states)
+        if stream_state is not None
+    }
+
+    if not live_streams:
+        return 0
+
+    tokens = await BroadcasterToken.find(
+        In(BroadcasterToken.id, list(live_streams))
+    ).to_list()
+    semaphore = asyncio.Semaphore(get_settings().view_poll_concurrency)
+
+    async def poll(token: BroadcasterToken):
+        async with semaphore:
+            try:
+                return await poll_broadcaster_chatters(
+                    token, live_streams[token.id].stream_hash
+                )
+            except Exception as ex:
+                logger.error(f"Error polling chatters of {token.id}: {ex}")
+                metrics.increment("view_poller.failures")
+                return 0
+
+    results = await asyncio.gather(*[poll(token) for token in tokens])
+
+    return sum(results)
+
+
+async def view_poller_loop():
+    settings = get_settings()
+    # Each tick polls one shard so every broadcaster is visited once per
+    # interval without all of them being polled at the same moment.
+    tick_interval = settings.view_poll_interval / settings.view_poll_shards
+    next_tick = monotonic()
+    shard = 0
+
+    while True:
+        try:
+            await poll_view_shard(shard, settings.view_poll_shards)
+        except Exception as ex:
+            logger.error(f"Error polling viewers of shard {shard}: {ex}")
+
+        shard = (shard + 1) % settings.view_poll_shards
+        next_tick = max(next_tick + tick_interval, monotonic())
+        await asyncio.sleep(next_tick - monotonic())
@@ -0,0 +1,37 @@
+from beanie.operators import Set
+from src.viewers_leaderboard.presence.models import BroadcasterToken
+from src.viewers_leaderboard.twitch.auth import (
+    refresh_user_access_token,
+    validate_user_token,
+)
+from src.viewers_leaderboard.twitch.transport import AuthUserTokenResponse
+
+
+async def store_broadcaster_token(token_response: AuthUserTokenResponse):
+    token_validation = await validate_user_token(token_response.access_token)
+
+    await BroadcasterToken.find_one(
+        BroadcasterToken.id == token_validation.user_id
+    ).upsert(
+        Set(
+            {
+                BroadcasterToken.access_token: token_response.access_token,
+                BroadcasterToken.refresh_token: token_response.refresh_token,
+            }
+        ),
+        on_insert=BroadcasterToken(
+            id=token_validation.user_id,
+            access_token=token_response.access_token,
+            refresh_token=token_response.refresh_token,
+        ),
+    )
+
+
+async def refresh_broadcaster_token(token: BroadcasterToken):
+    token_response = await refresh_user_access_token(token.refresh_token)
+
+    token.access_token = token_response.access_token
+    token.refresh_token = token_response.refresh_token
+    await token.save()
+
+    return token
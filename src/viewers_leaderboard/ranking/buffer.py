@@ -0,0 +1,345 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from time import perf_counter
+from uuid import uuid4
+from fastapi import FastAPI
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.ranking.models import Score, ScoreType
+from src.viewers_leaderboard.ranking.response_cache import invalidate_channel_ranking
+from src.viewers_leaderboard.ranking.totals import (
+    increment_leaderboard_totals,
+    to_total_operation,
+)
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+FINAL_FLUSH_ATTEMPTS = 3
+FINAL_FLUSH_RETRY_DELAY = 0.5
+
+ScoreKey = tuple[str, str, ScoreType, str]
+
+
+@dataclass
+class PendingScore:
+    viewer_username: str
+    value: int
+    first_awarded_at: datetime
+    last_awarded_at: datetime
+    cooldown_seconds: int | None
+
+    def merge(self, other: "PendingScore"):
+        self.viewer_username = other.viewer_username
+        self.value += other.value
+        self.first_awarded_at = min(self.first_awarded_at, other.first_awarded_at)
+        self.last_awarded_at = max(self.last_awarded_at, other.last_awarded_at)
+
+
+def to_identity_query(key: ScoreKey):
+    broadcaster_user_id, viewer_user_id, score_type, stream_hash = key
+
+    return {
+        "broadcaster_user_id": broadcaster_user_id,
+        "viewer_user_id": viewer_user_id,
+        "type": score_type.value,
+        "last_stream_hash": stream_hash,
+    }
+
+
+def cooldown_update_pipeline(
+    value: int,
+    viewer_username: str,
+    awarded_at: datetime,
+    cooldown_start: datetime,
+    award_id: str | None = None,
+):
+    # The cooldown is checked inside the update so it holds even when the
+    # unique stream identity index is missing.
+    cooldown_over = {
+        "$lte": [{"$ifNull": ["$updated_at", cooldown_start]}, cooldown_start]
+    }
+    fields = {
+        "value": {
+            "$cond": [
+                cooldown_over,
+                {"$add": [{"$ifNull": ["$value", 0]}, value]},
+                "$value",
+            ]
+        },
+        "viewer_username": {"$literal": viewer_username},
+        "updated_at": {"$cond": [cooldown_over, awarded_at, "$updated_at"]},
+        "created_at": {"$ifNull": ["$created_at", awarded_at]},
+    }
+
+    if award_id is not None:
+        fields["last_award_id"] = {"$cond": [cooldown_over, award_id, "$last_award_id"]}
+
+    return [{"$set": fields}]
+
+
+def to_update_operation(
+    key: ScoreKey, pending: PendingScore, award_id: str | None = None
+):
+    query = to_identity_query(key)
+
+    if pending.cooldown_seconds is not None:
+        cooldown = timedelta(seconds=pending.cooldown_seconds)
+
+        return UpdateOne(
+            query,
+            cooldown_update_pipeline(
+                pending.value,
+                pending.viewer_username,
+                pending.last_awarded_at,
+                pending.first_awarded_at - cooldown,
+                award_id,
+            ),
+            upsert=True,
+        )
+
+    return UpdateOne(
+        query,
+        {
+            "$inc": {"value": pending.value},
+            "$set": {
+                "viewer_username": pending.viewer_username,
+                "updated_at": pending.last_awarded_at,
+            },
+            "$setOnInsert": {"created_at": pending.first_awarded_at},
+        },
+        upsert=True,
+    )
+
+
+class ScoreWriteBuffer:
+    def __init__(self, flush_interval: float, max_operations: int):
+        self.flush_interval = flush_interval
+        self.max_operations = max_operations
+        self._pending: dict[ScoreKey, PendingScore] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(
+        self,
+        key: ScoreKey,
+        viewer_username: str,
+        value: int = 1,
+        awarded_at: datetime | None = None,
+        cooldown_seconds: int | None = None,
+    ):
+        awarded_at = awarded_at or datetime.now()
+        pending = PendingScore(
+            viewer_username=viewer_username,
+            value=value,
+            first_awarded_at=awarded_at,
+            last_awarded_at=awarded_at,
+            cooldown_seconds=cooldown_seconds,
+        )
+
+        if key in self._pending:
+            self._pending[key].merge(pending)
+            metrics.increment("score_buffer.merged_operations")
+        else:
+            self._pending[key] = pending
+
+        metrics.set_gauge("score_buffer.pending", len(self._pending))
+
+        if len(self._pending) >= self.max_operations:
+            self._flush_requested.set()
+
+    async def flush(self):
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            metrics.set_gauge("score_buffer.pending", 0)
+
+            if not pending:
+                return 0
+
+            award_ids = {
+                key: uuid4().hex
+                for key, value in pending.items()
+                if value.cooldown_seconds is not None
+            }
+            operations = [
+                to_update_operation(key, value, award_ids.get(key))
+                for key, value in pending.items()
+            ]
+            started_at = perf_counter()
+            written_keys = list(pending)
+
+            try:
+                await Score.get_motor_collection().bulk_write(operations, ordered=False)
+            except BulkWriteError as ex:
+                write_errors = ex.details.get("writeErrors", [])
+                failed_keys = [written_keys[error["index"]] for error in write_errors]
+                # Duplicate keys mean a concurrent write created the score
+                # first, anything else is kept to be written on the next flush.
+                for key, error in zip(failed_keys, write_errors):
+                    if error["code"] == DUPLICATE_KEY_ERROR_CODE:
+                        metrics.increment("score_buffer.rejected_operations")
+                    else:
+                        self._requeue(key, pending[key])
+                        metrics.increment("score_buffer.flush_failures")
+
+                written_keys = [key for key in written_keys if key not in failed_keys]
+            except PyMongoError as ex:
+                logger.error(f"Error flushing {len(operations)} score operations: {ex}")
+                for key, value in pending.items():
+                    self._requeue(key, value)
+                metrics.increment("score_buffer.flush_failures")
+                written_keys = []
+
+            written_keys = await self._drop_cooldown_hits(written_keys, award_ids)
+            await self._flush_totals({key: pending[key] for key in written_keys})
+
+            metrics.observe("score_buffer.flush_size", len(operations))
+            metrics.observe(
+                "score_buffer.flush_latency_ms", (perf_counter() - started_at) * 1000
+            )
+
+            return len(operations)
+
+    async def _drop_cooldown_hits(
+        self, written_keys: list[ScoreKey], award_ids: dict[ScoreKey, str]
+    ):
+        checked_keys = [key for key in written_keys if key in award_ids]
+        if not checked_keys:
+            return written_keys
+
+        try:
+            awarded = (
+                await Score.get_motor_collection()
+                .find(
+                    {
+                        "$or": [
+                            {**to_identity_query(key), "last_award_id": award_ids[key]}
+                            for key in checked_keys
+                        ]
+                    },
+                    {"last_award_id": 1},
+                )
+                .to_list(None)
+            )
+        except PyMongoError as ex:
+            logger.error(f"Error checking {len(checked_keys)} cooldown awards: {ex}")
+            return written_keys
+
+        awarded_ids = {score["last_award_id"] for score in awarded}
+        rejected_keys = {
+            key for key in checked_keys if award_ids[key] not in awarded_ids
+        }
+        metrics.increment("score_buffer.rejected_operations", len(rejected_keys))
+
+        return [key for key in written_keys if key not in rejected_keys]
+
+    async def _flush_totals(self, written: dict[ScoreKey, PendingScore]):
+        totals: dict[tuple[str, str], PendingScore] = {}
+        for (broadcaster_user_id, viewer_user_id, *_), pending in written.items():
+            total_key = (broadcaster_user_id, viewer_user_id)
+            if total_key in totals:
+                totals[total_key].merge(pending)
+            else:
+                totals[total_key] = PendingScore(**vars(pending))
+
+        try:
+            await increment_leaderboard_totals(
+                [
+                    to_total_operation(
+                        broadcaster_user_id,
+                        viewer_user_id,
+                        total.viewer_username,
+                        total.value,
+                        total.last_awarded_at,
+                    )
+                    for (broadcaster_user_id, viewer_user_id), total in totals.items()
+                ]
+            )
+        except PyMongoError as ex:
+            logger.error(f"Error updating {len(totals)} leaderboard totals: {ex}")
+            metrics.increment("score_buffer.total_failures")
+
+        for broadcaster_user_id in {key[0] for key in totals}:
+            invalidate_channel_ranking(broadcaster_user_id)
+
+    def _requeue(self, key: ScoreKey, pending: PendingScore):
+        if key in self._pending:
+            pending.merge(self._pending[key])
+        self._pending[key] = pending
+        metrics.set_gauge("score_buffer.pending", len(self._pending))
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as ex:
+                logger.error(f"Error flushing score buffer: {ex}")
+
+    def start(self):
+        self._task = asyncio.create_task(self.run(), name="score_write_buffer")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        for attempt in range(FINAL_FLUSH_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(FINAL_FLUSH_RETRY_DELAY * attempt)
+
+            await self.flush()
+            if not self._pending:
+                return
+
+        dropped_points = sum(pending.value for pending in self._pending.values())
+        logger.error(
+            f"Dropping {dropped_points} points from {len(self._pending)} score "
+            f"operations after {FINAL_FLUSH_ATTEMPTS} flush attempts"
+        )
+        metrics.increment("score_buffer.dropped_points", dropped_points)
+        self._pending = {}
+        metrics.set_gauge("score_buffer.pending", 0)
+
+
+@lru_cache
+def get_score_write_buffer():
+    settings = get_settings()
+
+    return ScoreWriteBuffer(
+        flush_interval=settings.score_flush_interval_ms / 1000,
+        max_operations=settings.score_flush_max_operations,
+    )
+
+
+async def setup_score_write_buffer(app: FastAPI):
+    if get_settings().score_write_behind is False:
+        return
+
+    logger.info("Starting score write buffer...")
+    get_score_write_buffer().start()
+
+
+async def shutdown_score_write_buffer(app: FastAPI):
+    if get_settings().score_write_behind is False:
+        return
+
+    logger.info("Draining score write buffer...")
+    await get_score_write_buffer().stop()
+    logger.info("Score write buffer drained.")
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from enum import Enum
+from pymongo import ASCENDING, DESCENDING
+from src.viewers_leaderboard.ranking.models import LeaderboardTotal
+from src.viewers_leaderboard.users.directory import get_profile_images
+
+EXPORT_BATCH_SIZE = 500
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def get_export_fields(include_profile_images: bool):
+    fields = ["rank", "viewer_user_id", "username", "score"]
+
+    return [*fields, "profile_picture"] if include_profile_images else fields
+
+
+async def iter_ranking_batches(channel_id: str, include_profile_images: bool):
+    pipeline = [
+        {"$match": {"broadcaster_user_id": channel_id}},
+        {"$sort": {"total": DESCENDING, "viewer_user_id": ASCENDING}},
+        {
+            "$project": {
+                "_id": 0,
+                "viewer_user_id": 1,
+                "username": "$viewer_username",
+                "score": "$total",
+            }
+        },
+    ]
+    cursor = LeaderboardTotal.get_motor_collection().aggregate(
+        pipeline, batchSize=EXPORT_BATCH_SIZE
+    )
+
+    batch = []
+    position = 0
+    rank = 0
+    previous_score = None
+
+    async for row in cursor:
+        position += 1
+        if row["score"] != previous_score:
+            rank = position
+            previous_score = row["score"]
+
+        batch.append({"rank": rank, **row})
+
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield await enrich_batch(batch, include_profile_images)
+            batch = []
+
+    if batch:
+        yield await enrich_batch(batch, include_profile_images)
+
+
+async def enrich_batch(rows: list[dict], include_profile_images: bool):
+    if not include_profile_images:
+        return rows
+
+    profile_images = await get_profile_images([row["viewer_user_id"] for row in rows])
+
+    return [
+        {**row, "profile_picture": profile_images.get(row["viewer_user_id"])}
+        for row in rows
+    ]
+
+
+def to_ndjson(rows: list[dict], fields: list[str]):
+    return "".join(
+        json.dumps({field: row[field] for field in fields}) + "\n" for row in rows
+    )
+
+
+def to_csv(rows: list[dict], fields: list[str]):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writerows(rows)
+
+    return buffer.getvalue()
+
+
+async def export_ranking(
+    channel_id: str, export_format: ExportFormat, include_profile_images: bool
+):
+    fields = get_export_fields(include_profile_images)
+
+    if export_format == ExportFormat.CSV:
+        yield ",".join(fields) + "\r\n"
+
+    serialize = to_csv if export_format == ExportFormat.CSV else to_ndjson
+
+    async for rows in iter_ranking_batches(channel_id, include_profile_images):
+        yield serialize(rows, fields)
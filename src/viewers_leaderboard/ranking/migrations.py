@@ -0,0 +1,96 @@
+import asyncio
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, UpdateOne
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.ranking.models import Score
+
+MERGE_BATCH_SIZE = 500
+DROPPED_SCORE_INDEXES = ["broadcaster_ranking_covering"]
+
+
+async def merge_duplicate_scores():
+    pipeline = [
+        {
+            "$group": {
+                "_id": {
+                    "broadcaster_user_id": "$broadcaster_user_id",
+                    "viewer_user_id": "$viewer_user_id",
+                    "type": "$type",
+                    "last_stream_hash": "$last_stream_hash",
+                },
+                "ids": {"$push": "$_id"},
+                "value": {"$sum": "$value"},
+                "created_at": {"$min": "$created_at"},
+                "updated_at": {"$max": "$updated_at"},
+            }
+        },
+        {"$match": {"ids.1": {"$exists": True}}},
+    ]
+
+    collection = Score.get_motor_collection()
+    operations = []
+    merged = 0
+
+    async for duplicate in collection.aggregate(pipeline, allowDiskUse=True):
+        kept_id, *duplicated_ids = duplicate["ids"]
+        operations.append(
+            UpdateOne(
+                {"_id": kept_id},
+                {
+                    "$set": {
+                        "value": duplicate["value"],
+                        "created_at": duplicate["created_at"],
+                        "updated_at": duplicate["updated_at"],
+                    }
+                },
+            )
+        )
+        operations.append(DeleteMany({"_id": {"$in": duplicated_ids}}))
+        merged += len(duplicated_ids)
+
+        if len(operations) >= MERGE_BATCH_SIZE:
+            await collection.bulk_write(operations, ordered=True)
+            operations = []
+
+    if operations:
+        await collection.bulk_write(operations, ordered=True)
+
+    logger.info(f"Merged {merged} duplicated scores")
+
+    return merged
+
+
+async def drop_unused_score_indexes():
+    index_information = await Score.get_motor_collection().index_information()
+
+    for name in DROPPED_SCORE_INDEXES:
+        if name in index_information:
+            logger.info(f"Dropping score index {name}...")
+            await Score.get_motor_collection().drop_index(name)
+
+
+async def migrate():
+    settings = get_settings()
+    db_client = AsyncIOMotorClient(settings.mongo_conn_str)
+
+    try:
+        await init_beanie(
+            database=db_client[settings.mongo_db_name],
+            document_models=[Score],
+            skip_indexes=True,
+        )
+        await merge_duplicate_scores()
+
+        logger.info("Creating score indexes...")
+        await Score.get_motor_collection().create_indexes(Score.Settings.indexes)
+        logger.info("Score indexes created.")
+
+        await drop_unused_score_indexes()
+    finally:
+        db_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -1,11 +1,15 @@
 from enum import Enum
 from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from src.viewers_leaderboard.mixins import TimestampMixin
 
 
 class ScoreType(Enum):
     CHAT = "chat"
     VIEW = "view"
+    CHEER = "cheer"
+    SUBSCRIPTION = "subscription"
+    RAID = "raid"
 
 
 class Score(Document, TimestampMixin):
@@ -15,3 +19,46 @@ class Score(Document, TimestampMixin):
     type: ScoreType
     last_stream_hash: str
     value: int = 0
+    last_award_id: str | None = None
+
+    class Settings:
+        indexes = [
+            IndexModel(
+                [
+                    ("broadcaster_user_id", ASCENDING),
+                    ("viewer_user_id", ASCENDING),
+                    ("type", ASCENDING),
+                    ("last_stream_hash", ASCENDING),
+                ],
+                name="stream_score_identity",
+                unique=True,
+            ),
+        ]
+
+
+class LeaderboardTotal(Document, TimestampMixin):
+    broadcaster_user_id: str
+    viewer_user_id: str
+    viewer_username: str
+    total: int = 0
+
+    class Settings:
+        name = "leaderboard_totals"
+        indexes = [
+            IndexModel(
+                [
+                    ("broadcaster_user_id", ASCENDING),
+                    ("viewer_user_id", ASCENDING),
+                ],
+                name="broadcaster_viewer_identity",
+                unique=True,
+            ),
+            IndexModel(
+                [
+                    ("broadcaster_user_id", ASCENDING),
+                    ("total", DESCENDING),
+                    ("viewer_user_id", ASCENDING),
+                ],
+                name="broadcaster_total_ranking",
+            ),
+        ]
@@ -0,0 +1,61 @@
+import json
+from collections import defaultdict
+from functools import lru_cache
+from hashlib import sha256
+from typing import Awaitable, Callable
+from pydantic import BaseModel
+from src.viewers_leaderboard.cache import SingleFlightCache
+from src.viewers_leaderboard.settings import get_settings
+
+_channel_generations: dict[str, int] = defaultdict(int)
+
+
+class CachedResponse(BaseModel):
+    body: bytes
+    etag: str
+    headers: dict[str, str] = {}
+
+    @staticmethod
+    def from_content(content, headers: dict[str, str] | None = None):
+        body = json.dumps(content, separators=(",", ":")).encode()
+
+        return CachedResponse(
+            body=body,
+            etag=f'"{sha256(body).hexdigest()}"',
+            headers=headers or {},
+        )
+
+    def matches(self, if_none_match: str | None):
+        if if_none_match is None:
+            return False
+
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+
+        return "*" in etags or self.etag in etags
+
+
+@lru_cache
+def get_ranking_cache():
+    settings = get_settings()
+
+    return SingleFlightCache(
+        "ranking_cache",
+        maxsize=settings.ranking_cache_maxsize,
+        ttl=settings.ranking_cache_ttl,
+    )
+
+
+def invalidate_channel_ranking(channel_id: str):
+    # Cached entries are keyed by generation, so stale ones are never read
+    # again and simply age out of the cache.
+    _channel_generations[channel_id] += 1
+
+
+async def get_cached_ranking(
+    channel_id: str,
+    variant: tuple,
+    compute: Callable[[], Awaitable[CachedResponse]],
+) -> CachedResponse:
+    key = (channel_id, _channel_generations[channel_id], *variant)
+
+    return await get_ranking_cache().get_or_load(key, compute)
@@ -1,40 +1,215 @@
 import asyncio
-from fastapi import APIRouter
-from pymongo import DESCENDING
-from src.viewers_leaderboard.ranking.models import Score
-from src.viewers_leaderboard.twitch.user import get_user, UserNotFoundException
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from pymongo import ASCENDING, DESCENDING
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.ranking.export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_ranking,
+)
+from src.viewers_leaderboard.ranking.models import LeaderboardTotal
+from src.viewers_leaderboard.ranking.response_cache import (
+    CachedResponse,
+    get_cached_ranking,
+)
+from src.viewers_leaderboard.users.directory import get_profile_images
 
 router = APIRouter()
 
 
+def parse_cursor(cursor: str | None) -> int:
+    if cursor is None:
+        return 0
+
+    if not cursor.isdigit():
+        raise HTTPException(400, "Invalid cursor")
+
+    return int(cursor)
+
+
+async def count_viewers_above(channel_id: str, total: int):
+    return await LeaderboardTotal.find(
+        LeaderboardTotal.broadcaster_user_id == channel_id,
+        LeaderboardTotal.total > total,
+    ).count()
+
+
+async def to_ranking_rows(totals: list[LeaderboardTotal]):
+    distinct_totals = sorted({total.total for total in totals}, reverse=True)
+    viewers_above = await asyncio.gather(
+        *[
+            count_viewers_above(totals[0].broadcaster_user_id, total)
+            for total in distinct_totals
+        ]
+    )
+    rank_by_total = {
+        total: above + 1 for total, above in zip(distinct_totals, viewers_above)
+    }
+    profile_images = await get_profile_images(
+        [total.viewer_user_id for total in totals]
+    )
+
+    return [
+        {
+            "username": total.viewer_username,
+            "score": total.total,
+            "rank": rank_by_total[total.total],
+            "profile_picture": profile_images.get(total.viewer_user_id),
+        }
+        for total in totals
+    ]
+
+
 @router.get("/ranking/{channel_id}")
-async def ranking(channel_id: str):
+async def ranking(
+    channel_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: str | None = None,
+    if_none_match: str | None = Header(None),
+):
+    position = parse_cursor(cursor)
+
+    async def compute_ranking():
+        rows, next_cursor = await fetch_ranking_page(channel_id, position, limit)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+        return CachedResponse.from_content(rows, headers)
+
+    cached = await get_cached_ranking(channel_id, (limit, position), compute_ranking)
+    headers = {
+        **cached.headers,
+        "ETag": cached.etag,
+        "Cache-Control": f"public, max-age={int(get_settings().ranking_cache_ttl)}",
+    }
+
+    if cached.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+async def fetch_ranking_page(channel_id: str, position: int, limit: int):
     pipeline = [
         {"$match": {"broadcaster_user_id": channel_id}},
+        # $rank only accepts a single sort key, the position needs the
+        # viewer_user_id tiebreaker so ties keep their order across pages.
         {
-            "$group": {
-                "_id": "$viewer_username",
-                "total_score": {"$sum": "$value"},
+            "$setWindowFields": {
+                "sortBy": {"total": DESCENDING},
+                "output": {"rank": {"$rank": {}}},
             }
         },
-        {"$sort": {"total_score": DESCENDING}},
-        {"$project": {"_id": 0, "username": "$_id", "score": "$total_score"}},
+        {
+            "$setWindowFields": {
+                "sortBy": {"total": DESCENDING, "viewer_user_id": ASCENDING},
+                "output": {"position": {"$documentNumber": {}}},
+            }
+        },
+        {"$match": {"position": {"$gt": position}}},
+        {"$limit": limit + 1},
+        {
+            "$project": {
+                "_id": 0,
+                "viewer_user_id": 1,
+                "username": "$viewer_username",
+                "score": "$total",
+                "rank": 1,
+                "position": 1,
+            }
+        },
+    ]
+
+    scores = await LeaderboardTotal.aggregate(pipeline).to_list()
+    next_cursor = None
+
+    if len(scores) > limit:
+        scores = scores[:limit]
+        next_cursor = str(scores[-1]["position"])
+
+    profile_images = await get_profile_images(
+        [score["viewer_user_id"] for score in scores]
+    )
+
+    rows = [
+        {
+            "username": score["username"],
+            "score": score["score"],
+            "rank": score["rank"],
+            "profile_picture": profile_images.get(score["viewer_user_id"]),
+        }
+        for score in scores
     ]
 
-    scores = await Score.aggregate(pipeline).to_list()
+    return rows, next_cursor
+
+
+@router.get("/ranking/{channel_id}/viewers/{viewer_user_id}")
+async def viewer_position(
+    channel_id: str,
+    viewer_user_id: str,
+    window: int = Query(2, ge=0, le=10),
+):
+    viewer = await LeaderboardTotal.find_one(
+        LeaderboardTotal.broadcaster_user_id == channel_id,
+        LeaderboardTotal.viewer_user_id == viewer_user_id,
+    )
 
-    async def get_profile_image(username: str):
-        try:
-            user = await get_user(username)
-            return user.profile_image if user else None
-        except UserNotFoundException:
-            return None
+    if viewer is None:
+        raise HTTPException(404, "Viewer not ranked")
 
-    profile_pictures = asyncio.gather(
-        *[get_profile_image(score["username"]) for score in scores]
+    above, below = await asyncio.gather(
+        LeaderboardTotal.find(
+            LeaderboardTotal.broadcaster_user_id == channel_id,
+            {
+                "$or": [
+                    {"total": {"$gt": viewer.total}},
+                    {
+                        "total": viewer.total,
+                        "viewer_user_id": {"$lt": viewer_user_id},
+                    },
+                ]
+            },
+        )
+        .sort(+LeaderboardTotal.total, -LeaderboardTotal.viewer_user_id)
+        .limit(window)
+        .to_list(),
+        LeaderboardTotal.find(
+            LeaderboardTotal.broadcaster_user_id == channel_id,
+            {
+                "$or": [
+                    {"total": {"$lt": viewer.total}},
+                    {
+                        "total": viewer.total,
+                        "viewer_user_id": {"$gt": viewer_user_id},
+                    },
+                ]
+            },
+        )
+        .sort(-LeaderboardTotal.total, +LeaderboardTotal.viewer_user_id)
+        .limit(window)
+        .to_list(),
     )
 
-    for score, profile_picture in zip(scores, await profile_pictures):
-        score["profile_picture"] = profile_picture
+    rows = await to_ranking_rows([*reversed(above), viewer, *below])
+
+    return {
+        "viewer": rows[len(above)],
+        "above": rows[: len(above)],
+        "below": rows[len(above) + 1 :],
+    }
+
 
-    return scores
+@router.get("/ranking/{channel_id}/export")
+async def ranking_export(
+    channel_id: str,
+    format: ExportFormat = ExportFormat.NDJSON,
+    include_profile_images: bool = False,
+):
+    filename = f"{channel_id}-leaderboard.{format.value}"
+
+    return StreamingResponse(
+        export_ranking(channel_id, format, include_profile_images),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
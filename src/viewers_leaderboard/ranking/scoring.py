@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.shared_cache import MISSING, SharedCache
+from src.viewers_leaderboard.ranking.models import Score, ScoreType
+from src.viewers_leaderboard.ranking.buffer import (
+    cooldown_update_pipeline,
+    get_score_write_buffer,
+    to_identity_query,
+)
+from src.viewers_leaderboard.ranking.totals import (
+    increment_leaderboard_totals,
+    to_total_operation,
+)
+
+
+@lru_cache
+def get_cooldown_table():
+    settings = get_settings()
+
+    return TTLCache(
+        maxsize=settings.score_cooldown_capacity,
+        ttl=settings.score_cooldown_seconds,
+    )
+
+
+@lru_cache
+def get_shared_cooldowns():
+    return SharedCache(
+        "cooldowns",
+        ttl=get_settings().score_cooldown_seconds,
+        dump=datetime.isoformat,
+        load=datetime.fromisoformat,
+    )
+
+
+async def is_in_cooldown(cooldown_key: tuple[str, str, str], now: datetime):
+    last_awarded_at = get_cooldown_table().get(cooldown_key)
+
+    if last_awarded_at is not None:
+        metrics.increment("cooldowns.hits")
+    else:
+        metrics.increment("cooldowns.misses")
+
+        if get_settings().shared_cache_enabled:
+            last_awarded_at = await get_shared_cooldowns().get(cooldown_key)
+            if last_awarded_at is MISSING:
+                return False
+            get_cooldown_table()[cooldown_key] = last_awarded_at
+
+    if last_awarded_at is None:
+        return False
+
+    elapsed = (now - last_awarded_at).total_seconds()
+
+    return elapsed < get_settings().score_cooldown_seconds
+
+
+async def remember_cooldown(cooldown_key: tuple[str, str, str], now: datetime):
+    get_cooldown_table()[cooldown_key] = now
+
+    if get_settings().shared_cache_enabled:
+        await get_shared_cooldowns().set(cooldown_key, now)
+
+
+async def award_chat_point(
+    broadcaster_user_id: str,
+    viewer_user_id: str,
+    viewer_username: str,
+    stream_hash: str,
+) -> bool:
+    now = datetime.now()
+    cooldown_key = (broadcaster_user_id, viewer_user_id, stream_hash)
+
+    if await is_in_cooldown(cooldown_key, now):
+        metrics.increment("scoring.cooldown_short_circuits")
+        return False
+
+    settings = get_settings()
+
+    if settings.score_write_behind:
+        get_score_write_buffer().add(
+            (broadcaster_user_id, viewer_user_id, ScoreType.CHAT, stream_hash),
+            viewer_username,
+            awarded_at=now,
+            cooldown_seconds=settings.score_cooldown_seconds,
+        )
+        await remember_cooldown(cooldown_key, now)
+        metrics.increment("scoring.points_buffered")
+        return True
+
+    cooldown_start = now - timedelta(seconds=settings.score_cooldown_seconds)
+
+    try:
+        previous = await Score.get_motor_collection().find_one_and_update(
+            to_identity_query(
+                (broadcaster_user_id, viewer_user_id, ScoreType.CHAT, stream_hash)
+            ),
+            cooldown_update_pipeline(1, viewer_username, now, cooldown_start),
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+    except DuplicateKeyError:
+        # A concurrent message created the score first
+        metrics.increment("scoring.cooldown_database_hits")
+        return False
+
+    if previous is not None and previous["updated_at"] > cooldown_start:
+        metrics.increment("scoring.cooldown_database_hits")
+        return False
+
+    await remember_cooldown(cooldown_key, now)
+    metrics.increment("scoring.points_awarded")
+
+    await increment_leaderboard_totals(
+        [
+            to_total_operation(
+                broadcaster_user_id, viewer_user_id, viewer_username, 1, now
+            )
+        ]
+    )
+
+    return True
+
+
+async def award_points(
+    broadcaster_user_id: str,
+    viewer_user_id: str,
+    viewer_username: str,
+    stream_hash: str,
+    score_type: ScoreType,
+    value: int,
+) -> bool:
+    if value <= 0:
+        return False
+
+    now = datetime.now()
+
+    if get_settings().score_write_behind:
+        get_score_write_buffer().add(
+            (broadcaster_user_id, viewer_user_id, score_type, stream_hash),
+            viewer_username,
+            value=value,
+            awarded_at=now,
+        )
+        metrics.increment("scoring.points_buffered", value)
+        return True
+
+    await Score.get_motor_collection().update_one(
+        {
+            "broadcaster_user_id": broadcaster_user_id,
+            "viewer_user_id": viewer_user_id,
+            "type": score_type.value,
+            "last_stream_hash": stream_hash,
+        },
+        {
+            "$inc": {"value": value},
+            "$set": {"viewer_username": viewer_username, "updated_at": now},
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True,
+    )
+    metrics.increment("scoring.points_awarded", value)
+
+    await increment_leaderboard_totals(
+        [
+            to_total_operation(
+                broadcaster_user_id, viewer_user_id, viewer_username, value, now
+            )
+        ]
+    )
+
+    return True
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+from datetime import datetime
+from uuid import uuid4
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.ranking.models import Score, LeaderboardTotal
+
+REBUILD_BATCH_SIZE = 500
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+def to_total_operation(
+    broadcaster_user_id: str,
+    viewer_user_id: str,
+    viewer_username: str,
+    value: int,
+    updated_at: datetime,
+):
+    return UpdateOne(
+        {
+            "broadcaster_user_id": broadcaster_user_id,
+            "viewer_user_id": viewer_user_id,
+        },
+        {
+            "$inc": {"total": value},
+            "$set": {"viewer_username": viewer_username, "updated_at": updated_at},
+            "$setOnInsert": {"created_at": updated_at},
+            "$unset": {"rebuild_id": ""},
+        },
+        upsert=True,
+    )
+
+
+async def increment_leaderboard_totals(operations: list[UpdateOne]):
+    if operations:
+        await LeaderboardTotal.get_motor_collection().bulk_write(
+            operations, ordered=False
+        )
+
+
+async def write_rebuilt_totals(operations: list[UpdateOne]):
+    try:
+        await LeaderboardTotal.get_motor_collection().bulk_write(
+            operations, ordered=False
+        )
+    except BulkWriteError as ex:
+        write_errors = ex.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY_ERROR_CODE for error in write_errors):
+            raise
+
+        # The total was incremented while rebuilding, it is left as it is
+        return len(operations) - len(write_errors)
+
+    return len(operations)
+
+
+async def rebuild_leaderboard_totals(broadcaster_user_id: str | None = None):
+    now = datetime.now()
+    rebuild_id = uuid4().hex
+    match = {}
+    if broadcaster_user_id is not None:
+        match["broadcaster_user_id"] = broadcaster_user_id
+
+    # Increments unset the marker, so totals that change while the Score
+    # snapshot is read are neither overwritten nor deleted below.
+    collection = LeaderboardTotal.get_motor_collection()
+    await collection.update_many(match, {"$set": {"rebuild_id": rebuild_id}})
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"updated_at": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "broadcaster_user_id": "$broadcaster_user_id",
+                    "viewer_user_id": "$viewer_user_id",
+                },
+                "viewer_username": {"$last": "$viewer_username"},
+                "total": {"$sum": "$value"},
+            }
+        },
+    ]
+
+    operations = []
+    rows = 0
+    rebuilt = 0
+
+    async for row in Score.get_motor_collection().aggregate(
+        pipeline, allowDiskUse=True
+    ):
+        operations.append(
+            UpdateOne(
+                {**row["_id"], "rebuild_id": rebuild_id},
+                {
+                    "$set": {
+                        "viewer_username": row["viewer_username"],
+                        "total": row["total"],
+                        "updated_at": now,
+                    },
+                    "$setOnInsert": {"created_at": now},
+                    "$unset": {"rebuild_id": ""},
+                },
+                upsert=True,
+            )
+        )
+        rows += 1
+
+        if len(operations) >= REBUILD_BATCH_SIZE:
+            rebuilt += await write_rebuilt_totals(operations)
+            operations = []
+
+    if operations:
+        rebuilt += await write_rebuilt_totals(operations)
+
+    await collection.delete_many({**match, "rebuild_id": rebuild_id})
+
+    logger.info(f"Rebuilt {rebuilt} leaderboard totals")
+    if rebuilt < rows:
+        logger.warning(
+            f"{rows - rebuilt} leaderboard totals changed during the rebuild "
+            "and were kept, run it again to recompute them"
+        )
+
+    return rebuilt
+
+
+async def rebuild(broadcaster_user_id: str | None = None):
+    settings = get_settings()
+    db_client = AsyncIOMotorClient(settings.mongo_conn_str)
+
+    try:
+        await init_beanie(
+            database=db_client[settings.mongo_db_name],
+            document_models=[Score, LeaderboardTotal],
+        )
+        await rebuild_leaderboard_totals(broadcaster_user_id)
+    finally:
+        db_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild(sys.argv[1] if len(sys.argv) > 1 else None))
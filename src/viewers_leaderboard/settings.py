@@ -18,6 +18,55 @@ class Settings(BaseSettings):
     webhook_secret: str
     mongo_conn_str: str
     mongo_db_name: str
+    mongo_background_index_build: bool = False
+    twitch_http_pool_size: int = 100
+    twitch_http_keepalive_timeout: float = 60
+    twitch_http_connect_timeout: float = 5
+    twitch_http_read_timeout: float = 10
+    twitch_http2: bool = True
+    twitch_users_max_concurrency: int = 4
+    helix_rate_limit_capacity: int = 800
+    helix_streams_timeout: float = 2
+    helix_users_timeout: float = 5
+    helix_breaker_failure_threshold: int = 5
+    helix_breaker_recovery_timeout: float = 30
+    helix_breaker_slow_call_ms: float = 1000
+    helix_breaker_max_queue_wait: float = 10
+    app_token_refresh_margin: float = 300
+    app_token_retry_interval: float = 30
+    background_jobs_enabled: bool = True
+    background_job_lease_ttl: float = 30
+    user_directory_max_age: int = 86_400
+    user_directory_refresh_batch_size: int = 500
+    user_directory_refresh_interval: float = 60
+    user_record_cache_maxsize: int = 50_000
+    user_record_cache_ttl: float = 3600
+    view_poll_interval: float = 300
+    view_poll_shards: int = 12
+    view_poll_concurrency: int = 4
+    score_cooldown_seconds: int = 300
+    score_cooldown_capacity: int = 100_000
+    score_bits_per_point: int = 100
+    score_subscription_points: int = 5
+    score_raid_points: int = 5
+    score_view_points: int = 1
+    score_write_behind: bool = False
+    score_flush_interval_ms: int = 250
+    score_flush_max_operations: int = 500
+    ranking_cache_ttl: float = 5
+    ranking_cache_maxsize: int = 1024
+    stream_cache_ttl: float = 30
+    stream_cache_offline_ttl: float = 10
+    stream_cache_maxsize: int = 10_000
+    stream_batch_delay_ms: float = 5
+    live_session_maxsize: int = 10_000
+    shared_cache_enabled: bool = False
+    webhook_async_ingest: bool = False
+    webhook_queue_maxsize: int = 10_000
+    webhook_workers: int = 8
+    webhook_enqueue_timeout: float = 1
+    webhook_dedupe_capacity: int = 100_000
+    webhook_dedupe_shared: bool = False
 
     model_config = SettingsConfigDict(env_file=get_env_filename())
 
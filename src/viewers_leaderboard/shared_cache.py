@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Hashable
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+
+MISSING = object()
+
+
+class SharedCacheEntry(Document):
+    id: str
+    value: Any = None
+    expires_at: datetime
+
+    class Settings:
+        name = "shared_cache"
+        indexes = [
+            IndexModel(
+                [("expires_at", ASCENDING)],
+                name="expires_at_ttl",
+                expireAfterSeconds=0,
+            ),
+        ]
+
+
+def identity(value: Any):
+    return value
+
+
+class SharedCache:
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        negative_ttl: float | None = None,
+        dump: Callable[[Any], Any] = identity,
+        load: Callable[[Any], Any] = identity,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.dump = dump
+        self.load = load
+
+    def _entry_id(self, key: Hashable):
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([self.name, *map(str, parts)])
+
+    async def get(self, key: Hashable):
+        try:
+            # The TTL monitor only runs every minute, expired entries may linger
+            entry = await SharedCacheEntry.get_motor_collection().find_one(
+                {
+                    "_id": self._entry_id(key),
+                    "expires_at": {"$gt": datetime.now(timezone.utc)},
+                }
+            )
+        except PyMongoError as ex:
+            logger.error(f"Error reading shared cache {self.name}: {ex}")
+            metrics.increment(f"{self.name}.shared.errors")
+            return MISSING
+
+        if entry is None:
+            metrics.increment(f"{self.name}.shared.misses")
+            return MISSING
+
+        metrics.increment(f"{self.name}.shared.hits")
+        return self.load(entry["value"])
+
+    async def set(self, key: Hashable, value: Any):
+        ttl = self.negative_ttl if value is None else self.ttl
+
+        try:
+            await SharedCacheEntry.get_motor_collection().update_one(
+                {"_id": self._entry_id(key)},
+                {
+                    "$set": {
+                        "value": self.dump(value),
+                        "expires_at": datetime.now(timezone.utc)
+                        + timedelta(seconds=ttl),
+                    }
+                },
+                upsert=True,
+            )
+        except PyMongoError as ex:
+            logger.error(f"Error writing shared cache {self.name}: {ex}")
+            metrics.increment(f"{self.name}.shared.errors")
+
+    async def load_through(self, key: Hashable, loader: Callable[[], Any]):
+        value = await self.get(key)
+        if value is not MISSING:
+            return value
+
+        value = await loader()
+        await self.set(key, value)
+
+        return value
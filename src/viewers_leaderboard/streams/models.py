@@ -0,0 +1,21 @@
+from datetime import datetime
+from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from src.viewers_leaderboard.mixins import TimestampMixin
+
+
+class StreamSession(Document, TimestampMixin):
+    id: str
+    broadcaster_user_id: str
+    started_at: datetime
+    ended_at: datetime | None = None
+
+    class Settings:
+        name = "stream_sessions"
+        indexes = [
+            IndexModel(
+                [("broadcaster_user_id", ASCENDING), ("started_at", DESCENDING)],
+                name="broadcaster_sessions",
+            ),
+            IndexModel([("ended_at", ASCENDING)]),
+        ]
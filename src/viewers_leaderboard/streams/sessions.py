@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from beanie.operators import NE, Set
+from cachetools import LRUCache
+from fastapi import FastAPI
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.streams.models import StreamSession
+from src.viewers_leaderboard.twitch.models import TwitchStream, TwitchStreamState
+from src.viewers_leaderboard.twitch.stream import gen_stream_state
+
+# Twitch ends broadcasts after 48 hours, older open sessions missed their
+# stream.offline notification.
+MAX_STREAM_DURATION = timedelta(hours=48)
+
+
+@lru_cache
+def get_live_sessions() -> LRUCache:
+    # Entries live until stream.offline removes them, evicted channels go
+    # through Helix once and are remembered again.
+    return LRUCache(maxsize=get_settings().live_session_maxsize)
+
+
+def get_live_session(broadcaster_user_id: str) -> TwitchStreamState | None:
+    return get_live_sessions().get(broadcaster_user_id)
+
+
+def remember_live_session(broadcaster_user_id: str, stream_state: TwitchStreamState):
+    get_live_sessions()[broadcaster_user_id] = stream_state
+
+
+async def start_stream_session(broadcaster_user_id: str, started_at: datetime):
+    stream_state = gen_stream_state(
+        TwitchStream(broadcaster_id=broadcaster_user_id, started_at=started_at)
+    )
+
+    await StreamSession.find(
+        StreamSession.broadcaster_user_id == broadcaster_user_id,
+        StreamSession.ended_at == None,  # noqa: E711
+        NE(StreamSession.id, stream_state.stream_hash),
+    ).update(Set({StreamSession.ended_at: started_at}))
+    await StreamSession.find_one(StreamSession.id == stream_state.stream_hash).upsert(
+        Set({StreamSession.ended_at: None}),
+        on_insert=StreamSession(
+            id=stream_state.stream_hash,
+            broadcaster_user_id=broadcaster_user_id,
+            started_at=started_at,
+        ),
+    )
+
+    get_live_sessions()[broadcaster_user_id] = stream_state
+
+    return stream_state
+
+
+async def end_stream_session(broadcaster_user_id: str):
+    await StreamSession.find(
+        StreamSession.broadcaster_user_id == broadcaster_user_id,
+        StreamSession.ended_at == None,  # noqa: E711
+    ).update(Set({StreamSession.ended_at: datetime.now(timezone.utc)}))
+
+    get_live_sessions().pop(broadcaster_user_id, None)
+
+
+async def find_open_sessions():
+    return (
+        await StreamSession.find(
+            StreamSession.ended_at == None,  # noqa: E711
+            StreamSession.started_at > datetime.now(timezone.utc) - MAX_STREAM_DURATION,
+        )
+        .sort(+StreamSession.started_at)
+        .to_list()
+    )
+
+
+def to_stream_state(session: StreamSession):
+    return gen_stream_state(
+        TwitchStream(
+            broadcaster_id=session.broadcaster_user_id,
+            started_at=session.started_at.replace(tzinfo=timezone.utc),
+        )
+    )
+
+
+async def load_live_sessions():
+    open_sessions = await find_open_sessions()
+
+    live_sessions = get_live_sessions()
+    for session in open_sessions:
+        live_sessions[session.broadcaster_user_id] = to_stream_state(session)
+
+    return len(open_sessions)
+
+
+async def setup_stream_sessions(app: FastAPI):
+    logger.info("Loading live stream sessions...")
+
+    try:
+        loaded = await load_live_sessions()
+    except Exception as ex:
+        logger.error(f"Error loading live stream sessions: {ex}")
+        return
+
+    logger.info(f"{loaded} live stream sessions loaded.")
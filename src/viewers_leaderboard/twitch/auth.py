@@ -1,11 +1,14 @@
+import asyncio
 import hmac
+from functools import lru_cache
 from hashlib import sha256
-from httpx import AsyncClient
-from cachetools import TTLCache, cached
+from time import monotonic
 from fastapi import Request
 from fastapi.exceptions import HTTPException
+from src.viewers_leaderboard import metrics
 from src.viewers_leaderboard.log import logger
 from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.http_client import get_http_client
 from src.viewers_leaderboard.twitch.transport import (
     AuthUserTokenResponse,
     TokenValidationResponse,
@@ -21,7 +24,7 @@ async def validate_webhook_request(request: Request) -> bool:
         expected_signature = await get_hmac_signature_from_request(request)
         header_signature = request.headers.get("twitch-eventsub-message-signature")
 
-        if header_signature == expected_signature:
+        if hmac.compare_digest(header_signature, expected_signature):
             return True
     except (TypeError, AttributeError) as ex:
         logger.error(f"Error validating webhook request: {ex}")
@@ -31,56 +34,67 @@ async def validate_webhook_request(request: Request) -> bool:
 
 async def get_hmac_signature_from_request(request: Request) -> str:
     settings = get_settings()
-    key = settings.webhook_secret
-    data = await get_hmac_data_from_request(request)
+    body = await request.body()
+    message_id = request.headers.get("twitch-eventsub-message-id")
+    message_timestamp = request.headers.get("twitch-eventsub-message-timestamp")
 
-    signature = hmac.new(key.encode(), data.encode(), digestmod=sha256).hexdigest()
+    signature = hmac.new(settings.webhook_secret.encode(), digestmod=sha256)
+    signature.update(bytes(message_id, "utf-8"))
+    signature.update(bytes(message_timestamp, "utf-8"))
+    signature.update(body)
 
-    return f"sha256={signature}"
+    return f"sha256={signature.hexdigest()}"
 
 
-async def get_hmac_data_from_request(request: Request):
-    body = await request.body()
-    message_id: str = request.headers.get("twitch-eventsub-message-id")
-    message_timestamp: str = request.headers.get("twitch-eventsub-message-timestamp")
+async def get_user_access_token(code: str):
+    settings = get_settings()
+    data = {
+        "client_id": settings.app_client_id,
+        "client_secret": settings.app_client_secret,
+        "code": code,
+        "grant_type": "authorization_code",
+        "redirect_uri": f"{settings.app_base_url}/webhook_subscribe_callback",
+    }
+    response = await get_http_client().post(
+        "https://id.twitch.tv/oauth2/token",
+        json=data,
+    )
 
-    return message_id + message_timestamp + body.decode()
+    response.raise_for_status()
 
+    return AuthUserTokenResponse.model_validate(response.json())
 
-async def get_user_access_token(code: str):
+
+async def refresh_user_access_token(refresh_token: str):
     settings = get_settings()
-    async with AsyncClient() as http_client:
-        data = {
-            "client_id": settings.app_client_id,
-            "client_secret": settings.app_client_secret,
-            "code": code,
-            "grant_type": "authorization_code",
-            "redirect_uri": f"{settings.app_base_url}/webhook_subscribe_callback",
-        }
-        response = await http_client.post(
-            "https://id.twitch.tv/oauth2/token",
-            json=data,
-        )
+    data = {
+        "client_id": settings.app_client_id,
+        "client_secret": settings.app_client_secret,
+        "refresh_token": refresh_token,
+        "grant_type": "refresh_token",
+    }
+    response = await get_http_client().post(
+        "https://id.twitch.tv/oauth2/token",
+        json=data,
+    )
 
-        response.raise_for_status()
+    response.raise_for_status()
 
-        return AuthUserTokenResponse.model_validate(response.json())
+    return AuthUserTokenResponse.model_validate(response.json())
 
 
 async def validate_user_token(token: str):
-    async with AsyncClient() as http_client:
-        response = await http_client.get(
-            "https://id.twitch.tv/oauth2/validate",
-            headers={"Authorization": f"Bearer {token}"},
-        )
+    response = await get_http_client().get(
+        "https://id.twitch.tv/oauth2/validate",
+        headers={"Authorization": f"Bearer {token}"},
+    )
 
-        response.raise_for_status()
+    response.raise_for_status()
 
-        return TokenValidationResponse.model_validate(response.json())
+    return TokenValidationResponse.model_validate(response.json())
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=3600))
-async def get_app_token():
+async def request_app_token():
     settings = get_settings()
     data = {
         "client_id": settings.app_client_id,
@@ -88,12 +102,83 @@ async def get_app_token():
         "grant_type": "client_credentials",
     }
 
-    async with AsyncClient() as http_client:
-        response = await http_client.post(
-            "https://id.twitch.tv/oauth2/token",
-            json=data,
-        )
+    response = await get_http_client().post(
+        "https://id.twitch.tv/oauth2/token",
+        json=data,
+    )
 
     response.raise_for_status()
 
     return AppTokenResponse.model_validate(response.json())
+
+
+class AppTokenManager:
+    def __init__(self, refresh_margin: float):
+        self.refresh_margin = refresh_margin
+        self._token: AppTokenResponse | None = None
+        self._expires_at = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    def seconds_until_refresh(self):
+        return max(self._expires_at - self.refresh_margin - monotonic(), 0)
+
+    async def get_token(self, invalidated_token: str | None = None):
+        token = self._token
+
+        if token is not None and token.access_token != invalidated_token:
+            remaining = self._expires_at - monotonic()
+
+            if remaining > self.refresh_margin:
+                return token
+
+            if remaining > 0:
+                self._start_refresh()
+                return token
+
+        return await self.refresh()
+
+    async def refresh(self) -> AppTokenResponse:
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._request_token())
+            self._refresh_task.add_done_callback(self._log_refresh_failure)
+
+        return self._refresh_task
+
+    async def _request_token(self):
+        requested_at = monotonic()
+        token = await request_app_token()
+
+        self._token = token
+        self._expires_at = requested_at + token.expires_in
+        metrics.increment("app_token.refreshes")
+
+        return token
+
+    def _log_refresh_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error refreshing app token: {task.exception()}")
+            metrics.increment("app_token.refresh_failures")
+
+
+@lru_cache
+def get_app_token_manager():
+    return AppTokenManager(refresh_margin=get_settings().app_token_refresh_margin)
+
+
+async def get_app_token(invalidated_token: str | None = None):
+    return await get_app_token_manager().get_token(invalidated_token)
+
+
+async def app_token_refresh_loop():
+    manager = get_app_token_manager()
+
+    while True:
+        await asyncio.sleep(manager.seconds_until_refresh())
+
+        try:
+            await manager.refresh()
+        except Exception:
+            await asyncio.sleep(get_settings().app_token_retry_interval)
@@ -0,0 +1,218 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from functools import lru_cache
+from time import monotonic
+from typing import Any, Awaitable, Callable
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+
+
+class CircuitOpenException(Exception): ...
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+
+STATE_GAUGE_VALUES = {
+    CircuitState.CLOSED: 0,
+    CircuitState.HALF_OPEN: 1,
+    CircuitState.OPEN: 2,
+}
+
+
+class CallBudget:
+    def __init__(self):
+        self.started_at = monotonic()
+        self.excluded = 0.0
+        self._paused = 0
+        self._paused_at = 0.0
+
+    def pause(self):
+        if self._paused == 0:
+            self._paused_at = monotonic()
+        self._paused += 1
+
+    def resume(self):
+        self._paused -= 1
+        if self._paused == 0:
+            self.excluded += monotonic() - self._paused_at
+
+    @property
+    def paused(self):
+        return self._paused > 0
+
+    def elapsed(self):
+        excluded = self.excluded
+        if self.paused:
+            excluded += monotonic() - self._paused_at
+
+        return monotonic() - self.started_at - excluded
+
+
+_call_budget: ContextVar[CallBudget | None] = ContextVar("call_budget", default=None)
+
+
+@contextmanager
+def excluded_from_call_budget():
+    budget = _call_budget.get()
+    if budget is None:
+        yield
+        return
+
+    budget.pause()
+    try:
+        yield
+    finally:
+        budget.resume()
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        failure_threshold: int,
+        recovery_timeout: float,
+        slow_call_threshold: float,
+        max_queue_wait: float,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.max_queue_wait = max_queue_wait
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CircuitState.CLOSED
+        self._probe_in_flight = False
+        self._set_state(CircuitState.CLOSED)
+
+    @property
+    def state(self):
+        if (
+            self._state == CircuitState.OPEN
+            and monotonic() - self.opened_at >= self.recovery_timeout
+        ):
+            self._set_state(CircuitState.HALF_OPEN)
+
+        return self._state
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs):
+        state = self.state
+        if state == CircuitState.OPEN or (
+            state == CircuitState.HALF_OPEN and self._probe_in_flight
+        ):
+            metrics.increment(f"circuit_breaker.{self.name}.rejected")
+            raise CircuitOpenException(f"Circuit {self.name} is open")
+
+        is_probe = state == CircuitState.HALF_OPEN
+        self._probe_in_flight = self._probe_in_flight or is_probe
+        budget = CallBudget()
+
+        try:
+            result = await self._run(budget, func, *args, **kwargs)
+        except asyncio.TimeoutError:
+            # Only the time spent on the request itself counts as a failure,
+            # a long rate limit queue is not a sign of an unhealthy endpoint.
+            if budget.elapsed() >= self.timeout:
+                metrics.increment(f"circuit_breaker.{self.name}.timeouts")
+                self._record_failure(is_probe)
+            else:
+                metrics.increment(f"circuit_breaker.{self.name}.queue_timeouts")
+            raise
+        except Exception:
+            self._record_failure(is_probe)
+            raise
+        finally:
+            if is_probe:
+                self._probe_in_flight = False
+
+        elapsed = budget.elapsed()
+        metrics.observe(f"circuit_breaker.{self.name}.latency_ms", elapsed * 1000)
+
+        if elapsed >= self.slow_call_threshold:
+            metrics.increment(f"circuit_breaker.{self.name}.slow_calls")
+            self._record_failure(is_probe)
+        else:
+            self._record_success(is_probe)
+
+        return result
+
+    async def _run(self, budget: CallBudget, func, *args, **kwargs):
+        # Rate limit queue time extends the timeout up to max_queue_wait
+        deadline = budget.started_at + self.timeout + self.max_queue_wait
+        token = _call_budget.set(budget)
+        try:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+        finally:
+            _call_budget.reset(token)
+
+        try:
+            while not task.done():
+                remaining = min(self.timeout - budget.elapsed(), deadline - monotonic())
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                await asyncio.wait({task}, timeout=remaining)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            task.cancel()
+            raise
+
+        return task.result()
+
+    def _record_failure(self, is_probe: bool):
+        self.failures += 1
+
+        if (self._state == CircuitState.HALF_OPEN and is_probe) or (
+            self._state == CircuitState.CLOSED
+            and self.failures >= self.failure_threshold
+        ):
+            self._trip()
+
+    def _record_success(self, is_probe: bool):
+        # Calls that started before the circuit opened must not close it,
+        # only the half-open probe can.
+        if self._state == CircuitState.CLOSED:
+            self.failures = 0
+        elif is_probe:
+            logger.info(f"Circuit {self.name} closed")
+            self.failures = 0
+            self._set_state(CircuitState.CLOSED)
+
+    def _trip(self):
+        logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+        self.failures = 0
+        self.opened_at = monotonic()
+        self._set_state(CircuitState.OPEN)
+        metrics.increment(f"circuit_breaker.{self.name}.trips")
+
+    def _set_state(self, state: CircuitState):
+        self._state = state
+        metrics.set_gauge(
+            f"circuit_breaker.{self.name}.state", STATE_GAUGE_VALUES[state]
+        )
+
+
+@lru_cache
+def get_helix_breaker(endpoint: str):
+    settings = get_settings()
+    timeouts = {
+        "streams": settings.helix_streams_timeout,
+        "users": settings.helix_users_timeout,
+    }
+
+    return CircuitBreaker(
+        name=f"helix_{endpoint}",
+        timeout=timeouts[endpoint],
+        failure_threshold=settings.helix_breaker_failure_threshold,
+        recovery_timeout=settings.helix_breaker_recovery_timeout,
+        slow_call_threshold=settings.helix_breaker_slow_call_ms / 1000,
+        max_queue_wait=settings.helix_breaker_max_queue_wait,
+    )
@@ -0,0 +1,34 @@
+from twitchio.http import Route
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.http_client import get_http_client
+from src.viewers_leaderboard.twitch.transport import ChattersResponse
+
+HELIX_CHATTERS_PAGE_SIZE = 1000
+
+
+async def fetch_chatters_page(
+    broadcaster_id: str,
+    moderator_id: str,
+    access_token: str,
+    cursor: str | None = None,
+):
+    params = {
+        "broadcaster_id": broadcaster_id,
+        "moderator_id": moderator_id,
+        "first": HELIX_CHATTERS_PAGE_SIZE,
+    }
+    if cursor is not None:
+        params["after"] = cursor
+
+    response = await get_http_client().get(
+        f"{Route.BASE_URL}/chat/chatters",
+        params=params,
+        headers={
+            "Client-ID": get_settings().app_client_id,
+            "Authorization": f"Bearer {access_token}",
+        },
+    )
+
+    response.raise_for_status()
+
+    return ChattersResponse.model_validate(response.json())
@@ -1,11 +1,76 @@
+from aiohttp import ClientSession, TCPConnector
+from fastapi import FastAPI
 from twitchio import Client
+from src.viewers_leaderboard.log import logger
 from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.auth import get_app_token
+from src.viewers_leaderboard.twitch.rate_limit import (
+    create_rate_limit_trace_config,
+    get_helix_rate_limiter,
+)
 
+_twitch_client: Client | None = None
 
-def get_twitch_client():
+
+def create_twitch_client():
     settings = get_settings()
 
-    return Client.from_client_credentials(
+    client = Client.from_client_credentials(
         client_id=settings.app_client_id,
         client_secret=settings.app_client_secret,
     )
+
+    # twitchio asks for a token before generating its own, both on first use
+    # and after Helix rejects the current one with a 401.
+    async def provide_app_token():
+        token = await get_app_token(invalidated_token=client._http.app_token)
+        return token.access_token
+
+    client.event_token_expired = provide_app_token
+
+    return client
+
+
+def get_twitch_client():
+    global _twitch_client
+
+    if _twitch_client is None:
+        _twitch_client = create_twitch_client()
+
+    return _twitch_client
+
+
+async def setup_twitch_client(app: FastAPI):
+    global _twitch_client
+    settings = get_settings()
+
+    logger.info("Setting up Twitch client...")
+    client = create_twitch_client()
+    # twitchio 2.10 has no hook for the aiohttp session, it only creates one
+    # lazily when none is set. The version is pinned in pyproject.toml.
+    client._http.session = ClientSession(
+        connector=TCPConnector(
+            limit=settings.twitch_http_pool_size,
+            keepalive_timeout=settings.twitch_http_keepalive_timeout,
+        ),
+        trace_configs=[create_rate_limit_trace_config(get_helix_rate_limiter())],
+    )
+
+    _twitch_client = client
+    app.twitch_client = client
+
+    logger.info("Twitch client ready.")
+
+
+async def shutdown_twitch_client(app: FastAPI):
+    global _twitch_client
+
+    logger.info("Shutting down Twitch client...")
+    session = app.twitch_client._http.session
+    if session is not None:
+        await session.close()
+
+    if _twitch_client is app.twitch_client:
+        _twitch_client = None
+
+    logger.info("Twitch client closed.")
@@ -1,48 +1,86 @@
-from httpx import AsyncClient, HTTPStatusError
+from httpx import HTTPStatusError
 from twitchio.http import Route
 from src.viewers_leaderboard.settings import get_settings
 from src.viewers_leaderboard.twitch.auth import validate_user_token, get_app_token
+from src.viewers_leaderboard.twitch.http_client import get_http_client
 from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.twitch.transport import AppTokenResponse
 
 
 class WebhookSubscriptionConflictException(Exception): ...
 
 
+WEBHOOK_SCOPES = [
+    "channel:bot",
+    "user:bot",
+    "user:read:chat",
+    "bits:read",
+    "channel:read:subscriptions",
+    "moderator:read:chatters",
+]
+
+
+def get_webhook_subscriptions(user_id: str):
+    broadcaster_condition = {"broadcaster_user_id": user_id}
+
+    return [
+        (
+            "channel.chat.message",
+            {"broadcaster_user_id": user_id, "user_id": user_id},
+        ),
+        ("stream.online", broadcaster_condition),
+        ("stream.offline", broadcaster_condition),
+        ("channel.cheer", broadcaster_condition),
+        ("channel.subscribe", broadcaster_condition),
+        ("channel.raid", {"to_broadcaster_user_id": user_id}),
+    ]
+
+
+async def create_subscription(data: dict, app_token: AppTokenResponse):
+    return await get_http_client().post(
+        url=f"{Route.BASE_URL}/eventsub/subscriptions",
+        json=data,
+        headers={
+            "Client-ID": get_settings().app_client_id,
+            "Authorization": f"Bearer {app_token.access_token}",
+            "Content-Type": "application/json",
+        },
+    )
+
+
 async def subscribe_to_webhooks(user_access_token: str):
     settings = get_settings()
-    app_token_response = await get_app_token()
+    app_token = await get_app_token()
     token_validation = await validate_user_token(user_access_token)
 
-    data = {
-        "type": "channel.chat.message",
-        "version": 1,
-        "condition": {
-            "broadcaster_user_id": token_validation.user_id,
-            "user_id": token_validation.user_id,
-        },
-        "transport": {
-            "method": "webhook",
-            "callback": f"{settings.app_base_url}/webhook",
-            "secret": settings.webhook_secret,
-        },
-    }
-
-    url = f"{Route.BASE_URL}/eventsub/subscriptions"
-    async with AsyncClient() as http_client:
-        response = await http_client.post(
-            url=url,
-            json=data,
-            headers={
-                "Client-ID": settings.app_client_id,
-                "Authorization": f"Bearer {app_token_response.access_token}",
-                "Content-Type": "application/json",
+    subscriptions = get_webhook_subscriptions(token_validation.user_id)
+    conflicts = 0
+
+    for subscription_type, condition in subscriptions:
+        data = {
+            "type": subscription_type,
+            "version": 1,
+            "condition": condition,
+            "transport": {
+                "method": "webhook",
+                "callback": f"{settings.app_base_url}/webhook",
+                "secret": settings.webhook_secret,
             },
-        )
-
-    try:
-        response.raise_for_status()
-    except HTTPStatusError as ex:
-        if ex.response.status_code == 409:
-            logger.error("Already subscribed to webhook")
-            raise WebhookSubscriptionConflictException() from ex
-        raise ex
+        }
+        response = await create_subscription(data, app_token)
+
+        if response.status_code == 401:
+            app_token = await get_app_token(invalidated_token=app_token.access_token)
+            response = await create_subscription(data, app_token)
+
+        try:
+            response.raise_for_status()
+        except HTTPStatusError as ex:
+            if ex.response.status_code != 409:
+                raise ex
+
+            logger.error(f"Already subscribed to {subscription_type} webhook")
+            conflicts += 1
+
+    if conflicts == len(subscriptions):
+        raise WebhookSubscriptionConflictException()
@@ -0,0 +1,44 @@
+from functools import lru_cache
+from fastapi import FastAPI
+from httpx import AsyncClient, Limits, Timeout
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+
+
+def create_http_client(**kwargs):
+    settings = get_settings()
+
+    return AsyncClient(
+        http2=settings.twitch_http2,
+        limits=Limits(
+            max_connections=settings.twitch_http_pool_size,
+            max_keepalive_connections=settings.twitch_http_pool_size,
+            keepalive_expiry=settings.twitch_http_keepalive_timeout,
+        ),
+        timeout=Timeout(
+            settings.twitch_http_read_timeout,
+            connect=settings.twitch_http_connect_timeout,
+        ),
+        **kwargs,
+    )
+
+
+@lru_cache
+def get_http_client():
+    return create_http_client()
+
+
+async def setup_http_client(app: FastAPI):
+    logger.info("Setting up HTTP client...")
+    app.http_client = get_http_client()
+    logger.info(f"HTTP client ready (HTTP/2: {get_settings().twitch_http2}).")
+
+
+async def shutdown_http_client(app: FastAPI):
+    logger.info("Shutting down HTTP client...")
+    await app.http_client.aclose()
+
+    if get_http_client() is app.http_client:
+        get_http_client.cache_clear()
+
+    logger.info("HTTP client closed.")
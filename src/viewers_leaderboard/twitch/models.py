@@ -14,6 +14,11 @@ class TwitchStream(BaseModel):
         )
 
 
+class TwitchStreamState(BaseModel):
+    stream: TwitchStream
+    stream_hash: str
+
+
 class TwitchUser(BaseModel):
     id: str
     username: str
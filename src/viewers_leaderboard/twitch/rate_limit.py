@@ -0,0 +1,173 @@
+import asyncio
+import heapq
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from functools import lru_cache
+from itertools import count
+from time import monotonic, time
+from types import SimpleNamespace
+from aiohttp import (
+    ClientSession,
+    TraceConfig,
+    TraceRequestEndParams,
+    TraceRequestExceptionParams,
+    TraceRequestStartParams,
+)
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.breaker import excluded_from_call_budget
+
+HELIX_HOST = "api.twitch.tv"
+
+
+class HelixPriority(IntEnum):
+    REALTIME = 0
+    DEFAULT = 1
+    BULK = 2
+
+
+_helix_priority: ContextVar[HelixPriority] = ContextVar(
+    "helix_priority", default=HelixPriority.DEFAULT
+)
+
+
+@contextmanager
+def helix_priority(priority: HelixPriority):
+    token = _helix_priority.set(priority)
+    try:
+        yield
+    finally:
+        _helix_priority.reset(token)
+
+
+class HelixRateLimiter:
+    def __init__(self, capacity: int, min_wait: float = 0.05):
+        self.capacity = capacity
+        self.min_wait = min_wait
+        self.remaining = capacity
+        self.reset_at = 0.0
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = count()
+        self._wake_handle: asyncio.TimerHandle | None = None
+
+    def __len__(self):
+        return len(self._waiters)
+
+    async def acquire(self, priority: HelixPriority = HelixPriority.DEFAULT):
+        started_at = monotonic()
+        self._refill()
+
+        if not self._waiters and self.remaining > 0:
+            self._take()
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            metrics.set_gauge("helix_rate_limit.queue_depth", len(self._waiters))
+            self._schedule_wake()
+            await future
+
+        metrics.observe(
+            f"helix_rate_limit.wait_ms.{priority.name.lower()}",
+            (monotonic() - started_at) * 1000,
+        )
+
+    def update(self, limit: str | None, remaining: str | None, reset: str | None):
+        self._in_flight = max(self._in_flight - 1, 0)
+
+        if limit is not None:
+            self.capacity = int(limit)
+        if reset is not None:
+            self.reset_at = float(reset)
+        if remaining is not None:
+            # The response does not account for requests still in flight
+            self.remaining = max(int(remaining) - self._in_flight, 0)
+
+        metrics.set_gauge("helix_rate_limit.remaining", self.remaining)
+        self._release_waiters()
+
+    def cancel(self):
+        self._in_flight = max(self._in_flight - 1, 0)
+        self.remaining += 1
+        self._release_waiters()
+
+    def _take(self):
+        self.remaining -= 1
+        self._in_flight += 1
+        metrics.set_gauge("helix_rate_limit.remaining", self.remaining)
+
+    def _refill(self):
+        if self.remaining < self.capacity and time() >= self.reset_at:
+            self.remaining = self.capacity - self._in_flight
+
+    def _release_waiters(self):
+        self._refill()
+
+        while self._waiters and self.remaining > 0:
+            *_, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+
+            self._take()
+            future.set_result(None)
+
+        metrics.set_gauge("helix_rate_limit.queue_depth", len(self._waiters))
+
+        if self._waiters:
+            self._schedule_wake()
+
+    def _schedule_wake(self):
+        if self._wake_handle is not None:
+            return
+
+        delay = max(self.reset_at - time(), self.min_wait)
+        self._wake_handle = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self):
+        self._wake_handle = None
+        self._release_waiters()
+
+
+@lru_cache
+def get_helix_rate_limiter():
+    return HelixRateLimiter(capacity=get_settings().helix_rate_limit_capacity)
+
+
+def create_rate_limit_trace_config(limiter: HelixRateLimiter):
+    trace_config = TraceConfig()
+
+    async def on_request_start(
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestStartParams,
+    ):
+        context.rate_limited = params.url.host == HELIX_HOST
+        if context.rate_limited:
+            with excluded_from_call_budget():
+                await limiter.acquire(_helix_priority.get())
+
+    async def on_request_end(
+        session: ClientSession, context: SimpleNamespace, params: TraceRequestEndParams
+    ):
+        if context.rate_limited:
+            headers = params.response.headers
+            limiter.update(
+                headers.get("Ratelimit-Limit"),
+                headers.get("Ratelimit-Remaining"),
+                headers.get("Ratelimit-Reset"),
+            )
+
+    async def on_request_exception(
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestExceptionParams,
+    ):
+        if context.rate_limited:
+            limiter.cancel()
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+
+    return trace_config
@@ -1,18 +1,168 @@
+import asyncio
+from datetime import timezone
+from functools import lru_cache
 from hashlib import sha256
+from cachetools import LRUCache
+from twitchio import HTTPException
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.cache import SingleFlightCache
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.shared_cache import SharedCache
+from src.viewers_leaderboard.twitch.breaker import (
+    CircuitOpenException,
+    get_helix_breaker,
+)
 from src.viewers_leaderboard.twitch.client import get_twitch_client
-from src.viewers_leaderboard.twitch.models import TwitchStream
+from src.viewers_leaderboard.twitch.models import TwitchStream, TwitchStreamState
+from src.viewers_leaderboard.twitch.rate_limit import HelixPriority, helix_priority
 
+HELIX_STREAMS_BATCH_SIZE = 100
 
-async def fetch_current_broadcaster_stream(broadcaster_id: str):
-    client = get_twitch_client()
-    streams = await client.fetch_streams(user_ids=[broadcaster_id])
 
-    if len(streams) == 1:
-        return TwitchStream.from_twitchio_stream(streams[0])
+class StreamLookupBatcher:
+    def __init__(self, delay: float, max_batch_size: int = HELIX_STREAMS_BATCH_SIZE):
+        self.delay = delay
+        self.max_batch_size = max_batch_size
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._dispatch_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, broadcaster_id: str) -> TwitchStream | None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(broadcaster_id, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self.dispatch()
+        elif self._dispatch_handle is None:
+            self._dispatch_handle = loop.call_later(self.delay, self.dispatch)
+
+        return await future
+
+    def dispatch(self):
+        if self._dispatch_handle is not None:
+            self._dispatch_handle.cancel()
+            self._dispatch_handle = None
+
+        pending, self._pending = self._pending, {}
+        broadcaster_ids = list(pending)
+
+        for i in range(0, len(broadcaster_ids), self.max_batch_size):
+            batch = {
+                broadcaster_id: pending[broadcaster_id]
+                for broadcaster_id in broadcaster_ids[i : i + self.max_batch_size]
+            }
+            task = asyncio.create_task(self.fetch_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def fetch_batch(self, batch: dict[str, list[asyncio.Future]]):
+        metrics.observe("stream_batcher.batch_size", len(batch))
+
+        try:
+            with helix_priority(HelixPriority.REALTIME):
+                client = get_twitch_client()
+                streams = await get_helix_breaker("streams").call(
+                    client.fetch_streams, user_ids=list(batch)
+                )
+        except Exception as ex:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(ex)
+            return
+
+        streams_by_broadcaster = {
+            str(stream.user.id): TwitchStream.from_twitchio_stream(stream)
+            for stream in streams
+        }
+
+        for broadcaster_id, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(streams_by_broadcaster.get(broadcaster_id))
+
+
+@lru_cache
+def get_stream_lookup_batcher():
+    return StreamLookupBatcher(delay=get_settings().stream_batch_delay_ms / 1000)
+
+
+async def fetch_current_broadcaster_stream(broadcaster_id: str):
+    return await get_stream_lookup_batcher().load(broadcaster_id)
 
 
 def gen_stream_hash(stream: TwitchStream):
-    username_timestamp = "_".join(
-        [stream.broadcaster_id, str(stream.started_at)]
-    ).encode()
+    # Helix reports started_at in whole seconds while EventSub adds fractions,
+    # both must hash to the same stream.
+    started_at = stream.started_at
+    if started_at.tzinfo is not None:
+        started_at = started_at.astimezone(timezone.utc).replace(microsecond=0)
+
+    username_timestamp = "_".join([stream.broadcaster_id, str(started_at)]).encode()
     return sha256(username_timestamp).hexdigest()
+
+
+def gen_stream_state(stream: TwitchStream):
+    return TwitchStreamState(stream=stream, stream_hash=gen_stream_hash(stream))
+
+
+def serialize_stream_state(stream_state: TwitchStreamState | None):
+    return stream_state.model_dump(mode="json") if stream_state else None
+
+
+def deserialize_stream_state(data: dict | None):
+    return TwitchStreamState.model_validate(data) if data else None
+
+
+@lru_cache
+def get_stream_state_cache():
+    settings = get_settings()
+    shared = None
+
+    if settings.shared_cache_enabled:
+        shared = SharedCache(
+            "stream_cache",
+            ttl=settings.stream_cache_ttl,
+            negative_ttl=settings.stream_cache_offline_ttl,
+            dump=serialize_stream_state,
+            load=deserialize_stream_state,
+        )
+
+    return SingleFlightCache(
+        "stream_cache",
+        maxsize=settings.stream_cache_maxsize,
+        ttl=settings.stream_cache_ttl,
+        negative_ttl=settings.stream_cache_offline_ttl,
+        shared=shared,
+    )
+
+
+@lru_cache
+def get_last_known_stream_states():
+    return LRUCache(maxsize=get_settings().stream_cache_maxsize)
+
+
+async def get_current_stream_state(broadcaster_id: str) -> TwitchStreamState | None:
+    async def load_stream_state():
+        last_known_states = get_last_known_stream_states()
+
+        try:
+            stream = await fetch_current_broadcaster_stream(broadcaster_id)
+        except (CircuitOpenException, asyncio.TimeoutError, HTTPException) as ex:
+            if broadcaster_id not in last_known_states:
+                raise
+
+            logger.warning(
+                f"Serving last known stream state for {broadcaster_id}: {ex!r}"
+            )
+            metrics.increment("stream_cache.stale_served")
+            return last_known_states[broadcaster_id]
+
+        stream_state = gen_stream_state(stream) if stream else None
+        last_known_states[broadcaster_id] = stream_state
+
+        return stream_state
+
+    return await get_stream_state_cache().get_or_load(broadcaster_id, load_stream_state)
@@ -20,3 +20,19 @@ class AppTokenResponse(BaseModel):
     access_token: str
     expires_in: int
     token_type: str
+
+
+class Chatter(BaseModel):
+    user_id: str
+    user_login: str
+    user_name: str
+
+
+class HelixPagination(BaseModel):
+    cursor: str | None = None
+
+
+class ChattersResponse(BaseModel):
+    data: list[Chatter]
+    pagination: HelixPagination = HelixPagination()
+    total: int
@@ -1,25 +1,51 @@
-from twitchio import HTTPException, AuthenticationError
-from src.viewers_leaderboard.log import logger
+import asyncio
+from twitchio import Client
+from twitchio.models import User
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.breaker import get_helix_breaker
 from src.viewers_leaderboard.twitch.client import get_twitch_client
 from src.viewers_leaderboard.twitch.models import TwitchUser
+from src.viewers_leaderboard.twitch.rate_limit import HelixPriority, helix_priority
 
+HELIX_USERS_BATCH_SIZE = 100
 
-class UserNotFoundException(Exception): ...
 
+def to_twitch_user(user: User):
+    return TwitchUser(
+        id=str(user.id), username=user.name, profile_image=user.profile_image
+    )
 
-async def get_user(username: str):
-    try:
-        client = get_twitch_client()
-        users = await client.fetch_users(names=[username])
 
-        if len(users) == 1:
-            user = users[0]
+async def get_users_by_id(
+    user_ids: list[str], client: Client | None = None
+) -> dict[str, TwitchUser]:
+    users = await fetch_users_in_batches("ids", set(user_ids), client)
 
-            return TwitchUser(
-                id=str(user.id), username=user.name, profile_image=user.profile_image
-            )
+    return {user.id: user for user in users}
 
-        raise UserNotFoundException(f"User {username} not found")
-    except (HTTPException, AuthenticationError) as ex:
-        logger.error(f"Error fetching user {username}: {ex}")
-        raise UserNotFoundException(f"User {username} not found") from ex
+
+async def fetch_users_in_batches(
+    lookup: str, values: set[str], client: Client | None = None
+) -> list[TwitchUser]:
+    client = client or get_twitch_client()
+    semaphore = asyncio.Semaphore(get_settings().twitch_users_max_concurrency)
+    values = sorted(values)
+    batches = [
+        values[i : i + HELIX_USERS_BATCH_SIZE]
+        for i in range(0, len(values), HELIX_USERS_BATCH_SIZE)
+    ]
+
+    async def fetch_batch(batch: list[str]):
+        async with semaphore:
+            # Errors propagate so callers keep what they already have instead
+            # of treating the users of a failed batch as missing.
+            with helix_priority(HelixPriority.BULK):
+                users = await get_helix_breaker("users").call(
+                    client.fetch_users, **{lookup: batch}
+                )
+
+        return [to_twitch_user(user) for user in users]
+
+    results = await asyncio.gather(*[fetch_batch(batch) for batch in batches])
+
+    return [user for batch_users in results for user in batch_users]
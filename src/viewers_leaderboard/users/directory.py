@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta
+from functools import lru_cache
+from beanie.operators import In, Or, Set
+from cachetools import TTLCache
+from pymongo import UpdateOne
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.user import get_users_by_id
+from src.viewers_leaderboard.users.models import TwitchUser
+
+
+@lru_cache
+def get_recorded_chatters():
+    settings = get_settings()
+
+    return TTLCache(
+        maxsize=settings.user_record_cache_maxsize,
+        ttl=settings.user_record_cache_ttl,
+    )
+
+
+async def record_chatter(user_id: str, username: str):
+    recorded_chatters = get_recorded_chatters()
+    if recorded_chatters.get(user_id) == username:
+        return
+
+    await TwitchUser.find_one(TwitchUser.id == user_id).upsert(
+        Set({TwitchUser.username: username}),
+        on_insert=TwitchUser(id=user_id, username=username),
+    )
+
+    recorded_chatters[user_id] = username
+
+
+async def record_chatters(chatters: dict[str, str]):
+    recorded_chatters = get_recorded_chatters()
+    new_chatters = {
+        user_id: username
+        for user_id, username in chatters.items()
+        if recorded_chatters.get(user_id) != username
+    }
+
+    if not new_chatters:
+        return
+
+    now = datetime.now()
+    await TwitchUser.get_motor_collection().bulk_write(
+        [
+            UpdateOne(
+                {"_id": user_id},
+                {
+                    "$set": {"username": username, "updated_at": now},
+                    "$setOnInsert": {"created_at": now},
+                },
+                upsert=True,
+            )
+            for user_id, username in new_chatters.items()
+        ],
+        ordered=False,
+    )
+
+    recorded_chatters.update(new_chatters)
+
+
+async def get_profile_images(user_ids: list[str]) -> dict[str, str | None]:
+    users = await TwitchUser.find(In(TwitchUser.id, user_ids)).to_list()
+
+    return {user.id: user.profile_image for user in users}
+
+
+async def refresh_stale_users():
+    settings = get_settings()
+    now = datetime.now()
+    stale_before = now - timedelta(seconds=settings.user_directory_max_age)
+
+    stale_users = (
+        await TwitchUser.find(
+            Or(
+                TwitchUser.refreshed_at == None,  # noqa: E711
+                TwitchUser.refreshed_at < stale_before,
+            )
+        )
+        .limit(settings.user_directory_refresh_batch_size)
+        .to_list()
+    )
+
+    if not stale_users:
+        return 0
+
+    twitch_users = await get_users_by_id([user.id for user in stale_users])
+
+    updates = []
+    for user in stale_users:
+        fields = {"refreshed_at": now, "updated_at": now}
+        if user.id in twitch_users:
+            fields["profile_image"] = twitch_users[user.id].profile_image
+
+        updates.append(UpdateOne({"_id": user.id}, {"$set": fields}))
+
+    await TwitchUser.get_motor_collection().bulk_write(updates, ordered=False)
+
+    logger.info(f"Refreshed {len(updates)} users in the user directory")
+
+    return len(updates)
+
+
+async def user_directory_refresh_loop():
+    settings = get_settings()
+
+    while True:
+        try:
+            refreshed = await refresh_stale_users()
+        except Exception as ex:
+            logger.error(f"Error refreshing user directory: {ex}")
+            refreshed = 0
+
+        if refreshed < settings.user_directory_refresh_batch_size:
+            await asyncio.sleep(settings.user_directory_refresh_interval)
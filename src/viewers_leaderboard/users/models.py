@@ -0,0 +1,18 @@
+from datetime import datetime
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+from src.viewers_leaderboard.mixins import TimestampMixin
+
+
+class TwitchUser(Document, TimestampMixin):
+    id: str
+    username: str
+    profile_image: str | None = None
+    refreshed_at: datetime | None = None
+
+    class Settings:
+        name = "twitch_users"
+        indexes = [
+            IndexModel([("username", ASCENDING)]),
+            IndexModel([("refreshed_at", ASCENDING)]),
+        ]
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from cachetools import TTLCache
+from fastapi import Header, HTTPException
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.webhook.models import (
+    MESSAGE_REPLAY_WINDOW_SECONDS,
+    WebhookMessage,
+)
+
+
+@lru_cache
+def get_seen_messages():
+    return TTLCache(
+        maxsize=get_settings().webhook_dedupe_capacity,
+        ttl=MESSAGE_REPLAY_WINDOW_SECONDS,
+    )
+
+
+def parse_message_timestamp(message_timestamp: str):
+    try:
+        timestamp = datetime.fromisoformat(message_timestamp)
+    except ValueError as ex:
+        logger.error(f"Error parsing webhook message timestamp: {ex}")
+        raise HTTPException(400, "Invalid message timestamp") from ex
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+
+    return timestamp
+
+
+def is_stale_message(message_timestamp: str, now: datetime):
+    timestamp = parse_message_timestamp(message_timestamp)
+
+    return now - timestamp > timedelta(seconds=MESSAGE_REPLAY_WINDOW_SECONDS)
+
+
+async def mark_message_as_seen(message_id: str, now: datetime):
+    seen_messages = get_seen_messages()
+
+    if message_id in seen_messages:
+        return False
+
+    seen_messages[message_id] = now
+
+    if get_settings().webhook_dedupe_shared is False:
+        return True
+
+    try:
+        await WebhookMessage(id=message_id, received_at=now).insert()
+    except DuplicateKeyError:
+        return False
+    except PyMongoError as ex:
+        logger.error(f"Error recording webhook message {message_id}: {ex}")
+
+    return True
+
+
+async def forget_message(message_id: str):
+    get_seen_messages().pop(message_id, None)
+
+    if get_settings().webhook_dedupe_shared is False:
+        return
+
+    try:
+        await WebhookMessage.find_one(WebhookMessage.id == message_id).delete()
+    except PyMongoError as ex:
+        logger.error(f"Error forgetting webhook message {message_id}: {ex}")
+
+
+async def check_webhook_message(message_id: str | None, message_timestamp: str | None):
+    now = datetime.now(timezone.utc)
+
+    if message_timestamp is not None and is_stale_message(message_timestamp, now):
+        metrics.increment("webhook.stale_messages")
+        return False
+
+    if message_id is None:
+        return True
+
+    if not await mark_message_as_seen(message_id, now):
+        metrics.increment("webhook.duplicate_messages")
+        return False
+
+    return True
+
+
+async def is_new_webhook_message(
+    twitch_eventsub_message_id: str | None = Header(None),
+    twitch_eventsub_message_timestamp: str | None = Header(None),
+):
+    is_new = await check_webhook_message(
+        twitch_eventsub_message_id, twitch_eventsub_message_timestamp
+    )
+
+    try:
+        yield is_new
+    except Exception:
+        # Twitch retries failed deliveries, so the retry must not be dropped
+        if is_new and twitch_eventsub_message_id is not None:
+            await forget_message(twitch_eventsub_message_id)
+        raise
@@ -0,0 +1,175 @@
+from typing import Any, Awaitable, Callable
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.ranking.models import ScoreType
+from src.viewers_leaderboard.ranking.scoring import award_chat_point, award_points
+from src.viewers_leaderboard.ranking.response_cache import invalidate_channel_ranking
+from src.viewers_leaderboard.twitch.models import TwitchStream, TwitchStreamState
+from src.viewers_leaderboard.twitch.stream import (
+    get_current_stream_state,
+    gen_stream_state,
+)
+from src.viewers_leaderboard.streams.sessions import (
+    end_stream_session,
+    get_live_session,
+    remember_live_session,
+    start_stream_session,
+)
+from src.viewers_leaderboard.users.directory import record_chatter
+from src.viewers_leaderboard.webhook.transport import (
+    ChatMessageEvent,
+    CheerEvent,
+    RaidEvent,
+    RevokedWebhookSubscription,
+    StreamOfflineEvent,
+    StreamOnlineEvent,
+    SubscribeEvent,
+)
+
+EventHandler = Callable[[Any, TwitchStream | None], Awaitable[None]]
+
+
+async def resolve_stream_state(
+    broadcaster_user_id: str, active_stream_override: TwitchStream | None
+) -> TwitchStreamState | None:
+    if all([get_settings().env == "dev", active_stream_override]):
+        return gen_stream_state(active_stream_override)
+
+    stream_state = get_live_session(broadcaster_user_id)
+    if stream_state is not None:
+        return stream_state
+
+    stream_state = await get_current_stream_state(broadcaster_user_id)
+    if stream_state is not None:
+        remember_live_session(broadcaster_user_id, stream_state)
+
+    return stream_state
+
+
+async def score_event(
+    broadcaster_user_id: str,
+    viewer_user_id: str,
+    viewer_username: str,
+    active_stream_override: TwitchStream | None,
+    score_type: ScoreType,
+    value: int,
+):
+    stream_state = await resolve_stream_state(
+        broadcaster_user_id, active_stream_override
+    )
+
+    if stream_state is None:
+        return
+
+    await record_chatter(viewer_user_id, viewer_username)
+
+    awarded = await award_points(
+        broadcaster_user_id,
+        viewer_user_id,
+        viewer_username,
+        stream_state.stream_hash,
+        score_type,
+        value,
+    )
+
+    if awarded and not get_settings().score_write_behind:
+        invalidate_channel_ranking(broadcaster_user_id)
+
+
+async def handle_chat_message_event(
+    event: ChatMessageEvent, active_stream_override: TwitchStream | None
+):
+    broadcaster_user_id = event.broadcaster_user_id
+    viewer_username = event.chatter_user_name
+    viewer_user_id = event.chatter_user_id
+
+    stream_state = await resolve_stream_state(
+        broadcaster_user_id, active_stream_override
+    )
+
+    if stream_state is None:
+        return
+
+    stream_hash = stream_state.stream_hash
+
+    await record_chatter(viewer_user_id, viewer_username)
+
+    awarded = await award_chat_point(
+        broadcaster_user_id, viewer_user_id, viewer_username, stream_hash
+    )
+
+    if awarded and not get_settings().score_write_behind:
+        invalidate_channel_ranking(broadcaster_user_id)
+
+
+async def handle_stream_online_event(
+    event: StreamOnlineEvent, active_stream_override: TwitchStream | None
+):
+    await start_stream_session(event.broadcaster_user_id, event.started_at)
+
+
+async def handle_stream_offline_event(
+    event: StreamOfflineEvent, active_stream_override: TwitchStream | None
+):
+    await end_stream_session(event.broadcaster_user_id)
+
+
+async def handle_cheer_event(
+    event: CheerEvent, active_stream_override: TwitchStream | None
+):
+    if event.is_anonymous or event.user_id is None:
+        return
+
+    await score_event(
+        event.broadcaster_user_id,
+        event.user_id,
+        event.user_name,
+        active_stream_override,
+        ScoreType.CHEER,
+        event.bits // get_settings().score_bits_per_point,
+    )
+
+
+async def handle_subscribe_event(
+    event: SubscribeEvent, active_stream_override: TwitchStream | None
+):
+    await score_event(
+        event.broadcaster_user_id,
+        event.user_id,
+        event.user_name,
+        active_stream_override,
+        ScoreType.SUBSCRIPTION,
+        get_settings().score_subscription_points,
+    )
+
+
+async def handle_raid_event(
+    event: RaidEvent, active_stream_override: TwitchStream | None
+):
+    await score_event(
+        event.to_broadcaster_user_id,
+        event.from_broadcaster_user_id,
+        event.from_broadcaster_user_name,
+        active_stream_override,
+        ScoreType.RAID,
+        get_settings().score_raid_points,
+    )
+
+
+def handle_revocation(subscription: RevokedWebhookSubscription):
+    logger.warning(
+        f"Webhook subscription {subscription.id} ({subscription.type}) "
+        f"revoked: {subscription.status}"
+    )
+    metrics.increment("webhook.revocations")
+
+
+EVENT_HANDLERS: dict[str, EventHandler] = {
+    "channel.chat.message": handle_chat_message_event,
+    "stream.online": handle_stream_online_event,
+    "stream.offline": handle_stream_offline_event,
+    "channel.cheer": handle_cheer_event,
+    "channel.subscribe": handle_subscribe_event,
+    "channel.raid": handle_raid_event,
+}
@@ -0,0 +1,20 @@
+from datetime import datetime
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+
+MESSAGE_REPLAY_WINDOW_SECONDS = 600
+
+
+class WebhookMessage(Document):
+    id: str
+    received_at: datetime
+
+    class Settings:
+        name = "webhook_messages"
+        indexes = [
+            IndexModel(
+                [("received_at", ASCENDING)],
+                name="received_at_ttl",
+                expireAfterSeconds=MESSAGE_REPLAY_WINDOW_SECONDS,
+            ),
+        ]
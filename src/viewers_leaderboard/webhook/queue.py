@@ -0,0 +1,99 @@
+import asyncio
+from functools import lru_cache
+from time import perf_counter
+from typing import Any, Awaitable, Callable
+from fastapi import FastAPI
+from src.viewers_leaderboard import metrics
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.settings import get_settings
+
+EventHandler = Callable[..., Awaitable[Any]]
+
+
+class WebhookQueueFullException(Exception): ...
+
+
+class WebhookEventQueue:
+    def __init__(self, maxsize: int, workers: int, enqueue_timeout: float):
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue[tuple[EventHandler, tuple, float]] = asyncio.Queue(
+            maxsize=maxsize
+        )
+        self._tasks: list[asyncio.Task] = []
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    async def enqueue(self, handler: EventHandler, *args):
+        try:
+            await asyncio.wait_for(
+                self._queue.put((handler, args, perf_counter())),
+                timeout=self.enqueue_timeout,
+            )
+        except asyncio.TimeoutError as ex:
+            metrics.increment("webhook_queue.rejected_events")
+            raise WebhookQueueFullException("Webhook event queue is full") from ex
+
+        metrics.increment("webhook_queue.enqueued_events")
+        metrics.set_gauge("webhook_queue.depth", self._queue.qsize())
+
+    async def run_worker(self):
+        while True:
+            handler, args, enqueued_at = await self._queue.get()
+            metrics.set_gauge("webhook_queue.depth", self._queue.qsize())
+            metrics.observe(
+                "webhook_queue.lag_ms", (perf_counter() - enqueued_at) * 1000
+            )
+
+            try:
+                await handler(*args)
+                metrics.increment("webhook_queue.processed_events")
+            except Exception as ex:
+                logger.error(f"Error processing webhook event: {ex}")
+                metrics.increment("webhook_queue.failed_events")
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self.run_worker(), name=f"webhook_worker_{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        await self._queue.join()
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+@lru_cache
+def get_webhook_event_queue():
+    settings = get_settings()
+
+    return WebhookEventQueue(
+        maxsize=settings.webhook_queue_maxsize,
+        workers=settings.webhook_workers,
+        enqueue_timeout=settings.webhook_enqueue_timeout,
+    )
+
+
+async def setup_webhook_event_queue(app: FastAPI):
+    if get_settings().webhook_async_ingest is False:
+        return
+
+    logger.info("Starting webhook workers...")
+    get_webhook_event_queue().start()
+
+
+async def shutdown_webhook_event_queue(app: FastAPI):
+    if get_settings().webhook_async_ingest is False:
+        return
+
+    logger.info("Draining webhook event queue...")
+    await get_webhook_event_queue().stop()
+    logger.info("Webhook event queue drained.")
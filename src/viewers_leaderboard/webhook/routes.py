@@ -1,26 +1,29 @@
 from urllib.parse import urlencode
-from datetime import datetime
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import PlainTextResponse, RedirectResponse
 from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.log import logger
+from src.viewers_leaderboard.presence.tokens import store_broadcaster_token
 from src.viewers_leaderboard.webhook.transport import (
     WebhookPayload,
+    parse_webhook_payload,
     ChallengePayload,
-    ChatMessagePayload,
-    ChatMessageEvent,
+    RevocationPayload,
 )
 from src.viewers_leaderboard.twitch.models import TwitchStream
-from src.viewers_leaderboard.ranking.models import Score, ScoreType
-from src.viewers_leaderboard.twitch.stream import (
-    fetch_current_broadcaster_stream,
-    gen_stream_hash,
-)
 from src.viewers_leaderboard.twitch.auth import validate_webhook_request
 from src.viewers_leaderboard.webhook.transport import (
     parse_active_stream_override_header,
 )
 from src.viewers_leaderboard.twitch.auth import get_user_access_token
+from src.viewers_leaderboard.webhook.dedupe import is_new_webhook_message
+from src.viewers_leaderboard.webhook.handlers import EVENT_HANDLERS, handle_revocation
+from src.viewers_leaderboard.webhook.queue import (
+    get_webhook_event_queue,
+    WebhookQueueFullException,
+)
 from src.viewers_leaderboard.twitch.eventsub import (
+    WEBHOOK_SCOPES,
     subscribe_to_webhooks,
     WebhookSubscriptionConflictException,
 )
@@ -30,16 +33,31 @@ router = APIRouter()
 
 @router.post("/webhook")
 async def webhook(
-    payload: WebhookPayload,
+    _=Depends(validate_webhook_request),
+    is_new_message: bool = Depends(is_new_webhook_message),
+    payload: WebhookPayload = Depends(parse_webhook_payload),
     active_stream_override: TwitchStream | None = Depends(
         parse_active_stream_override_header
     ),
-    _=Depends(validate_webhook_request),
 ):
     if isinstance(payload, ChallengePayload):
         return PlainTextResponse(content=payload.challenge)
-    elif isinstance(payload, ChatMessagePayload):
-        await handle_chat_message_event(payload.event, active_stream_override)
+
+    if not is_new_message:
+        return {"status": "ok"}
+
+    if isinstance(payload, RevocationPayload):
+        handle_revocation(payload.subscription)
+        return {"status": "ok"}
+
+    handler = EVENT_HANDLERS.get(payload.subscription.type)
+
+    if handler is None:
+        logger.warning(f"No handler for {payload.subscription.type} notifications")
+    elif get_settings().webhook_async_ingest:
+        await enqueue_event(handler, payload.event, active_stream_override)
+    else:
+        await handler(payload.event, active_stream_override)
 
     return {"status": "ok"}
 
@@ -52,7 +70,7 @@ async def webhook_subscribe():
         {
             "client_id": settings.app_client_id,
             "response_type": "code",
-            "scope": "channel:bot user:bot user:read:chat",
+            "scope": " ".join(WEBHOOK_SCOPES),
             "redirect_uri": f"{settings.app_base_url}/webhook_subscribe_callback",
         }
     )
@@ -65,6 +83,7 @@ async def webhook_subscribe():
 @router.get("/webhook_subscribe_callback")
 async def webhook_subscribe_callback(code: str):
     token_response = await get_user_access_token(code)
+    await store_broadcaster_token(token_response)
 
     try:
         await subscribe_to_webhooks(token_response.access_token)
@@ -74,45 +93,8 @@ async def webhook_subscribe_callback(code: str):
     return PlainTextResponse("Application authorized!")
 
 
-async def handle_chat_message_event(
-    event: ChatMessageEvent, active_stream_override: TwitchStream
-):
-    broadcaster_user_id = event.broadcaster_user_id
-    viewer_username = event.chatter_user_name
-    viewer_user_id = event.chatter_user_id
-
-    if all([get_settings().env == "dev", active_stream_override]):
-        current_stream = active_stream_override
-    else:
-        current_stream = await fetch_current_broadcaster_stream(broadcaster_user_id)
-
-    if current_stream is None:
-        return
-
-    stream_hash = gen_stream_hash(current_stream)
-
-    score = await Score.find_one(
-        Score.viewer_user_id == viewer_user_id,
-        Score.broadcaster_user_id == broadcaster_user_id,
-        Score.type == ScoreType.CHAT,
-        Score.last_stream_hash == stream_hash,
-    )
-
-    if score is None:
-        score = await Score(
-            viewer_username=viewer_username,
-            viewer_user_id=viewer_user_id,
-            broadcaster_user_id=broadcaster_user_id,
-            type=ScoreType.CHAT,
-            last_stream_hash=stream_hash,
-            value=1,
-        ).save()
-    elif should_score(score):
-        await score.inc({Score.value: 1})
-
-
-def should_score(score: Score):
-    now = datetime.now()
-
-    # 5 minutes elapsed
-    return (now - score.updated_at).total_seconds() >= 300
+async def enqueue_event(handler, *args):
+    try:
+        await get_webhook_event_queue().enqueue(handler, *args)
+    except WebhookQueueFullException as ex:
+        raise HTTPException(503, "Webhook event queue is full") from ex
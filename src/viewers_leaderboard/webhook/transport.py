@@ -1,9 +1,13 @@
-from typing import Union, Literal, Annotated
-from pydantic import BaseModel
-from fastapi import Header, HTTPException
+from datetime import datetime
+from typing import Any, Union, Literal, Annotated
+from pydantic import BaseModel, Discriminator, Tag, TypeAdapter, ValidationError
+from fastapi import Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from src.viewers_leaderboard.log import logger
 from src.viewers_leaderboard.twitch.models import TwitchStream
 
+UNKNOWN_NOTIFICATION_TYPE = "unknown"
+
 
 class WebhookSubscription(BaseModel):
     type: str
@@ -13,6 +17,11 @@ class ChatMessageWebhookSubscription(WebhookSubscription):
     type: Literal["channel.chat.message"]
 
 
+class RevokedWebhookSubscription(WebhookSubscription):
+    id: str
+    status: str
+
+
 class BaseWebhookPayload(BaseModel):
     subscription: WebhookSubscription
 
@@ -23,16 +32,135 @@ class ChatMessageEvent(BaseModel):
     chatter_user_name: str
 
 
+class StreamOnlineEvent(BaseModel):
+    broadcaster_user_id: str
+    started_at: datetime
+
+
+class StreamOfflineEvent(BaseModel):
+    broadcaster_user_id: str
+
+
+class CheerEvent(BaseModel):
+    broadcaster_user_id: str
+    user_id: str | None = None
+    user_name: str | None = None
+    is_anonymous: bool = False
+    bits: int
+
+
+class SubscribeEvent(BaseModel):
+    broadcaster_user_id: str
+    user_id: str
+    user_name: str
+    is_gift: bool = False
+
+
+class RaidEvent(BaseModel):
+    from_broadcaster_user_id: str
+    from_broadcaster_user_name: str
+    to_broadcaster_user_id: str
+    viewers: int
+
+
 class ChatMessagePayload(BaseWebhookPayload):
     subscription: ChatMessageWebhookSubscription
     event: ChatMessageEvent
 
 
+class StreamOnlinePayload(BaseWebhookPayload):
+    event: StreamOnlineEvent
+
+
+class StreamOfflinePayload(BaseWebhookPayload):
+    event: StreamOfflineEvent
+
+
+class CheerPayload(BaseWebhookPayload):
+    event: CheerEvent
+
+
+class SubscribePayload(BaseWebhookPayload):
+    event: SubscribeEvent
+
+
+class RaidPayload(BaseWebhookPayload):
+    event: RaidEvent
+
+
+class UnknownNotificationPayload(BaseWebhookPayload): ...
+
+
 class ChallengePayload(BaseWebhookPayload):
     challenge: str
 
 
-WebhookPayload = Union[ChatMessagePayload, ChallengePayload]
+class RevocationPayload(BaseWebhookPayload):
+    subscription: RevokedWebhookSubscription
+
+
+NOTIFICATION_PAYLOADS: dict[str, type[BaseWebhookPayload]] = {
+    "channel.chat.message": ChatMessagePayload,
+    "stream.online": StreamOnlinePayload,
+    "stream.offline": StreamOfflinePayload,
+    "channel.cheer": CheerPayload,
+    "channel.subscribe": SubscribePayload,
+    "channel.raid": RaidPayload,
+}
+
+
+def get_notification_type(payload: Any) -> str:
+    if isinstance(payload, dict):
+        subscription = payload.get("subscription")
+        subscription_type = (
+            subscription.get("type") if isinstance(subscription, dict) else None
+        )
+    else:
+        subscription_type = payload.subscription.type
+
+    if subscription_type in NOTIFICATION_PAYLOADS:
+        return subscription_type
+
+    return UNKNOWN_NOTIFICATION_TYPE
+
+
+NotificationPayload = Annotated[
+    Union[
+        tuple(
+            Annotated[payload, Tag(subscription_type)]
+            for subscription_type, payload in NOTIFICATION_PAYLOADS.items()
+        )
+        + (Annotated[UnknownNotificationPayload, Tag(UNKNOWN_NOTIFICATION_TYPE)],)
+    ],
+    Discriminator(get_notification_type),
+]
+
+WebhookPayload = Union[ChallengePayload, RevocationPayload, NotificationPayload]
+
+notification_payload_adapter = TypeAdapter(NotificationPayload)
+
+webhook_payload_adapters: dict[str, TypeAdapter] = {
+    "notification": notification_payload_adapter,
+    "webhook_callback_verification": TypeAdapter(ChallengePayload),
+    "revocation": TypeAdapter(RevocationPayload),
+}
+
+
+async def parse_webhook_payload(
+    request: Request,
+    twitch_eventsub_message_type: str | None = Header(None),
+) -> WebhookPayload:
+    adapter = webhook_payload_adapters.get(
+        twitch_eventsub_message_type or "notification"
+    )
+
+    if adapter is None:
+        raise HTTPException(400, "Unsupported message type")
+
+    try:
+        return adapter.validate_json(await request.body())
+    except ValidationError as ex:
+        raise RequestValidationError(ex.errors(include_url=False)) from ex
 
 
 def parse_active_stream_override_header(
@@ -1,6 +1,27 @@
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import pytest
 from mongomock_motor import AsyncMongoMockClient
+from src.viewers_leaderboard.database import setup_database_connection
+from src.viewers_leaderboard.metrics import reset_metrics
+from src.viewers_leaderboard.ranking.buffer import get_score_write_buffer
+from src.viewers_leaderboard.ranking.scoring import (
+    get_cooldown_table,
+    get_shared_cooldowns,
+)
+from src.viewers_leaderboard.ranking.response_cache import get_ranking_cache
+from src.viewers_leaderboard.streams.sessions import get_live_sessions
+from src.viewers_leaderboard.twitch.auth import get_app_token_manager
+from src.viewers_leaderboard.twitch.breaker import get_helix_breaker
+from src.viewers_leaderboard.twitch.http_client import get_http_client
+from src.viewers_leaderboard.twitch.rate_limit import get_helix_rate_limiter
+from src.viewers_leaderboard.twitch.stream import (
+    get_last_known_stream_states,
+    get_stream_lookup_batcher,
+    get_stream_state_cache,
+)
+from src.viewers_leaderboard.users.directory import get_recorded_chatters
+from src.viewers_leaderboard.webhook.dedupe import get_seen_messages
+from src.viewers_leaderboard.webhook.queue import get_webhook_event_queue
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -9,3 +30,31 @@ def mock_db_client():
         "src.viewers_leaderboard.database.AsyncIOMotorClient", AsyncMongoMockClient
     ) as mocked_client:
         yield mocked_client
+
+
+@pytest.fixture
+async def database(mock_db_client):
+    app = MagicMock()
+    await setup_database_connection(app)
+    yield app.db_client
+
+
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    yield
+    get_stream_state_cache.cache_clear()
+    get_stream_lookup_batcher.cache_clear()
+    get_cooldown_table.cache_clear()
+    get_shared_cooldowns.cache_clear()
+    get_score_write_buffer.cache_clear()
+    get_ranking_cache.cache_clear()
+    get_webhook_event_queue.cache_clear()
+    get_seen_messages.cache_clear()
+    get_live_sessions.cache_clear()
+    get_recorded_chatters.cache_clear()
+    get_app_token_manager.cache_clear()
+    get_http_client.cache_clear()
+    get_helix_rate_limiter.cache_clear()
+    get_helix_breaker.cache_clear()
+    get_last_known_stream_states.cache_clear()
+    reset_metrics()
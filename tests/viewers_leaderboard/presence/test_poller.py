@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock
+import httpx
+from pytest_httpx import HTTPXMock
+from twitchio.http import Route
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.presence.models import BroadcasterToken
+from src.viewers_leaderboard.presence.poller import (
+    get_poll_shard,
+    poll_broadcaster_chatters,
+    poll_view_shard,
+)
+from src.viewers_leaderboard.ranking.models import LeaderboardTotal, Score, ScoreType
+from src.viewers_leaderboard.streams.models import StreamSession
+from src.viewers_leaderboard.streams.sessions import (
+    end_stream_session,
+    get_live_sessions,
+    start_stream_session,
+)
+from src.viewers_leaderboard.twitch.models import TwitchStream, TwitchStreamState
+from src.viewers_leaderboard.twitch.stream import gen_stream_state
+from src.viewers_leaderboard.twitch.transport import AuthUserTokenResponse
+from src.viewers_leaderboard.users.models import TwitchUser
+
+
+def chatters_url(broadcaster_id: str, cursor: str | None = None):
+    params = {"broadcaster_id": broadcaster_id, "moderator_id": broadcaster_id}
+    params["first"] = 1000
+    if cursor is not None:
+        params["after"] = cursor
+
+    return httpx.URL(f"{Route.BASE_URL}/chat/chatters", params=params)
+
+
+def chatters_page(user_ids: list[str], cursor: str | None = None):
+    return {
+        "data": [
+            {
+                "user_id": user_id,
+                "user_login": f"viewer_{user_id}",
+                "user_name": f"Viewer_{user_id}",
+            }
+            for user_id in user_ids
+        ],
+        "pagination": {"cursor": cursor} if cursor else {},
+        "total": 3,
+    }
+
+
+def helix_streams(stream_states: dict[str, TwitchStreamState]):
+    async def get_current_stream_state(broadcaster_id: str):
+        return stream_states.get(broadcaster_id)
+
+    return patch(
+        "src.viewers_leaderboard.presence.poller.get_current_stream_state",
+        side_effect=get_current_stream_state,
+    )
+
+
+async def test_poll_broadcaster_chatters_should_award_view_points_for_every_page(
+    httpx_mock: HTTPXMock, database
+):
+    token = BroadcasterToken(id="1", access_token="token", refresh_token="refresh")
+    httpx_mock.add_response(
+        url=chatters_url("1"),
+        match_headers={"Authorization": "Bearer token"},
+        json=chatters_page(["10", "11"], cursor="next"),
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        url=chatters_url("1", cursor="next"),
+        json=chatters_page(["12"]),
+        is_reusable=True,
+    )
+
+    awarded = await poll_broadcaster_chatters(token, "stream_hash")
+    await poll_broadcaster_chatters(token, "stream_hash")
+
+    assert awarded == 3
+    scores = await Score.find(Score.type == ScoreType.VIEW).to_list()
+    assert {score.viewer_user_id: score.value for score in scores} == {
+        "10": 2,
+        "11": 2,
+        "12": 2,
+    }
+    assert all(score.last_stream_hash == "stream_hash" for score in scores)
+    totals = await LeaderboardTotal.find(
+        LeaderboardTotal.broadcaster_user_id == "1"
+    ).to_list()
+    assert {total.viewer_user_id: total.total for total in totals} == {
+        "10": 2,
+        "11": 2,
+        "12": 2,
+    }
+    assert (await TwitchUser.get("12")).username == "Viewer_12"
+    assert get_metrics()["counters"]["view_poller.pages"] == 4
+
+
+async def test_poll_broadcaster_chatters_should_refresh_expired_token(
+    httpx_mock: HTTPXMock, database
+):
+    token = BroadcasterToken(id="1", access_token="expired", refresh_token="refresh")
+    await token.insert()
+    httpx_mock.add_response(
+        url=chatters_url("1"),
+        match_headers={"Authorization": "Bearer expired"},
+        status_code=401,
+    )
+    httpx_mock.add_response(
+        url=chatters_url("1"),
+        match_headers={"Authorization": "Bearer fresh"},
+        json=chatters_page(["10"]),
+    )
+
+    with patch(
+        "src.viewers_leaderboard.presence.tokens.refresh_user_access_token",
+        new_callable=AsyncMock,
+        return_value=AuthUserTokenResponse(
+            access_token="fresh",
+            refresh_token="fresh_refresh",
+            expires_in=3600,
+            token_type="bearer",
+        ),
+    ):
+        awarded = await poll_broadcaster_chatters(token, "stream_hash")
+
+    assert awarded == 1
+    assert (await BroadcasterToken.get("1")).access_token == "fresh"
+
+
+@patch(
+    "src.viewers_leaderboard.presence.poller.poll_broadcaster_chatters",
+    new_callable=AsyncMock,
+    return_value=2,
+)
+async def test_poll_view_shard_should_poll_live_broadcasters_with_tokens(
+    poll_broadcaster_chatters_mock: AsyncMock, database
+):
+    for broadcaster_id in ["live", "offline"]:
+        await BroadcasterToken(
+            id=broadcaster_id, access_token="token", refresh_token="refresh"
+        ).insert()
+    now = datetime.now(timezone.utc)
+    stream_state = await start_stream_session("live", now)
+    await start_stream_session("offline", now)
+    await end_stream_session("offline")
+    unauthorized_state = await start_stream_session("unauthorized", now)
+    get_live_sessions.cache_clear()
+
+    with helix_streams({"live": stream_state, "unauthorized": unauthorized_state}):
+        assert await poll_view_shard(0, 1) == 2
+
+    poll_broadcaster_chatters_mock.assert_awaited_once()
+    token, stream_hash = poll_broadcaster_chatters_mock.await_args.args
+    assert token.id == "live"
+    assert stream_hash == stream_state.stream_hash
+
+
+@patch(
+    "src.viewers_leaderboard.presence.poller.poll_broadcaster_chatters",
+    new_callable=AsyncMock,
+    return_value=1,
+)
+async def test_poll_view_shard_should_spread_broadcasters_across_shards(
+    poll_broadcaster_chatters_mock: AsyncMock, database
+):
+    broadcaster_ids = [str(i) for i in range(20)]
+    stream_states = {}
+    for broadcaster_id in broadcaster_ids:
+        await BroadcasterToken(
+            id=broadcaster_id, access_token="token", refresh_token="refresh"
+        ).insert()
+        stream_states[broadcaster_id] = await start_stream_session(
+            broadcaster_id, datetime.now(timezone.utc)
+        )
+
+    with helix_streams(stream_states):
+        polled_per_shard = [await poll_view_shard(shard, 4) for shard in range(4)]
+
+    assert sum(polled_per_shard) == len(broadcaster_ids)
+    assert max(polled_per_shard) < len(broadcaster_ids)
+    assert all(0 <= get_poll_shard(id, 4) < 4 for id in broadcaster_ids)
+
+
+@patch(
+    "src.viewers_leaderboard.presence.poller.poll_broadcaster_chatters",
+    new_callable=AsyncMock,
+)
+async def test_poll_view_shard_should_close_open_sessions_of_offline_streams(
+    poll_broadcaster_chatters_mock: AsyncMock, database
+):
+    await BroadcasterToken(
+        id="offline", access_token="token", refresh_token="refresh"
+    ).insert()
+    stream_state = await start_stream_session("offline", datetime.now(timezone.utc))
+
+    with helix_streams({}):
+        assert await poll_view_shard(0, 1) == 0
+
+    poll_broadcaster_chatters_mock.assert_not_awaited()
+    assert (await StreamSession.get(stream_state.stream_hash)).ended_at is not None
+    assert get_metrics()["counters"]["view_poller.closed_sessions"] == 1
+
+
+@patch(
+    "src.viewers_leaderboard.presence.poller.poll_broadcaster_chatters",
+    new_callable=AsyncMock,
+    return_value=1,
+)
+async def test_poll_view_shard_should_follow_the_stream_reported_by_helix(
+    poll_broadcaster_chatters_mock: AsyncMock, database
+):
+    await BroadcasterToken(
+        id="live", access_token="token", refresh_token="refresh"
+    ).insert()
+    now = datetime.now(timezone.utc)
+    await start_stream_session("live", now - timedelta(hours=5))
+    current_state = gen_stream_state(
+        TwitchStream(broadcaster_id="live", started_at=now)
+    )
+
+    with helix_streams({"live": current_state}):
+        assert await poll_view_shard(0, 1) == 1
+
+    _, stream_hash = poll_broadcaster_chatters_mock.await_args.args
+    assert stream_hash == current_state.stream_hash
+    open_sessions = await StreamSession.find(StreamSession.ended_at == None).to_list()
+    assert [session.id for session in open_sessions] == [current_state.stream_hash]
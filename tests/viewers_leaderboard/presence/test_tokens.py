@@ -0,0 +1,59 @@
+from unittest.mock import patch, AsyncMock
+from src.viewers_leaderboard.presence.models import BroadcasterToken
+from src.viewers_leaderboard.presence.tokens import (
+    refresh_broadcaster_token,
+    store_broadcaster_token,
+)
+from src.viewers_leaderboard.twitch.transport import (
+    AuthUserTokenResponse,
+    TokenValidationResponse,
+)
+
+
+def build_token_response(access_token: str, refresh_token: str):
+    return AuthUserTokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_in=3600,
+        token_type="bearer",
+    )
+
+
+@patch(
+    "src.viewers_leaderboard.presence.tokens.validate_user_token",
+    new_callable=AsyncMock,
+    return_value=TokenValidationResponse(
+        client_id="client", login="broadcaster", scopes=[], user_id="1", expires_in=1
+    ),
+)
+async def test_store_broadcaster_token_should_upsert_token_of_validated_user(
+    validate_user_token_mock: AsyncMock, database
+):
+    await store_broadcaster_token(build_token_response("first", "first_refresh"))
+    await store_broadcaster_token(build_token_response("second", "second_refresh"))
+
+    token = await BroadcasterToken.get("1")
+    assert token.access_token == "second"
+    assert token.refresh_token == "second_refresh"
+    assert await BroadcasterToken.find_all().count() == 1
+    validate_user_token_mock.assert_awaited_with("second")
+
+
+@patch(
+    "src.viewers_leaderboard.presence.tokens.refresh_user_access_token",
+    new_callable=AsyncMock,
+    return_value=build_token_response("new", "new_refresh"),
+)
+async def test_refresh_broadcaster_token_should_store_refreshed_token(
+    refresh_user_access_token_mock: AsyncMock, database
+):
+    token = BroadcasterToken(id="1", access_token="old", refresh_token="old_refresh")
+    await token.insert()
+
+    refreshed = await refresh_broadcaster_token(token)
+
+    refresh_user_access_token_mock.assert_awaited_once_with("old_refresh")
+    assert refreshed.access_token == "new"
+    stored = await BroadcasterToken.get("1")
+    assert stored.access_token == "new"
+    assert stored.refresh_token == "new_refresh"
@@ -0,0 +1,164 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock
+from pymongo.errors import AutoReconnect
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.ranking.models import Score, ScoreType, LeaderboardTotal
+from src.viewers_leaderboard.ranking.buffer import ScoreWriteBuffer
+
+
+def score_key(viewer_user_id: str = "viewer", score_type=ScoreType.CHAT):
+    return ("broadcaster", viewer_user_id, score_type, "hash")
+
+
+async def test_score_write_buffer_should_merge_increments_for_the_same_key(database):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+
+    buffer.add(score_key(), "viewer", value=2)
+    buffer.add(score_key(), "viewer_renamed", value=3)
+    buffer.add(score_key("other_viewer"), "other_viewer")
+
+    flushed = await buffer.flush()
+
+    score = await Score.find_one(Score.viewer_user_id == "viewer")
+    assert flushed == 2
+    assert len(buffer) == 0
+    assert score.value == 5
+    assert score.viewer_username == "viewer_renamed"
+    assert await Score.find_all().count() == 2
+    assert get_metrics()["summaries"]["score_buffer.flush_size"]["sum"] == 2
+
+    total = await LeaderboardTotal.find_one(LeaderboardTotal.viewer_user_id == "viewer")
+    assert total.total == 5
+    assert total.viewer_username == "viewer_renamed"
+
+
+async def test_score_write_buffer_should_reject_increments_inside_cooldown(database):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+    now = datetime.now()
+
+    buffer.add(score_key(), "viewer", awarded_at=now, cooldown_seconds=300)
+    await buffer.flush()
+    buffer.add(
+        score_key(),
+        "viewer",
+        awarded_at=now + timedelta(seconds=10),
+        cooldown_seconds=300,
+    )
+    await buffer.flush()
+
+    score = await Score.find_one()
+    assert score.value == 1
+    assert (await LeaderboardTotal.find_one()).total == 1
+    assert get_metrics()["counters"]["score_buffer.rejected_operations"] == 1
+
+
+async def test_score_write_buffer_should_reject_cooldown_without_unique_index(
+    database,
+):
+    await Score.get_motor_collection().drop_indexes()
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+    now = datetime.now()
+
+    for seconds in (0, 10, 20):
+        buffer.add(
+            score_key(),
+            "viewer",
+            awarded_at=now + timedelta(seconds=seconds),
+            cooldown_seconds=300,
+        )
+        await buffer.flush()
+
+    assert await Score.find_all().count() == 1
+    assert (await Score.find_one()).value == 1
+    assert (await LeaderboardTotal.find_one()).total == 1
+    assert get_metrics()["counters"]["score_buffer.rejected_operations"] == 2
+
+
+async def test_score_write_buffer_should_requeue_operations_when_flush_fails(database):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+    buffer.add(score_key(), "viewer")
+
+    with patch.object(Score, "get_motor_collection") as get_motor_collection_mock:
+        get_motor_collection_mock.return_value.bulk_write = AsyncMock(
+            side_effect=AutoReconnect("connection lost")
+        )
+        await buffer.flush()
+
+    assert len(buffer) == 1
+    assert get_metrics()["counters"]["score_buffer.flush_failures"] == 1
+
+    await buffer.flush()
+
+    assert (await Score.find_one()).value == 1
+
+
+async def test_score_write_buffer_should_flush_when_max_operations_is_reached(
+    database,
+):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=2)
+    buffer.start()
+
+    buffer.add(score_key("viewer1"), "viewer1")
+    buffer.add(score_key("viewer2"), "viewer2")
+
+    for _ in range(100):
+        if await Score.find_all().count() == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    await buffer.stop()
+
+    assert await Score.find_all().count() == 2
+
+
+async def test_score_write_buffer_stop_should_drain_pending_operations(database):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+    buffer.start()
+
+    buffer.add(score_key(), "viewer")
+    await buffer.stop()
+
+    assert len(buffer) == 0
+    assert (await Score.find_one()).value == 1
+
+
+@patch("src.viewers_leaderboard.ranking.buffer.FINAL_FLUSH_RETRY_DELAY", 0)
+async def test_score_write_buffer_stop_should_retry_final_flush(database):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+    buffer.add(score_key(), "viewer")
+    collection = Score.get_motor_collection()
+    failures = [AutoReconnect("connection lost")]
+
+    async def flaky_bulk_write(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await collection.bulk_write(*args, **kwargs)
+
+    bulk_write = AsyncMock(side_effect=flaky_bulk_write)
+
+    with patch.object(Score, "get_motor_collection") as get_motor_collection_mock:
+        get_motor_collection_mock.return_value.bulk_write = bulk_write
+        await buffer.stop()
+
+    assert bulk_write.await_count == 2
+    assert len(buffer) == 0
+    assert (await Score.find_one()).value == 1
+    assert "score_buffer.dropped_points" not in get_metrics()["counters"]
+
+
+@patch("src.viewers_leaderboard.ranking.buffer.FINAL_FLUSH_RETRY_DELAY", 0)
+async def test_score_write_buffer_stop_should_count_dropped_points(database):
+    buffer = ScoreWriteBuffer(flush_interval=60, max_operations=100)
+    buffer.add(score_key(), "viewer", value=2)
+    buffer.add(score_key("other_viewer"), "other_viewer")
+
+    with patch.object(Score, "get_motor_collection") as get_motor_collection_mock:
+        get_motor_collection_mock.return_value.bulk_write = AsyncMock(
+            side_effect=AutoReconnect("connection lost")
+        )
+        await buffer.stop()
+
+    assert get_motor_collection_mock.return_value.bulk_write.await_count == 3
+    assert len(buffer) == 0
+    assert get_metrics()["counters"]["score_buffer.dropped_points"] == 3
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import pytest
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+from src.viewers_leaderboard.ranking.models import Score, ScoreType
+from src.viewers_leaderboard.ranking.migrations import (
+    drop_unused_score_indexes,
+    merge_duplicate_scores,
+)
+
+
+@pytest.fixture
+async def unindexed_database():
+    client = AsyncMongoMockClient()
+    await init_beanie(
+        database=client["test"], document_models=[Score], skip_indexes=True
+    )
+    yield client["test"]
+
+
+def build_score(value: int, updated_at: datetime, **kwargs):
+    return Score(
+        viewer_username="viewer",
+        broadcaster_user_id="broadcaster",
+        type=ScoreType.CHAT,
+        last_stream_hash="hash",
+        value=value,
+        created_at=updated_at,
+        updated_at=updated_at,
+        **kwargs,
+    )
+
+
+async def test_merge_duplicate_scores_should_sum_duplicated_stream_scores(
+    unindexed_database,
+):
+    now = datetime.now()
+    await build_score(1, now - timedelta(minutes=10), viewer_user_id="1").insert()
+    await build_score(2, now, viewer_user_id="1").insert()
+    await build_score(3, now, viewer_user_id="2").insert()
+
+    merged = await merge_duplicate_scores()
+
+    scores = await Score.find(Score.viewer_user_id == "1").to_list()
+    assert merged == 1
+    assert len(scores) == 1
+    assert scores[0].value == 3
+    assert scores[0].created_at < scores[0].updated_at
+    assert (await Score.find_one(Score.viewer_user_id == "2")).value == 3
+
+
+async def test_drop_unused_score_indexes_should_drop_covering_index(
+    unindexed_database,
+):
+    collection = Score.get_motor_collection()
+    await collection.create_index(
+        [("broadcaster_user_id", 1), ("viewer_username", 1), ("value", 1)],
+        name="broadcaster_ranking_covering",
+    )
+
+    await drop_unused_score_indexes()
+    await drop_unused_score_indexes()
+
+    assert "broadcaster_ranking_covering" not in await collection.index_information()
@@ -0,0 +1,52 @@
+import asyncio
+from src.viewers_leaderboard.ranking.response_cache import (
+    CachedResponse,
+    get_cached_ranking,
+    invalidate_channel_ranking,
+)
+
+
+async def test_get_cached_ranking_should_share_concurrent_computations():
+    computations = 0
+
+    async def compute():
+        nonlocal computations
+        computations += 1
+        await asyncio.sleep(0.01)
+        return CachedResponse.from_content([{"score": 1}])
+
+    responses = await asyncio.gather(
+        *[get_cached_ranking("channel", (10, 0), compute) for _ in range(10)]
+    )
+
+    assert computations == 1
+    assert {response.etag for response in responses} == {responses[0].etag}
+
+
+async def test_invalidate_channel_ranking_should_only_affect_that_channel():
+    computations = []
+
+    async def compute_for(channel_id: str):
+        async def compute():
+            computations.append(channel_id)
+            return CachedResponse.from_content([])
+
+        return await get_cached_ranking(channel_id, (10, 0), compute)
+
+    await compute_for("channel1")
+    await compute_for("channel2")
+    invalidate_channel_ranking("channel1")
+    await compute_for("channel1")
+    await compute_for("channel2")
+
+    assert computations == ["channel1", "channel2", "channel1"]
+
+
+def test_cached_response_should_match_if_none_match_header():
+    response = CachedResponse.from_content([])
+
+    assert response.matches(response.etag)
+    assert response.matches(f'"other", W/{response.etag}')
+    assert response.matches("*")
+    assert not response.matches('"other"')
+    assert not response.matches(None)
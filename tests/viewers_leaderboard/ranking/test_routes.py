@@ -1,82 +1,323 @@
+import json
+from os import getenv
 from unittest.mock import patch, AsyncMock
 import pytest
-from polyfactory.pytest_plugin import register_fixture
-from polyfactory.factories.pydantic_factory import ModelFactory
+from beanie import init_beanie
 from fastapi.testclient import TestClient
-from src.viewers_leaderboard.twitch.models import TwitchUser
+from motor.motor_asyncio import AsyncIOMotorClient
+from src.viewers_leaderboard.ranking.models import LeaderboardTotal
+from src.viewers_leaderboard.ranking.routes import fetch_ranking_page
+from src.viewers_leaderboard.ranking.response_cache import invalidate_channel_ranking
+from src.viewers_leaderboard.users.models import TwitchUser
 from src.viewers_leaderboard.main import app
 
-
-@register_fixture
-class TwitchUserFactory(ModelFactory[TwitchUser]): ...
+TEST_MONGO_CONN_STR = getenv("TEST_MONGO_CONN_STR")
 
 
 @pytest.fixture
 def test_client():
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+async def mongod():
+    if TEST_MONGO_CONN_STR is None:
+        pytest.skip("TEST_MONGO_CONN_STR is not set")
+
+    client = AsyncIOMotorClient(TEST_MONGO_CONN_STR)
+    await init_beanie(
+        database=client["ranking_test"], document_models=[LeaderboardTotal, TwitchUser]
+    )
+    await LeaderboardTotal.get_motor_collection().delete_many({})
+    yield
+    await LeaderboardTotal.get_motor_collection().delete_many({})
+    client.close()
+
 
+async def insert_total(viewer_user_id: str, total: int, channel="test_channel"):
+    await LeaderboardTotal(
+        broadcaster_user_id=channel,
+        viewer_user_id=viewer_user_id,
+        viewer_username=f"user{viewer_user_id}",
+        total=total,
+    ).insert()
 
-@pytest.mark.asyncio
-@patch("src.viewers_leaderboard.ranking.routes.get_user", new_callable=AsyncMock)
-@patch("src.viewers_leaderboard.ranking.routes.Score.aggregate")
+
+def build_row(viewer_user_id: str, score: int, rank: int, position: int):
+    return {
+        "viewer_user_id": viewer_user_id,
+        "username": f"user{viewer_user_id}",
+        "score": score,
+        "rank": rank,
+        "position": position,
+    }
+
+
+def expected_pipeline(channel_id: str, position: int, limit: int):
+    return [
+        {"$match": {"broadcaster_user_id": channel_id}},
+        {
+            "$setWindowFields": {
+                "sortBy": {"total": -1},
+                "output": {"rank": {"$rank": {}}},
+            }
+        },
+        {
+            "$setWindowFields": {
+                "sortBy": {"total": -1, "viewer_user_id": 1},
+                "output": {"position": {"$documentNumber": {}}},
+            }
+        },
+        {"$match": {"position": {"$gt": position}}},
+        {"$limit": limit + 1},
+        {
+            "$project": {
+                "_id": 0,
+                "viewer_user_id": 1,
+                "username": "$viewer_username",
+                "score": "$total",
+                "rank": 1,
+                "position": 1,
+            }
+        },
+    ]
+
+
+@patch("src.viewers_leaderboard.ranking.routes.LeaderboardTotal.aggregate")
 async def test_ranking_route_should_return_channel_ranking(
-    mock_aggregate: AsyncMock,
-    get_user_mock: AsyncMock,
-    twitch_user_factory: TwitchUserFactory,
-    test_client: TestClient,
+    mock_aggregate: AsyncMock, test_client: TestClient
 ):
-    user_mocks: list[TwitchUser] = [twitch_user_factory.build() for _ in range(2)]
+    await TwitchUser(id="1", username="user1", profile_image="image1").insert()
+    await TwitchUser(id="2", username="user2", profile_image="image2").insert()
+    mock_aggregate.return_value.to_list = AsyncMock(
+        return_value=[build_row("1", 10, 1, 1), build_row("2", 5, 2, 2)]
+    )
+
+    response = test_client.get("/ranking/test_channel")
 
-    def get_user_mock_side_effect(username: str):
-        if username == "user1":
-            return user_mocks[0]
-        elif username == "user2":
-            return user_mocks[1]
-        return None
+    assert response.status_code == 200
+    assert response.json() == [
+        {"username": "user1", "score": 10, "rank": 1, "profile_picture": "image1"},
+        {"username": "user2", "score": 5, "rank": 2, "profile_picture": "image2"},
+    ]
+    assert "x-next-cursor" not in response.headers
+    mock_aggregate.assert_called_once_with(expected_pipeline("test_channel", 0, 10))
 
-    get_user_mock.side_effect = get_user_mock_side_effect
 
+@patch("src.viewers_leaderboard.ranking.routes.LeaderboardTotal.aggregate")
+async def test_ranking_route_should_paginate_with_cursor(
+    mock_aggregate: AsyncMock, test_client: TestClient
+):
     mock_aggregate.return_value.to_list = AsyncMock(
         return_value=[
-            {
-                "username": "user1",
-                "score": 10,
-                "profile_picture": user_mocks[0].profile_image,
-            },
-            {
-                "username": "user2",
-                "score": 5,
-                "profile_picture": user_mocks[1].profile_image,
-            },
+            build_row("3", 5, 3, 3),
+            build_row("4", 5, 3, 4),
+            build_row("5", 1, 5, 5),
         ]
     )
 
-    response = test_client.get("/ranking/test_channel")
+    response = test_client.get("/ranking/test_channel?limit=2&cursor=2")
 
     assert response.status_code == 200
-    assert response.json() == [
-        {
-            "username": "user1",
-            "score": 10,
-            "profile_picture": user_mocks[0].profile_image,
-        },
-        {
-            "username": "user2",
-            "score": 5,
-            "profile_picture": user_mocks[1].profile_image,
+    assert [row["rank"] for row in response.json()] == [3, 3]
+    assert response.json()[0]["profile_picture"] is None
+    assert response.headers["x-next-cursor"] == "4"
+    mock_aggregate.assert_called_once_with(expected_pipeline("test_channel", 2, 2))
+
+
+async def test_fetch_ranking_page_should_keep_tied_totals_stable_across_pages(
+    mongod,
+):
+    for viewer_user_id, total in [("e", 10), ("d", 5), ("b", 5), ("c", 5), ("a", 1)]:
+        await insert_total(viewer_user_id, total)
+
+    pages = []
+    cursor = "0"
+    while cursor is not None:
+        rows, cursor = await fetch_ranking_page("test_channel", int(cursor), 2)
+        pages.append([(row["username"], row["rank"]) for row in rows])
+
+    assert pages == [
+        [("usere", 1), ("userb", 2)],
+        [("userc", 2), ("userd", 2)],
+        [("usera", 5)],
+    ]
+
+
+@pytest.mark.parametrize("query", ["cursor=abc", "cursor=-1", "limit=0", "limit=101"])
+def test_ranking_route_should_reject_invalid_pagination(
+    query: str, test_client: TestClient
+):
+    response = test_client.get(f"/ranking/test_channel?{query}")
+
+    assert response.status_code in (400, 422)
+
+
+async def test_viewer_position_route_should_return_rank_and_neighbours(
+    test_client: TestClient,
+):
+    for viewer_user_id, total in [("1", 50), ("2", 40), ("3", 30), ("4", 30)]:
+        await insert_total(viewer_user_id, total)
+    for viewer_user_id, total in [("5", 30), ("6", 10), ("7", 5)]:
+        await insert_total(viewer_user_id, total)
+    await insert_total("8", 1000, channel="other_channel")
+    await TwitchUser(id="4", username="user4", profile_image="image4").insert()
+
+    response = test_client.get("/ranking/test_channel/viewers/4?window=2")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "viewer": {
+            "username": "user4",
+            "score": 30,
+            "rank": 3,
+            "profile_picture": "image4",
         },
+        "above": [
+            {"username": "user2", "score": 40, "rank": 2, "profile_picture": None},
+            {"username": "user3", "score": 30, "rank": 3, "profile_picture": None},
+        ],
+        "below": [
+            {"username": "user5", "score": 30, "rank": 3, "profile_picture": None},
+            {"username": "user6", "score": 10, "rank": 6, "profile_picture": None},
+        ],
+    }
+
+
+def test_viewer_position_route_should_return_404_for_unranked_viewer(
+    test_client: TestClient,
+):
+    response = test_client.get("/ranking/test_channel/viewers/unknown")
+
+    assert response.status_code == 404
+
+
+@patch("src.viewers_leaderboard.ranking.routes.LeaderboardTotal.aggregate")
+async def test_ranking_route_should_cache_response_with_etag(
+    mock_aggregate: AsyncMock, test_client: TestClient
+):
+    mock_aggregate.return_value.to_list = AsyncMock(
+        return_value=[build_row("1", 10, 1, 1)]
+    )
+
+    first_response = test_client.get("/ranking/test_channel")
+    second_response = test_client.get("/ranking/test_channel")
+
+    assert first_response.status_code == second_response.status_code == 200
+    assert first_response.json() == second_response.json()
+    assert first_response.headers["etag"] == second_response.headers["etag"]
+    assert first_response.headers["cache-control"] == "public, max-age=5"
+    mock_aggregate.assert_called_once()
+
+
+@patch("src.viewers_leaderboard.ranking.routes.LeaderboardTotal.aggregate")
+async def test_ranking_route_should_return_304_for_matching_etag(
+    mock_aggregate: AsyncMock, test_client: TestClient
+):
+    mock_aggregate.return_value.to_list = AsyncMock(
+        return_value=[build_row("1", 10, 1, 1)]
+    )
+
+    etag = test_client.get("/ranking/test_channel").headers["etag"]
+    response = test_client.get(
+        "/ranking/test_channel", headers={"If-None-Match": f'"other", W/{etag}'}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    mock_aggregate.assert_called_once()
+
+
+@patch("src.viewers_leaderboard.ranking.routes.LeaderboardTotal.aggregate")
+async def test_ranking_route_should_recompute_after_channel_invalidation(
+    mock_aggregate: AsyncMock, test_client: TestClient
+):
+    mock_aggregate.return_value.to_list = AsyncMock(
+        side_effect=[[build_row("1", 10, 1, 1)], [build_row("1", 11, 1, 1)]]
+    )
+
+    first_response = test_client.get("/ranking/test_channel")
+    invalidate_channel_ranking("test_channel")
+    second_response = test_client.get(
+        "/ranking/test_channel",
+        headers={"If-None-Match": first_response.headers["etag"]},
+    )
+
+    assert second_response.status_code == 200
+    assert second_response.json()[0]["score"] == 11
+    assert second_response.headers["etag"] != first_response.headers["etag"]
+    assert mock_aggregate.call_count == 2
+
+
+async def test_ranking_export_route_should_stream_ndjson_rows(
+    test_client: TestClient,
+):
+    for viewer_user_id, total in [("1", 50), ("2", 30), ("3", 30), ("4", 10)]:
+        await insert_total(viewer_user_id, total)
+    await insert_total("5", 1000, channel="other_channel")
+
+    response = test_client.get("/ranking/test_channel/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="test_channel-leaderboard.ndjson"'
+    )
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"rank": 1, "viewer_user_id": "1", "username": "user1", "score": 50},
+        {"rank": 2, "viewer_user_id": "2", "username": "user2", "score": 30},
+        {"rank": 2, "viewer_user_id": "3", "username": "user3", "score": 30},
+        {"rank": 4, "viewer_user_id": "4", "username": "user4", "score": 10},
     ]
 
-    mock_aggregate.assert_called_once_with(
-        [
-            {"$match": {"broadcaster_user_id": "test_channel"}},
-            {
-                "$group": {
-                    "_id": "$viewer_username",
-                    "total_score": {"$sum": "$value"},
-                }
-            },
-            {"$sort": {"total_score": -1}},
-            {"$project": {"_id": 0, "username": "$_id", "score": "$total_score"}},
-        ]
+
+async def test_ranking_export_route_should_stream_csv_with_profile_images(
+    test_client: TestClient,
+):
+    await insert_total("1", 50)
+    await insert_total("2", 30)
+    await TwitchUser(id="1", username="user1", profile_image="image1").insert()
+
+    response = test_client.get(
+        "/ranking/test_channel/export?format=csv&include_profile_images=true"
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines() == [
+        "rank,viewer_user_id,username,score,profile_picture",
+        "1,1,user1,50,image1",
+        "2,2,user2,30,",
+    ]
+
+
+@patch("src.viewers_leaderboard.ranking.export.EXPORT_BATCH_SIZE", 2)
+@patch(
+    "src.viewers_leaderboard.ranking.export.get_profile_images",
+    new_callable=AsyncMock,
+    return_value={},
+)
+async def test_ranking_export_route_should_enrich_rows_in_batches(
+    get_profile_images_mock: AsyncMock,
+    test_client: TestClient,
+):
+    for viewer_user_id, total in [("1", 50), ("2", 40), ("3", 30)]:
+        await insert_total(viewer_user_id, total)
+
+    response = test_client.get(
+        "/ranking/test_channel/export?include_profile_images=true"
     )
+
+    assert len(response.text.splitlines()) == 3
+    assert [call.args[0] for call in get_profile_images_mock.await_args_list] == [
+        ["1", "2"],
+        ["3"],
+    ]
+
+
+def test_ranking_export_route_should_reject_unknown_format(test_client: TestClient):
+    response = test_client.get("/ranking/test_channel/export?format=xml")
+
+    assert response.status_code == 422
@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from freezegun import freeze_time
+from polyfactory.pytest_plugin import register_fixture
+from polyfactory.factories.pydantic_factory import ModelFactory
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.settings import Settings
+from src.viewers_leaderboard.ranking.buffer import get_score_write_buffer
+from src.viewers_leaderboard.ranking.models import Score, ScoreType, LeaderboardTotal
+from src.viewers_leaderboard.ranking.scoring import (
+    award_chat_point,
+    get_cooldown_table,
+)
+
+
+@register_fixture
+class SettingsFactory(ModelFactory[Settings]): ...
+
+
+async def test_award_chat_point_should_create_score_on_first_message(database):
+    awarded = await award_chat_point("broadcaster", "viewer", "viewer_name", "hash")
+
+    score = await Score.find_one()
+
+    assert awarded is True
+    assert score.broadcaster_user_id == "broadcaster"
+    assert score.viewer_user_id == "viewer"
+    assert score.viewer_username == "viewer_name"
+    assert score.type == ScoreType.CHAT
+    assert score.last_stream_hash == "hash"
+    assert score.value == 1
+    assert score.created_at == score.updated_at
+
+
+async def test_award_chat_point_should_respect_cooldown(database):
+    now = datetime.now()
+
+    with freeze_time(now):
+        assert await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+    with freeze_time(now + timedelta(seconds=299)):
+        assert not await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+    with freeze_time(now + timedelta(seconds=300)):
+        assert await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    scores = await Score.find_all().to_list()
+    total = await LeaderboardTotal.find_one()
+
+    assert len(scores) == 1
+    assert scores[0].value == 2
+    assert total.broadcaster_user_id == "broadcaster"
+    assert total.viewer_user_id == "viewer"
+    assert total.total == 2
+
+
+async def test_award_chat_point_should_award_once_for_concurrent_messages(database):
+    results = await asyncio.gather(
+        *[award_chat_point("broadcaster", "viewer", "viewer", "hash") for _ in range(5)]
+    )
+
+    scores = await Score.find_all().to_list()
+
+    assert results.count(True) == 1
+    assert len(scores) == 1
+    assert scores[0].value == 1
+
+
+async def test_award_chat_point_should_score_each_stream_separately(database):
+    assert await award_chat_point("broadcaster", "viewer", "viewer", "hash1")
+    assert await award_chat_point("broadcaster", "viewer", "viewer", "hash2")
+
+    assert await Score.find_all().count() == 2
+    assert (await LeaderboardTotal.find_one()).total == 2
+
+
+async def test_award_chat_point_should_skip_database_inside_cached_cooldown(database):
+    now = datetime.now()
+
+    with freeze_time(now):
+        assert await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    with (
+        freeze_time(now + timedelta(seconds=10)),
+        patch.object(Score, "get_motor_collection") as get_motor_collection_mock,
+    ):
+        assert not await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    get_motor_collection_mock.assert_not_called()
+    assert get_metrics()["counters"]["scoring.cooldown_short_circuits"] == 1
+
+
+async def test_award_chat_point_should_check_database_if_cooldown_is_not_cached(
+    database,
+):
+    now = datetime.now()
+
+    with freeze_time(now):
+        assert await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    get_cooldown_table().clear()
+
+    with freeze_time(now + timedelta(seconds=10)):
+        assert not await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    assert "scoring.cooldown_short_circuits" not in get_metrics()["counters"]
+    assert get_metrics()["counters"]["scoring.cooldown_database_hits"] == 1
+
+
+async def test_award_chat_point_should_respect_cooldown_without_unique_index(
+    database,
+):
+    await Score.get_motor_collection().drop_indexes()
+    now = datetime.now()
+
+    for seconds in (0, 10, 20):
+        get_cooldown_table().clear()
+        with freeze_time(now + timedelta(seconds=seconds)):
+            await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    scores = await Score.find_all().to_list()
+
+    assert len(scores) == 1
+    assert scores[0].value == 1
+    assert (await LeaderboardTotal.find_one()).total == 1
+    assert get_metrics()["counters"]["scoring.cooldown_database_hits"] == 2
+
+
+async def test_award_chat_point_should_buffer_point_in_write_behind_mode(
+    database, settings_factory: SettingsFactory
+):
+    settings = settings_factory.build(
+        score_write_behind=True, score_cooldown_seconds=300
+    )
+
+    with patch(
+        "src.viewers_leaderboard.ranking.scoring.get_settings", return_value=settings
+    ):
+        assert await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+        assert not await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    assert await Score.find_one() is None
+    assert len(get_score_write_buffer()) == 1
+
+
+async def test_award_chat_point_should_share_cooldowns_between_workers(
+    database, settings_factory: SettingsFactory
+):
+    settings = settings_factory.build(
+        shared_cache_enabled=True, score_write_behind=False, score_cooldown_seconds=300
+    )
+
+    with patch(
+        "src.viewers_leaderboard.ranking.scoring.get_settings", return_value=settings
+    ):
+        assert await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+        # Another worker starts with an empty local cooldown table
+        get_cooldown_table().clear()
+
+        with patch.object(Score, "get_motor_collection") as get_motor_collection_mock:
+            assert not await award_chat_point("broadcaster", "viewer", "viewer", "hash")
+
+    get_motor_collection_mock.assert_not_called()
+    counters = get_metrics()["counters"]
+    assert counters["cooldowns.misses"] == 2
+    assert counters["cooldowns.shared.misses"] == 1
+    assert counters["cooldowns.shared.hits"] == 1
+    assert counters["scoring.cooldown_short_circuits"] == 1
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from src.viewers_leaderboard.ranking.models import Score, ScoreType, LeaderboardTotal
+from src.viewers_leaderboard.ranking.totals import (
+    increment_leaderboard_totals,
+    rebuild_leaderboard_totals,
+    to_total_operation,
+)
+
+
+async def insert_score(broadcaster: str, viewer: str, stream_hash: str, value: int):
+    await Score(
+        broadcaster_user_id=broadcaster,
+        viewer_user_id=viewer,
+        viewer_username=f"{viewer}_{stream_hash}",
+        type=ScoreType.CHAT,
+        last_stream_hash=stream_hash,
+        value=value,
+        updated_at=datetime.now() + timedelta(minutes=int(stream_hash[-1])),
+    ).insert()
+
+
+async def test_rebuild_leaderboard_totals_should_sum_scores_per_viewer(database):
+    await insert_score("broadcaster", "viewer1", "hash1", 2)
+    await insert_score("broadcaster", "viewer1", "hash2", 3)
+    await insert_score("broadcaster", "viewer2", "hash1", 1)
+    await insert_score("other_broadcaster", "viewer1", "hash1", 7)
+    await LeaderboardTotal(
+        broadcaster_user_id="broadcaster",
+        viewer_user_id="stale_viewer",
+        viewer_username="stale_viewer",
+        total=100,
+        updated_at=datetime.now() - timedelta(minutes=1),
+    ).insert()
+
+    rebuilt = await rebuild_leaderboard_totals("broadcaster")
+
+    totals = await LeaderboardTotal.find(
+        LeaderboardTotal.broadcaster_user_id == "broadcaster"
+    ).to_list()
+    totals_by_viewer = {total.viewer_user_id: total for total in totals}
+
+    assert rebuilt == 2
+    assert set(totals_by_viewer) == {"viewer1", "viewer2"}
+    assert totals_by_viewer["viewer1"].total == 5
+    assert totals_by_viewer["viewer1"].viewer_username == "viewer1_hash2"
+    assert totals_by_viewer["viewer2"].total == 1
+    assert (
+        await LeaderboardTotal.find(
+            LeaderboardTotal.broadcaster_user_id == "other_broadcaster"
+        ).count()
+        == 0
+    )
+
+
+async def test_rebuild_leaderboard_totals_should_rebuild_all_broadcasters(database):
+    await insert_score("broadcaster", "viewer1", "hash1", 2)
+    await insert_score("other_broadcaster", "viewer1", "hash1", 7)
+
+    rebuilt = await rebuild_leaderboard_totals()
+
+    assert rebuilt == 2
+    assert await LeaderboardTotal.find_all().count() == 2
+
+
+async def test_rebuild_leaderboard_totals_should_keep_increments_made_during_rebuild(
+    database,
+):
+    await insert_score("broadcaster", "viewer1", "hash1", 3)
+    await insert_score("broadcaster", "viewer2", "hash1", 2)
+    await increment_leaderboard_totals(
+        [
+            to_total_operation("broadcaster", "viewer1", "viewer1", 3, datetime.now()),
+            to_total_operation("broadcaster", "viewer2", "viewer2", 9, datetime.now()),
+        ]
+    )
+    collection = Score.get_motor_collection()
+    # Points awarded after the Score snapshot was read, the buffer stamps
+    # totals with the time the points were awarded.
+    awarded_at = datetime.now() - timedelta(minutes=1)
+
+    async def aggregate_during_awards(pipeline: list, **kwargs):
+        async for row in collection.aggregate(pipeline, **kwargs):
+            yield row
+
+        await increment_leaderboard_totals(
+            [
+                to_total_operation("broadcaster", "viewer1", "viewer1", 1, awarded_at),
+                to_total_operation("broadcaster", "viewer3", "viewer3", 1, awarded_at),
+            ]
+        )
+
+    with patch.object(Score, "get_motor_collection") as get_motor_collection_mock:
+        get_motor_collection_mock.return_value.aggregate = aggregate_during_awards
+        rebuilt = await rebuild_leaderboard_totals("broadcaster")
+
+    totals = {
+        total.viewer_user_id: total.total
+        for total in await LeaderboardTotal.find_all().to_list()
+    }
+
+    assert rebuilt == 1
+    assert totals == {"viewer1": 4, "viewer2": 2, "viewer3": 1}
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock
+from freezegun import freeze_time
+from src.viewers_leaderboard.streams.models import StreamSession
+from src.viewers_leaderboard.streams.sessions import (
+    end_stream_session,
+    get_live_session,
+    get_live_sessions,
+    load_live_sessions,
+    start_stream_session,
+)
+from src.viewers_leaderboard.twitch.models import TwitchStream
+from src.viewers_leaderboard.twitch.stream import gen_stream_state
+from src.viewers_leaderboard.webhook.handlers import resolve_stream_state
+
+
+async def test_start_stream_session_should_store_session_and_mark_it_live(database):
+    started_at = datetime(2024, 12, 14, 16, 45, 30, tzinfo=timezone.utc)
+
+    stream_state = await start_stream_session("broadcaster", started_at)
+    await start_stream_session("broadcaster", started_at)
+
+    session = await StreamSession.get(stream_state.stream_hash)
+    assert session.broadcaster_user_id == "broadcaster"
+    assert session.ended_at is None
+    assert await StreamSession.find_all().count() == 1
+    assert get_live_session("broadcaster") == stream_state
+
+
+async def test_start_stream_session_should_close_previous_open_session(database):
+    first_started_at = datetime(2024, 12, 14, 16, 0, tzinfo=timezone.utc)
+    second_started_at = datetime(2024, 12, 15, 16, 0, tzinfo=timezone.utc)
+
+    first_state = await start_stream_session("broadcaster", first_started_at)
+    await start_stream_session("broadcaster", second_started_at)
+
+    first_session = await StreamSession.get(first_state.stream_hash)
+    assert first_session.ended_at is not None
+    assert await StreamSession.find(StreamSession.ended_at == None).count() == 1
+
+
+async def test_end_stream_session_should_mark_broadcaster_offline(database):
+    await start_stream_session("broadcaster", datetime.now(timezone.utc))
+
+    await end_stream_session("broadcaster")
+
+    session = await StreamSession.find_one()
+    assert session.ended_at is not None
+    assert get_live_session("broadcaster") is None
+
+
+async def test_load_live_sessions_should_restore_recent_open_sessions(database):
+    now = datetime.now(timezone.utc)
+    stream_state = await start_stream_session("live", now - timedelta(hours=1))
+    await start_stream_session("ended", now - timedelta(hours=2))
+    await end_stream_session("ended")
+    await start_stream_session("abandoned", now - timedelta(hours=72))
+    get_live_sessions.cache_clear()
+
+    loaded = await load_live_sessions()
+
+    assert loaded == 1
+    assert get_live_session("live").stream_hash == stream_state.stream_hash
+    assert get_live_session("ended") is None
+    assert get_live_session("abandoned") is None
+
+
+@patch(
+    "src.viewers_leaderboard.webhook.handlers.get_current_stream_state",
+    new_callable=AsyncMock,
+)
+async def test_resolve_stream_state_should_use_live_session_if_known(
+    get_current_stream_state_mock: AsyncMock, database
+):
+    stream_state = await start_stream_session("live", datetime.now(timezone.utc))
+
+    assert await resolve_stream_state("live", None) == stream_state
+    get_current_stream_state_mock.assert_not_awaited()
+
+
+@patch(
+    "src.viewers_leaderboard.webhook.handlers.get_current_stream_state",
+    new_callable=AsyncMock,
+)
+async def test_resolve_stream_state_should_use_helix_for_offline_or_unknown_sessions(
+    get_current_stream_state_mock: AsyncMock, database
+):
+    get_current_stream_state_mock.return_value = None
+    await start_stream_session("offline", datetime.now(timezone.utc))
+    await end_stream_session("offline")
+
+    await resolve_stream_state("offline", None)
+    await resolve_stream_state("unknown", None)
+
+    assert [call.args for call in get_current_stream_state_mock.await_args_list] == [
+        ("offline",),
+        ("unknown",),
+    ]
+
+
+@patch(
+    "src.viewers_leaderboard.webhook.handlers.get_current_stream_state",
+    new_callable=AsyncMock,
+)
+async def test_resolve_stream_state_should_keep_live_session_for_the_whole_stream(
+    get_current_stream_state_mock: AsyncMock, database
+):
+    started_at = datetime.now(timezone.utc)
+
+    with freeze_time(started_at):
+        stream_state = await start_stream_session("live", started_at)
+    with freeze_time(started_at + timedelta(hours=6)):
+        assert await resolve_stream_state("live", None) == stream_state
+
+    get_current_stream_state_mock.assert_not_awaited()
+
+
+@patch(
+    "src.viewers_leaderboard.webhook.handlers.get_current_stream_state",
+    new_callable=AsyncMock,
+)
+async def test_resolve_stream_state_should_remember_live_stream_found_on_helix(
+    get_current_stream_state_mock: AsyncMock, database
+):
+    stream_state = gen_stream_state(
+        TwitchStream(broadcaster_id="live", started_at=datetime.now(timezone.utc))
+    )
+    get_current_stream_state_mock.return_value = stream_state
+
+    assert await resolve_stream_state("live", None) == stream_state
+    assert await resolve_stream_state("live", None) == stream_state
+
+    get_current_stream_state_mock.assert_awaited_once_with("live")
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from polyfactory.pytest_plugin import register_fixture
+from polyfactory.factories.pydantic_factory import ModelFactory
+from src.viewers_leaderboard.leases import Lease
+from src.viewers_leaderboard.settings import Settings
+from src.viewers_leaderboard.background import (
+    run_as_leader,
+    start_background_jobs,
+    stop_background_jobs,
+)
+
+
+@register_fixture
+class SettingsFactory(ModelFactory[Settings]): ...
+
+
+async def test_start_background_jobs_should_run_jobs_until_stopped(
+    settings_factory: SettingsFactory,
+):
+    app = MagicMock()
+    started = asyncio.Event()
+
+    async def job():
+        started.set()
+        await asyncio.Event().wait()
+
+    with (
+        patch(
+            "src.viewers_leaderboard.background.get_settings",
+            return_value=settings_factory.build(background_jobs_enabled=True),
+        ),
+        patch(
+            "src.viewers_leaderboard.background.get_background_jobs",
+            return_value={"test_job": job},
+        ),
+        patch(
+            "src.viewers_leaderboard.background.get_leader_jobs",
+            return_value={},
+        ),
+    ):
+        await start_background_jobs(app)
+        await asyncio.wait_for(started.wait(), timeout=1)
+        await stop_background_jobs(app)
+
+    assert [task.get_name() for task in app.background_tasks] == ["test_job"]
+    assert all(task.cancelled() for task in app.background_tasks)
+
+
+async def test_start_background_jobs_should_not_start_jobs_if_disabled(
+    settings_factory: SettingsFactory,
+):
+    app = MagicMock()
+
+    with patch(
+        "src.viewers_leaderboard.background.get_settings",
+        return_value=settings_factory.build(background_jobs_enabled=False),
+    ):
+        await start_background_jobs(app)
+
+    assert app.background_tasks == []
+
+
+async def test_run_as_leader_should_run_job_on_a_single_worker(
+    settings_factory: SettingsFactory, database
+):
+    running: list[str] = []
+
+    def create_job(worker: str):
+        async def job():
+            running.append(worker)
+            await asyncio.Event().wait()
+
+        return job
+
+    with (
+        patch(
+            "src.viewers_leaderboard.background.get_settings",
+            return_value=settings_factory.build(background_job_lease_ttl=0.3),
+        ),
+        patch(
+            "src.viewers_leaderboard.background.get_worker_id",
+            side_effect=["leader", "standby"],
+        ),
+    ):
+        leader = asyncio.create_task(run_as_leader("job", create_job("leader")))
+        await asyncio.sleep(0.05)
+        standby = asyncio.create_task(run_as_leader("job", create_job("standby")))
+        await asyncio.sleep(0.25)
+
+        assert running == ["leader"]
+
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        await asyncio.sleep(0.15)
+
+        assert running == ["leader", "standby"]
+        assert (await Lease.get("job")).owner == "standby"
+
+        standby.cancel()
+        await asyncio.gather(standby, return_exceptions=True)
+
+    assert await Lease.get("job") is None
+
+
+async def test_run_as_leader_should_take_over_expired_lease(
+    settings_factory: SettingsFactory, database
+):
+    started = asyncio.Event()
+
+    async def job():
+        started.set()
+        await asyncio.Event().wait()
+
+    await Lease(
+        id="job",
+        owner="dead_leader",
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=0.3),
+    ).insert()
+
+    with patch(
+        "src.viewers_leaderboard.background.get_settings",
+        return_value=settings_factory.build(background_job_lease_ttl=0.3),
+    ):
+        task = asyncio.create_task(run_as_leader("job", job))
+
+        await asyncio.sleep(0.05)
+        assert not started.is_set()
+
+        await asyncio.wait_for(started.wait(), timeout=0.4)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
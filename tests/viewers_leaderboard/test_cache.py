@@ -0,0 +1,82 @@
+import asyncio
+from unittest.mock import AsyncMock
+import pytest
+from src.viewers_leaderboard.cache import SingleFlightCache
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.shared_cache import SharedCache
+
+
+async def test_single_flight_cache_should_return_cached_value_on_hit():
+    cache = SingleFlightCache("test_cache", maxsize=10, ttl=60)
+    loader = AsyncMock(return_value="value")
+
+    first = await cache.get_or_load("key", loader)
+    second = await cache.get_or_load("key", loader)
+
+    assert first == second == "value"
+    loader.assert_awaited_once()
+    assert get_metrics()["counters"]["test_cache.hits"] == 1
+    assert get_metrics()["counters"]["test_cache.misses"] == 1
+
+
+async def test_single_flight_cache_should_share_in_flight_load_between_callers():
+    cache = SingleFlightCache("test_cache", maxsize=10, ttl=60)
+    release = asyncio.Event()
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    waiters = [asyncio.create_task(cache.get_or_load("key", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 5
+    assert calls == 1
+    assert get_metrics()["counters"]["test_cache.coalesced"] == 4
+
+
+async def test_single_flight_cache_should_use_negative_ttl_for_none_values():
+    cache = SingleFlightCache("test_cache", maxsize=10, ttl=60, negative_ttl=0)
+    loader = AsyncMock(return_value=None)
+
+    await cache.get_or_load("key", loader)
+    await cache.get_or_load("key", loader)
+
+    assert loader.await_count == 2
+
+
+async def test_single_flight_cache_should_not_cache_errors():
+    cache = SingleFlightCache("test_cache", maxsize=10, ttl=60)
+    loader = AsyncMock(side_effect=[RuntimeError("boom"), "value"])
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("key", loader)
+
+    assert await cache.get_or_load("key", loader) == "value"
+
+
+async def test_single_flight_cache_should_consult_shared_tier_after_local_miss(
+    database,
+):
+    first_worker = SingleFlightCache(
+        "test_cache", maxsize=10, ttl=60, shared=SharedCache("test_cache", ttl=60)
+    )
+    second_worker = SingleFlightCache(
+        "test_cache", maxsize=10, ttl=60, shared=SharedCache("test_cache", ttl=60)
+    )
+    loader = AsyncMock(return_value="value")
+
+    assert await first_worker.get_or_load("key", loader) == "value"
+    assert await second_worker.get_or_load("key", loader) == "value"
+    assert await second_worker.get_or_load("key", loader) == "value"
+
+    loader.assert_awaited_once()
+    counters = get_metrics()["counters"]
+    assert counters["test_cache.misses"] == 2
+    assert counters["test_cache.hits"] == 1
+    assert counters["test_cache.shared.misses"] == 1
+    assert counters["test_cache.shared.hits"] == 1
@@ -4,9 +4,11 @@ from beanie.odm.documents import DocumentWithSoftDelete
 from polyfactory.pytest_plugin import register_fixture
 from polyfactory.factories.pydantic_factory import ModelFactory
 from src.viewers_leaderboard.settings import Settings
+from src.viewers_leaderboard.ranking.models import Score
 from src.viewers_leaderboard.database import (
     setup_database_connection,
     shutdown_database_connection,
+    build_indexes_in_background,
 )
 
 
@@ -37,6 +39,7 @@ async def test_setup_database_connection_should_create_client_and_init_beanie(
     init_beanie_mock.assert_awaited_once_with(
         database=db_mock,
         document_models=ANY,
+        skip_indexes=settings.mongo_background_index_build,
     )
 
     assert app.db_client == motor_client_mock()
@@ -70,3 +73,40 @@ async def test_shutdown_database_connection_closes_db_connection():
     await shutdown_database_connection(app)
 
     app.db_client.close.assert_called_once()
+
+
+@patch("src.viewers_leaderboard.database.AsyncIOMotorClient", new_callable=MagicMock)
+@patch("src.viewers_leaderboard.database.init_beanie", new_callable=AsyncMock)
+@patch(
+    "src.viewers_leaderboard.database.build_indexes_in_background",
+    new_callable=AsyncMock,
+)
+async def test_setup_database_connection_should_build_indexes_in_background_if_enabled(
+    build_indexes_mock: AsyncMock,
+    init_beanie_mock: AsyncMock,
+    motor_client_mock: MagicMock,
+    settings_mock: SettingsMock,
+):
+    settings: Settings = settings_mock.build(mongo_background_index_build=True)
+    app = MagicMock()
+
+    with patch("src.viewers_leaderboard.database.get_settings", return_value=settings):
+        await setup_database_connection(app)
+
+    await app.index_build_task
+
+    _, init_beanie_await_args = init_beanie_mock.await_args
+    assert init_beanie_await_args["skip_indexes"] is True
+    build_indexes_mock.assert_awaited_once_with(
+        init_beanie_await_args["document_models"]
+    )
+
+
+async def test_build_indexes_in_background_should_create_declared_indexes(database):
+    await Score.get_motor_collection().drop_indexes()
+
+    await build_indexes_in_background([Score])
+
+    index_information = await Score.get_motor_collection().index_information()
+    assert index_information["stream_score_identity"]["unique"] is True
+    assert "broadcaster_ranking_covering" not in index_information
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from os import getenv
+import pytest
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from src.viewers_leaderboard.leases import JobLease, Lease
+
+TEST_MONGO_CONN_STR = getenv("TEST_MONGO_CONN_STR")
+
+
+@pytest.fixture
+async def mongod():
+    if TEST_MONGO_CONN_STR is None:
+        pytest.skip("TEST_MONGO_CONN_STR is not set")
+
+    client = AsyncIOMotorClient(TEST_MONGO_CONN_STR)
+    await init_beanie(database=client["leases_test"], document_models=[Lease])
+    await Lease.get_motor_collection().delete_many({})
+    yield
+    await Lease.get_motor_collection().delete_many({})
+    client.close()
+
+
+async def test_job_lease_should_be_held_by_a_single_owner(database):
+    leader = JobLease("job", owner="leader", ttl=30)
+    standby = JobLease("job", owner="standby", ttl=30)
+
+    assert await leader.acquire() is True
+    assert await standby.acquire() is False
+    assert await leader.acquire() is True
+
+    lease = await Lease.get("job")
+    assert lease.owner == "leader"
+
+
+async def test_job_lease_should_be_taken_over_once_expired(database):
+    await Lease(
+        id="job",
+        owner="dead_leader",
+        expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+    ).insert()
+
+    assert await JobLease("job", owner="standby", ttl=30).acquire() is True
+    assert (await Lease.get("job")).owner == "standby"
+
+
+async def test_job_lease_should_be_free_after_release(database):
+    leader = JobLease("job", owner="leader", ttl=30)
+    standby = JobLease("job", owner="standby", ttl=30)
+    await leader.acquire()
+
+    await standby.release()
+    assert await standby.acquire() is False
+
+    await leader.release()
+    assert await standby.acquire() is True
+
+
+async def test_job_lease_should_elect_one_leader_on_mongod(mongod):
+    leases = [JobLease("job", owner=f"worker_{i}", ttl=0.5) for i in range(5)]
+
+    acquired = await asyncio.gather(*[lease.acquire() for lease in leases])
+    assert acquired.count(True) == 1
+
+    await asyncio.sleep(0.6)
+    standbys = [lease for lease, held in zip(leases, acquired) if not held]
+    acquired = await asyncio.gather(*[lease.acquire() for lease in standbys])
+    assert acquired.count(True) == 1
@@ -2,6 +2,11 @@ from unittest.mock import MagicMock, AsyncMock, patch
 from src.viewers_leaderboard.lifespan import app_lifespan
 
 
+@patch(
+    "src.viewers_leaderboard.lifespan.shutdown_twitch_client",
+    new_callable=AsyncMock,
+)
+@patch("src.viewers_leaderboard.lifespan.setup_twitch_client", new_callable=AsyncMock)
 @patch(
     "src.viewers_leaderboard.lifespan.shutdown_database_connection",
     new_callable=AsyncMock,
@@ -10,7 +15,10 @@ from src.viewers_leaderboard.lifespan import app_lifespan
     "src.viewers_leaderboard.lifespan.setup_database_connection", new_callable=AsyncMock
 )
 async def test_app_lifespan_should_setup_and_shutdown_db_connection(
-    setup_db_mock: AsyncMock, shutdown_db_mock: AsyncMock
+    setup_db_mock: AsyncMock,
+    shutdown_db_mock: AsyncMock,
+    setup_twitch_client_mock: AsyncMock,
+    shutdown_twitch_client_mock: AsyncMock,
 ):
     app = MagicMock()
 
@@ -18,3 +26,30 @@ async def test_app_lifespan_should_setup_and_shutdown_db_connection(
         setup_db_mock.assert_awaited_once_with(app)
 
     shutdown_db_mock.assert_awaited_once_with(app)
+
+
+@patch(
+    "src.viewers_leaderboard.lifespan.shutdown_twitch_client",
+    new_callable=AsyncMock,
+)
+@patch("src.viewers_leaderboard.lifespan.setup_twitch_client", new_callable=AsyncMock)
+@patch(
+    "src.viewers_leaderboard.lifespan.shutdown_database_connection",
+    new_callable=AsyncMock,
+)
+@patch(
+    "src.viewers_leaderboard.lifespan.setup_database_connection", new_callable=AsyncMock
+)
+async def test_app_lifespan_should_setup_and_shutdown_twitch_client(
+    setup_db_mock: AsyncMock,
+    shutdown_db_mock: AsyncMock,
+    setup_twitch_client_mock: AsyncMock,
+    shutdown_twitch_client_mock: AsyncMock,
+):
+    app = MagicMock()
+
+    async with app_lifespan(app):
+        setup_twitch_client_mock.assert_awaited_once_with(app)
+        shutdown_twitch_client_mock.assert_not_awaited()
+
+    shutdown_twitch_client_mock.assert_awaited_once_with(app)
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock, MagicMock
+from pymongo.errors import PyMongoError
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.shared_cache import (
+    MISSING,
+    SharedCache,
+    SharedCacheEntry,
+)
+
+
+async def test_shared_cache_should_return_stored_value(database):
+    cache = SharedCache("test_cache", ttl=60)
+
+    assert await cache.get(("broadcaster", "viewer")) is MISSING
+    await cache.set(("broadcaster", "viewer"), {"value": 1})
+
+    assert await cache.get(("broadcaster", "viewer")) == {"value": 1}
+    entry = await SharedCacheEntry.get("test_cache:broadcaster:viewer")
+    assert entry.value == {"value": 1}
+    assert get_metrics()["counters"]["test_cache.shared.hits"] == 1
+    assert get_metrics()["counters"]["test_cache.shared.misses"] == 1
+
+
+async def test_shared_cache_should_ignore_expired_entries(database):
+    await SharedCacheEntry(
+        id="test_cache:key",
+        value="stale",
+        expires_at=datetime.now(timezone.utc) - timedelta(seconds=1),
+    ).insert()
+
+    assert await SharedCache("test_cache", ttl=60).get("key") is MISSING
+
+
+async def test_shared_cache_should_use_negative_ttl_for_none_values(database):
+    cache = SharedCache("test_cache", ttl=60, negative_ttl=0)
+
+    await cache.set("key", None)
+
+    assert await cache.get("key") is MISSING
+
+
+async def test_shared_cache_should_serialize_values(database):
+    cache = SharedCache(
+        "test_cache", ttl=60, dump=datetime.isoformat, load=datetime.fromisoformat
+    )
+    now = datetime.now()
+
+    await cache.set("key", now)
+
+    assert await cache.get("key") == now
+    assert (await SharedCacheEntry.get("test_cache:key")).value == now.isoformat()
+
+
+async def test_shared_cache_should_load_through_and_write_value(database):
+    first_worker = SharedCache("test_cache", ttl=60)
+    second_worker = SharedCache("test_cache", ttl=60)
+    loader = AsyncMock(return_value="value")
+
+    assert await first_worker.load_through("key", loader) == "value"
+    assert await second_worker.load_through("key", loader) == "value"
+
+    loader.assert_awaited_once()
+
+
+async def test_shared_cache_should_degrade_to_miss_on_database_errors():
+    collection = MagicMock()
+    collection.find_one = AsyncMock(side_effect=PyMongoError("down"))
+    collection.update_one = AsyncMock(side_effect=PyMongoError("down"))
+    loader = AsyncMock(return_value="value")
+
+    with patch.object(
+        SharedCacheEntry, "get_motor_collection", return_value=collection
+    ):
+        cache = SharedCache("test_cache", ttl=60)
+        assert await cache.load_through("key", loader) == "value"
+
+    assert get_metrics()["counters"]["test_cache.shared.errors"] == 2
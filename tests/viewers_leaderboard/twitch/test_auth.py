@@ -1,3 +1,4 @@
+import asyncio
 import hmac
 from hashlib import sha256
 from unittest.mock import patch, AsyncMock, Mock
@@ -11,9 +12,12 @@ from src.viewers_leaderboard.twitch.auth import (
     validate_webhook_request,
     get_hmac_signature_from_request,
     get_user_access_token,
+    refresh_user_access_token,
     validate_user_token,
     get_app_token,
+    AppTokenManager,
 )
+from src.viewers_leaderboard.twitch.transport import AppTokenResponse
 from src.viewers_leaderboard.settings import Settings
 
 
@@ -100,6 +104,40 @@ async def test_validate_webhook_request_signature_should_always_return_true_if_v
     mock_get_hmac_signature_from_request.assert_not_called()
 
 
+@patch("src.viewers_leaderboard.twitch.auth.get_settings")
+async def test_validate_webhook_request_should_accept_request_signed_with_secret(
+    get_settings_mock: Mock,
+    mock_request: Request,
+    settings_factory: SettingsFactory,
+):
+    get_settings_mock.return_value = settings_factory.build(
+        twitch_signature_validation=True, webhook_secret="test_secret"
+    )
+    signature = hmac.new(
+        b"test_secret", b"test_message_idtest_timestamptest_body", digestmod=sha256
+    ).hexdigest()
+    mock_request.headers["twitch-eventsub-message-signature"] = f"sha256={signature}"
+
+    assert await validate_webhook_request(mock_request) is True
+
+
+@patch("src.viewers_leaderboard.twitch.auth.get_settings")
+async def test_validate_webhook_request_should_raise_http_exception_403_for_missing_signature(
+    get_settings_mock: Mock,
+    mock_request: Request,
+    settings_factory: SettingsFactory,
+):
+    get_settings_mock.return_value = settings_factory.build(
+        twitch_signature_validation=True, webhook_secret="test_secret"
+    )
+    del mock_request.headers["twitch-eventsub-message-signature"]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await validate_webhook_request(mock_request)
+
+    assert exc_info.value.status_code == 403
+
+
 @patch("src.viewers_leaderboard.twitch.auth.get_settings")
 async def test_get_hmac_signature_from_request_should_extract_signature_from_headers(
     get_settings_mock: Mock,
@@ -145,7 +183,7 @@ async def test_get_hmac_signature_from_request_should_return_type_error_for_inva
     )
     mock_request.body = AsyncMock(return_value=None)
 
-    with pytest.raises(AttributeError):
+    with pytest.raises(TypeError):
         await get_hmac_signature_from_request(mock_request)
 
 
@@ -189,6 +227,38 @@ async def test_get_user_access_token_should_request_and_return_access_token(
     assert result.token_type == mock_response_data["token_type"]
 
 
+@patch("src.viewers_leaderboard.twitch.auth.get_settings")
+async def test_refresh_user_access_token_should_request_and_return_access_token(
+    get_settings_mock: Mock,
+    settings_factory: SettingsFactory,
+    httpx_mock: HTTPXMock,
+):
+    mock_settings = settings_factory.build()
+    get_settings_mock.return_value = mock_settings
+
+    httpx_mock.add_response(
+        method="POST",
+        url="https://id.twitch.tv/oauth2/token",
+        match_json={
+            "client_id": mock_settings.app_client_id,
+            "client_secret": mock_settings.app_client_secret,
+            "refresh_token": "test_refresh_token",
+            "grant_type": "refresh_token",
+        },
+        json={
+            "access_token": "new_access_token",
+            "expires_in": 3600,
+            "refresh_token": "new_refresh_token",
+            "token_type": "bearer",
+        },
+    )
+
+    result = await refresh_user_access_token("test_refresh_token")
+
+    assert result.access_token == "new_access_token"
+    assert result.refresh_token == "new_refresh_token"
+
+
 async def test_validate_user_token_should_return_user_information(
     httpx_mock: HTTPXMock,
 ):
@@ -248,3 +318,88 @@ async def test_get_app_token_should_request_and_return_app_token(
     assert result.access_token == mock_response_data["access_token"]
     assert result.expires_in == mock_response_data["expires_in"]
     assert result.token_type == mock_response_data["token_type"]
+
+
+def build_app_token(access_token: str, expires_in: int = 3600):
+    return AppTokenResponse(
+        access_token=access_token, expires_in=expires_in, token_type="bearer"
+    )
+
+
+@patch("src.viewers_leaderboard.twitch.auth.request_app_token", new_callable=AsyncMock)
+async def test_app_token_manager_should_single_flight_token_requests(
+    request_app_token_mock: AsyncMock,
+):
+    async def request_app_token():
+        await asyncio.sleep(0.01)
+        return build_app_token("token")
+
+    request_app_token_mock.side_effect = request_app_token
+    manager = AppTokenManager(refresh_margin=300)
+
+    tokens = await asyncio.gather(*[manager.get_token() for _ in range(10)])
+    cached_token = await manager.get_token()
+
+    assert {token.access_token for token in tokens} == {"token"}
+    assert cached_token.access_token == "token"
+    request_app_token_mock.assert_awaited_once()
+
+
+@patch("src.viewers_leaderboard.twitch.auth.monotonic")
+@patch("src.viewers_leaderboard.twitch.auth.request_app_token", new_callable=AsyncMock)
+async def test_app_token_manager_should_refresh_in_background_before_expiry(
+    request_app_token_mock: AsyncMock, monotonic_mock: Mock
+):
+    request_app_token_mock.side_effect = [
+        build_app_token("first_token"),
+        build_app_token("second_token"),
+    ]
+    monotonic_mock.return_value = 0
+    manager = AppTokenManager(refresh_margin=300)
+    await manager.get_token()
+
+    monotonic_mock.return_value = 3400
+    token_inside_margin = await manager.get_token()
+    await asyncio.sleep(0)
+    refreshed_token = await manager.get_token()
+
+    assert token_inside_margin.access_token == "first_token"
+    assert refreshed_token.access_token == "second_token"
+    assert request_app_token_mock.await_count == 2
+
+
+@patch("src.viewers_leaderboard.twitch.auth.monotonic")
+@patch("src.viewers_leaderboard.twitch.auth.request_app_token", new_callable=AsyncMock)
+async def test_app_token_manager_should_wait_for_refresh_once_token_expired(
+    request_app_token_mock: AsyncMock, monotonic_mock: Mock
+):
+    request_app_token_mock.side_effect = [
+        build_app_token("first_token"),
+        build_app_token("second_token"),
+    ]
+    monotonic_mock.return_value = 0
+    manager = AppTokenManager(refresh_margin=300)
+    await manager.get_token()
+
+    monotonic_mock.return_value = 3600
+
+    assert (await manager.get_token()).access_token == "second_token"
+
+
+@patch("src.viewers_leaderboard.twitch.auth.request_app_token", new_callable=AsyncMock)
+async def test_app_token_manager_should_force_refresh_only_for_current_invalid_token(
+    request_app_token_mock: AsyncMock,
+):
+    request_app_token_mock.side_effect = [
+        build_app_token("first_token"),
+        build_app_token("second_token"),
+    ]
+    manager = AppTokenManager(refresh_margin=300)
+    await manager.get_token()
+
+    refreshed_token = await manager.get_token(invalidated_token="first_token")
+    current_token = await manager.get_token(invalidated_token="first_token")
+
+    assert refreshed_token.access_token == "second_token"
+    assert current_token.access_token == "second_token"
+    assert request_app_token_mock.await_count == 2
@@ -0,0 +1,215 @@
+import asyncio
+from time import time
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock, Mock
+import pytest
+from yarl import URL
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.twitch.breaker import (
+    CircuitBreaker,
+    CircuitOpenException,
+    CircuitState,
+)
+from src.viewers_leaderboard.twitch.rate_limit import (
+    HelixRateLimiter,
+    create_rate_limit_trace_config,
+)
+
+
+def create_breaker(**kwargs):
+    return CircuitBreaker(
+        **{
+            "name": "test",
+            "timeout": 1,
+            "failure_threshold": 2,
+            "recovery_timeout": 30,
+            "slow_call_threshold": 1,
+            "max_queue_wait": 1,
+            **kwargs,
+        }
+    )
+
+
+async def test_circuit_breaker_should_return_result_while_closed():
+    breaker = create_breaker()
+    func = AsyncMock(return_value="result")
+
+    assert await breaker.call(func, "arg", key="value") == "result"
+
+    func.assert_awaited_once_with("arg", key="value")
+    assert breaker.state == CircuitState.CLOSED
+    assert get_metrics()["gauges"]["circuit_breaker.test.state"] == 0
+
+
+async def test_circuit_breaker_should_open_after_consecutive_failures():
+    breaker = create_breaker()
+    func = AsyncMock(side_effect=ValueError("Helix error"))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await breaker.call(func)
+
+    with pytest.raises(CircuitOpenException):
+        await breaker.call(func)
+
+    assert func.await_count == 2
+    assert breaker.state == CircuitState.OPEN
+    metrics = get_metrics()
+    assert metrics["counters"]["circuit_breaker.test.trips"] == 1
+    assert metrics["counters"]["circuit_breaker.test.rejected"] == 1
+    assert metrics["gauges"]["circuit_breaker.test.state"] == 2
+
+
+async def test_circuit_breaker_should_reset_failures_after_success():
+    breaker = create_breaker()
+    func = AsyncMock(side_effect=[ValueError("Helix error"), "result", ValueError()])
+
+    with pytest.raises(ValueError):
+        await breaker.call(func)
+    await breaker.call(func)
+    with pytest.raises(ValueError):
+        await breaker.call(func)
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_circuit_breaker_should_time_out_slow_calls():
+    breaker = create_breaker(timeout=0.01, failure_threshold=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(asyncio.sleep, 1)
+
+    assert breaker.state == CircuitState.OPEN
+    assert get_metrics()["counters"]["circuit_breaker.test.timeouts"] == 1
+
+
+def helix_request(limiter: HelixRateLimiter):
+    on_request_start = create_rate_limit_trace_config(limiter).on_request_start[0]
+
+    async def fetch_streams():
+        await on_request_start(
+            None,
+            SimpleNamespace(),
+            Mock(url=URL("https://api.twitch.tv/helix/streams")),
+        )
+        return "result"
+
+    return fetch_streams
+
+
+def exhausted_limiter(reset_in: float):
+    limiter = HelixRateLimiter(capacity=1)
+    limiter.remaining = 0
+    limiter.reset_at = time() + reset_in
+
+    return limiter
+
+
+async def test_circuit_breaker_should_not_count_rate_limit_queue_time():
+    breaker = create_breaker(timeout=0.05, slow_call_threshold=0.05)
+
+    assert await breaker.call(helix_request(exhausted_limiter(0.2))) == "result"
+
+    counters = get_metrics()["counters"]
+    assert "circuit_breaker.test.timeouts" not in counters
+    assert "circuit_breaker.test.slow_calls" not in counters
+    assert get_metrics()["summaries"]["helix_rate_limit.wait_ms.default"]["max"] >= 150
+
+
+async def test_circuit_breaker_should_time_out_calls_stuck_in_rate_limit_queue():
+    breaker = create_breaker(timeout=0.05, max_queue_wait=0.05, failure_threshold=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(helix_request(exhausted_limiter(60)))
+
+    counters = get_metrics()["counters"]
+    assert counters["circuit_breaker.test.queue_timeouts"] == 1
+    assert "circuit_breaker.test.timeouts" not in counters
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_circuit_breaker_should_count_slow_responses_as_failures():
+    breaker = create_breaker(slow_call_threshold=0)
+    func = AsyncMock(return_value="result")
+
+    assert await breaker.call(func) == "result"
+    assert await breaker.call(func) == "result"
+
+    assert breaker.state == CircuitState.OPEN
+    assert get_metrics()["counters"]["circuit_breaker.test.slow_calls"] == 2
+
+
+@patch("src.viewers_leaderboard.twitch.breaker.monotonic")
+async def test_circuit_breaker_should_close_after_successful_probe(
+    monotonic_mock: Mock,
+):
+    monotonic_mock.return_value = 0
+    breaker = create_breaker(failure_threshold=1)
+    with pytest.raises(ValueError):
+        await breaker.call(AsyncMock(side_effect=ValueError()))
+
+    monotonic_mock.return_value = 30
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert get_metrics()["gauges"]["circuit_breaker.test.state"] == 1
+
+    assert await breaker.call(AsyncMock(return_value="result")) == "result"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@patch("src.viewers_leaderboard.twitch.breaker.monotonic")
+async def test_circuit_breaker_should_reopen_after_failed_probe(monotonic_mock: Mock):
+    monotonic_mock.return_value = 0
+    breaker = create_breaker(failure_threshold=1)
+    with pytest.raises(ValueError):
+        await breaker.call(AsyncMock(side_effect=ValueError()))
+
+    monotonic_mock.return_value = 30
+    with pytest.raises(ValueError):
+        await breaker.call(AsyncMock(side_effect=ValueError()))
+
+    assert breaker.state == CircuitState.OPEN
+    assert get_metrics()["counters"]["circuit_breaker.test.trips"] == 2
+
+
+@patch("src.viewers_leaderboard.twitch.breaker.monotonic", return_value=30)
+async def test_circuit_breaker_should_allow_a_single_probe_while_half_open(
+    monotonic_mock: Mock,
+):
+    breaker = create_breaker(failure_threshold=1)
+    breaker._trip()
+    breaker.opened_at = 0
+    probe_started = asyncio.Event()
+    release_probe = asyncio.Event()
+
+    async def probe():
+        probe_started.set()
+        await release_probe.wait()
+        return "result"
+
+    task = asyncio.create_task(breaker.call(probe))
+    await probe_started.wait()
+
+    with pytest.raises(CircuitOpenException):
+        await breaker.call(AsyncMock())
+
+    release_probe.set()
+    assert await task == "result"
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_circuit_breaker_should_stay_open_after_success_started_before_trip():
+    breaker = create_breaker(failure_threshold=1)
+    release_call = asyncio.Event()
+
+    async def slow_call():
+        await release_call.wait()
+        return "result"
+
+    task = asyncio.create_task(breaker.call(slow_call))
+    await asyncio.sleep(0)
+    with pytest.raises(ValueError):
+        await breaker.call(AsyncMock(side_effect=ValueError()))
+
+    release_call.set()
+    assert await task == "result"
+    assert breaker.state == CircuitState.OPEN
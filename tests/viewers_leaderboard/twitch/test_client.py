@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock, AsyncMock, patch
+from src.viewers_leaderboard.twitch.transport import AppTokenResponse
+from src.viewers_leaderboard.twitch.client import (
+    create_twitch_client,
+    get_twitch_client,
+    setup_twitch_client,
+    shutdown_twitch_client,
+)
+
+
+async def test_get_twitch_client_should_return_the_same_client_instance():
+    assert get_twitch_client() is get_twitch_client()
+
+
+async def test_setup_twitch_client_should_share_client_and_connection_pool():
+    app = MagicMock()
+
+    await setup_twitch_client(app)
+
+    assert get_twitch_client() is app.twitch_client
+    session = app.twitch_client._http.session
+    assert session is not None
+    assert not session.closed
+
+    await shutdown_twitch_client(app)
+
+    assert session.closed
+    assert get_twitch_client() is not app.twitch_client
+
+
+@patch("src.viewers_leaderboard.twitch.client.get_app_token", new_callable=AsyncMock)
+async def test_twitch_client_should_get_tokens_from_app_token_manager(
+    get_app_token_mock: AsyncMock,
+):
+    get_app_token_mock.return_value = AppTokenResponse(
+        access_token="managed_token", expires_in=3600, token_type="bearer"
+    )
+    client = create_twitch_client()
+
+    await client._http._generate_login()
+    first_token = client._http.app_token
+    client._http.app_token = "rejected_token"
+    refreshed_token = await client.event_token_expired()
+
+    assert first_token == refreshed_token == "managed_token"
+    get_app_token_mock.assert_any_await(invalidated_token=None)
+    get_app_token_mock.assert_awaited_with(invalidated_token="rejected_token")
@@ -55,29 +55,39 @@ async def test_subscribe_to_webhooks_should_make_request_for_webhook_subscriptio
         user_id=user_id
     )
 
-    expected_request_data = {
-        "type": "channel.chat.message",
-        "version": 1,
-        "condition": {
-            "broadcaster_user_id": user_id,
-            "user_id": user_id,
-        },
-        "transport": {
-            "method": "webhook",
-            "callback": f"{mocked_settings.app_base_url}/webhook",
-            "secret": mocked_settings.webhook_secret,
-        },
-    }
-
-    httpx_mock.add_response(
-        method="POST",
-        url=f"{Route.BASE_URL}/eventsub/subscriptions",
-        match_json=expected_request_data,
-        headers={
-            "Client-ID": mocked_settings.app_client_id,
-            "Authorization": f"Bearer {app_token}",
-        },
-    )
+    expected_subscriptions = [
+        (
+            "channel.chat.message",
+            {"broadcaster_user_id": user_id, "user_id": user_id},
+        ),
+        ("stream.online", {"broadcaster_user_id": user_id}),
+        ("stream.offline", {"broadcaster_user_id": user_id}),
+        ("channel.cheer", {"broadcaster_user_id": user_id}),
+        ("channel.subscribe", {"broadcaster_user_id": user_id}),
+        ("channel.raid", {"to_broadcaster_user_id": user_id}),
+    ]
+
+    for subscription_type, condition in expected_subscriptions:
+        expected_request_data = {
+            "type": subscription_type,
+            "version": 1,
+            "condition": condition,
+            "transport": {
+                "method": "webhook",
+                "callback": f"{mocked_settings.app_base_url}/webhook",
+                "secret": mocked_settings.webhook_secret,
+            },
+        }
+
+        httpx_mock.add_response(
+            method="POST",
+            url=f"{Route.BASE_URL}/eventsub/subscriptions",
+            match_json=expected_request_data,
+            headers={
+                "Client-ID": mocked_settings.app_client_id,
+                "Authorization": f"Bearer {app_token}",
+            },
+        )
 
     await subscribe_to_webhooks("user_access_token")
 
@@ -113,7 +123,10 @@ async def test_subscribe_to_webhooks_should_raise_exception_if_webhook_already_s
     )
 
     httpx_mock.add_response(
-        method="POST", url=f"{Route.BASE_URL}/eventsub/subscriptions", status_code=409
+        method="POST",
+        url=f"{Route.BASE_URL}/eventsub/subscriptions",
+        status_code=409,
+        is_reusable=True,
     )
 
     with pytest.raises(WebhookSubscriptionConflictException):
@@ -121,3 +134,85 @@ async def test_subscribe_to_webhooks_should_raise_exception_if_webhook_already_s
 
     mock_get_app_token.assert_called_once()
     mock_validate_user_token.assert_called_once_with("user_access_token")
+
+
+@patch("src.viewers_leaderboard.twitch.eventsub.get_settings")
+@patch("src.viewers_leaderboard.twitch.eventsub.get_app_token", new_callable=AsyncMock)
+@patch(
+    "src.viewers_leaderboard.twitch.eventsub.validate_user_token",
+    new_callable=AsyncMock,
+)
+async def test_subscribe_to_webhooks_should_create_missing_subscriptions_when_some_exist(
+    mock_validate_user_token: AsyncMock,
+    mock_get_app_token: AsyncMock,
+    get_settings_mock: Mock,
+    settings_factory: SettingsFactory,
+    app_token_response_factory: AppTokenResponseFactory,
+    token_validation_response_factory: TokenValidationResponseFactory,
+    httpx_mock: HTTPXMock,
+) -> None:
+    get_settings_mock.return_value = settings_factory.build()
+    mock_get_app_token.return_value = app_token_response_factory.build()
+    mock_validate_user_token.return_value = token_validation_response_factory.build(
+        user_id="test-user-id"
+    )
+
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{Route.BASE_URL}/eventsub/subscriptions",
+        status_code=409,
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{Route.BASE_URL}/eventsub/subscriptions",
+        status_code=202,
+        is_reusable=True,
+    )
+
+    await subscribe_to_webhooks("user_access_token")
+
+    assert len(httpx_mock.get_requests()) == 6
+
+
+@patch("src.viewers_leaderboard.twitch.eventsub.get_settings")
+@patch("src.viewers_leaderboard.twitch.eventsub.get_app_token", new_callable=AsyncMock)
+@patch(
+    "src.viewers_leaderboard.twitch.eventsub.validate_user_token",
+    new_callable=AsyncMock,
+)
+async def test_subscribe_to_webhooks_should_refresh_app_token_and_retry_on_401(
+    mock_validate_user_token: AsyncMock,
+    mock_get_app_token: AsyncMock,
+    get_settings_mock: Mock,
+    settings_factory: SettingsFactory,
+    app_token_response_factory: AppTokenResponseFactory,
+    token_validation_response_factory: TokenValidationResponseFactory,
+    httpx_mock: HTTPXMock,
+) -> None:
+    get_settings_mock.return_value = settings_factory.build()
+    mock_get_app_token.side_effect = [
+        app_token_response_factory.build(access_token="expired-token"),
+        app_token_response_factory.build(access_token="fresh-token"),
+    ]
+    mock_validate_user_token.return_value = token_validation_response_factory.build(
+        user_id="test-user-id"
+    )
+
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{Route.BASE_URL}/eventsub/subscriptions",
+        match_headers={"Authorization": "Bearer expired-token"},
+        status_code=401,
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{Route.BASE_URL}/eventsub/subscriptions",
+        match_headers={"Authorization": "Bearer fresh-token"},
+        status_code=202,
+        is_reusable=True,
+    )
+
+    await subscribe_to_webhooks("user_access_token")
+
+    mock_get_app_token.assert_awaited_with(invalidated_token="expired-token")
+    assert len(httpx_mock.get_requests()) == 7
@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock, Mock, patch
+from polyfactory.factories.pydantic_factory import ModelFactory
+from polyfactory.pytest_plugin import register_fixture
+from src.viewers_leaderboard.settings import Settings
+from src.viewers_leaderboard.twitch.http_client import (
+    get_http_client,
+    setup_http_client,
+    shutdown_http_client,
+)
+
+
+@register_fixture
+class SettingsFactory(ModelFactory[Settings]): ...
+
+
+@patch("src.viewers_leaderboard.twitch.http_client.get_settings")
+def test_get_http_client_should_apply_settings(
+    get_settings_mock: Mock, settings_factory: SettingsFactory
+):
+    get_settings_mock.return_value = settings_factory.build(
+        twitch_http_connect_timeout=2, twitch_http_read_timeout=7, twitch_http2=True
+    )
+
+    client = get_http_client()
+
+    assert client.timeout.connect == 2
+    assert client.timeout.read == 7
+    assert client._transport._pool._http2 is True
+    assert client is get_http_client()
+
+
+async def test_setup_http_client_should_share_client_until_shutdown():
+    app = MagicMock()
+
+    await setup_http_client(app)
+
+    assert app.http_client is get_http_client()
+    assert not app.http_client.is_closed
+
+    await shutdown_http_client(app)
+
+    assert app.http_client.is_closed
+    assert get_http_client() is not app.http_client
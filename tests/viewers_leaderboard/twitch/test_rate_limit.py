@@ -0,0 +1,96 @@
+import asyncio
+from time import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+from yarl import URL
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.twitch.rate_limit import (
+    HelixPriority,
+    HelixRateLimiter,
+    create_rate_limit_trace_config,
+    helix_priority,
+)
+
+
+async def test_helix_rate_limiter_should_not_wait_while_bucket_has_tokens():
+    limiter = HelixRateLimiter(capacity=10)
+
+    await limiter.acquire()
+
+    assert limiter.remaining == 9
+    assert len(limiter) == 0
+    assert get_metrics()["summaries"]["helix_rate_limit.wait_ms.default"]["count"] == 1
+
+
+async def test_helix_rate_limiter_should_release_waiters_by_priority():
+    limiter = HelixRateLimiter(capacity=2)
+    await limiter.acquire()
+    await limiter.acquire()
+    limiter.update("2", "1", str(time() + 60))
+    released = []
+
+    async def acquire(priority: HelixPriority):
+        await limiter.acquire(priority)
+        released.append(priority)
+
+    tasks = [
+        asyncio.create_task(acquire(HelixPriority.BULK)),
+        asyncio.create_task(acquire(HelixPriority.REALTIME)),
+    ]
+    await asyncio.sleep(0)
+    assert len(limiter) == 2
+    assert get_metrics()["gauges"]["helix_rate_limit.queue_depth"] == 2
+
+    limiter.update("2", "1", str(time() + 60))
+    await asyncio.sleep(0)
+    assert released == [HelixPriority.REALTIME]
+
+    limiter.update("2", "1", str(time() + 60))
+    await asyncio.gather(*tasks)
+    assert released == [HelixPriority.REALTIME, HelixPriority.BULK]
+
+
+async def test_helix_rate_limiter_should_refill_bucket_after_reset():
+    limiter = HelixRateLimiter(capacity=1, min_wait=0.01)
+    await limiter.acquire()
+    limiter.update("1", "0", str(time() + 0.05))
+
+    await asyncio.wait_for(limiter.acquire(HelixPriority.BULK), timeout=1)
+
+    summary = get_metrics()["summaries"]["helix_rate_limit.wait_ms.bulk"]
+    assert summary["max"] >= 30
+
+
+async def test_rate_limit_trace_config_should_only_limit_helix_requests():
+    limiter = HelixRateLimiter(capacity=10)
+    trace_config = create_rate_limit_trace_config(limiter)
+    on_request_start = trace_config.on_request_start[0]
+    on_request_end = trace_config.on_request_end[0]
+    helix_context, oauth_context = SimpleNamespace(), SimpleNamespace()
+
+    with helix_priority(HelixPriority.REALTIME):
+        await on_request_start(
+            None,
+            helix_context,
+            Mock(url=URL("https://api.twitch.tv/helix/streams")),
+        )
+    await on_request_start(
+        None, oauth_context, Mock(url=URL("https://id.twitch.tv/oauth2/token"))
+    )
+
+    assert limiter.remaining == 9
+    assert "helix_rate_limit.wait_ms.realtime" in get_metrics()["summaries"]
+
+    response = Mock(
+        headers={
+            "Ratelimit-Limit": "800",
+            "Ratelimit-Remaining": "42",
+            "Ratelimit-Reset": str(time() + 60),
+        }
+    )
+    await on_request_end(None, helix_context, Mock(response=response))
+    await on_request_end(None, oauth_context, Mock(response=response))
+
+    assert limiter.capacity == 800
+    assert limiter.remaining == 42
+    assert get_metrics()["gauges"]["helix_rate_limit.remaining"] == 42
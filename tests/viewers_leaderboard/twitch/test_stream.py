@@ -1,12 +1,22 @@
+import asyncio
 from datetime import datetime
+from types import SimpleNamespace
 from unittest.mock import patch, Mock, MagicMock, AsyncMock
 import pytest
-from twitchio import Stream
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from twitchio import Client, HTTPException, Stream
+from twitchio.http import Route
 from polyfactory.pytest_plugin import register_fixture
 from polyfactory.factories.pydantic_factory import ModelFactory
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.settings import get_settings
+from src.viewers_leaderboard.twitch.breaker import CircuitBreaker
 from src.viewers_leaderboard.twitch.stream import (
     fetch_current_broadcaster_stream,
     gen_stream_hash,
+    get_current_stream_state,
+    get_stream_state_cache,
 )
 from src.viewers_leaderboard.twitch.models import TwitchStream
 
@@ -45,10 +55,10 @@ async def test_fetch_current_broadcaster_stream_should_return_active_stream(
     client.fetch_streams = AsyncMock(return_value=[stream_mock])
     mock_get_twitch_client.return_value = client
 
-    result = await fetch_current_broadcaster_stream("test_user_id")
+    result = await fetch_current_broadcaster_stream("123")
 
     assert result == TwitchStream.from_twitchio_stream(stream_mock)
-    client.fetch_streams.assert_awaited_with(user_ids=["test_user_id"])
+    client.fetch_streams.assert_awaited_with(user_ids=["123"])
 
 
 def test_gen_stream_hash_should_return_hash(twitch_stream_factory: TwitchStreamFactory):
@@ -69,3 +79,224 @@ def test_gen_stream_hash_should_return_hash(twitch_stream_factory: TwitchStreamF
         mock_sha256.assert_called_once_with(expected_hash_arg)
 
     assert result == expected_hash
+
+
+@patch(
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+    new_callable=AsyncMock,
+)
+async def test_get_current_stream_state_should_cache_stream_and_hash(
+    fetch_current_broadcaster_stream_mock: AsyncMock,
+    twitch_stream_factory: TwitchStreamFactory,
+):
+    stream_mock: TwitchStream = twitch_stream_factory.build()
+    fetch_current_broadcaster_stream_mock.return_value = stream_mock
+
+    first = await get_current_stream_state(stream_mock.broadcaster_id)
+    second = await get_current_stream_state(stream_mock.broadcaster_id)
+
+    assert first == second
+    assert first.stream == stream_mock
+    assert first.stream_hash == gen_stream_hash(stream_mock)
+    fetch_current_broadcaster_stream_mock.assert_awaited_once_with(
+        stream_mock.broadcaster_id
+    )
+
+
+@patch(
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+    new_callable=AsyncMock,
+    return_value=None,
+)
+async def test_get_current_stream_state_should_cache_offline_broadcaster(
+    fetch_current_broadcaster_stream_mock: AsyncMock,
+):
+    assert await get_current_stream_state("offline_broadcaster") is None
+    assert await get_current_stream_state("offline_broadcaster") is None
+
+    fetch_current_broadcaster_stream_mock.assert_awaited_once_with(
+        "offline_broadcaster"
+    )
+
+
+def build_stream(user_id: str):
+    data = {
+        "id": f"stream_{user_id}",
+        "user_id": user_id,
+        "user_name": f"user_{user_id}",
+        "game_id": "123",
+        "game_name": "Test Game",
+        "type": "live",
+        "title": "Test Stream",
+        "viewer_count": 100,
+        "started_at": "2023-01-01T00:00:00Z",
+        "language": "en",
+        "thumbnail_url": "http://example.com/thumbnail.jpg",
+        "tags": [],
+        "tag_ids": [],
+        "is_mature": False,
+    }
+    return Stream(http="TwitchHTTP", data=data)
+
+
+@patch("src.viewers_leaderboard.twitch.stream.get_twitch_client")
+async def test_fetch_current_broadcaster_stream_should_batch_concurrent_lookups(
+    mock_get_twitch_client: Mock,
+):
+    client = MagicMock()
+    client.fetch_streams = AsyncMock(
+        side_effect=lambda user_ids: [
+            build_stream(user_id) for user_id in user_ids if user_id != "offline"
+        ]
+    )
+    mock_get_twitch_client.return_value = client
+    broadcaster_ids = [str(i) for i in range(150)] + ["offline"]
+
+    results = await asyncio.gather(
+        *[fetch_current_broadcaster_stream(id) for id in broadcaster_ids]
+    )
+
+    assert [result.broadcaster_id for result in results[:-1]] == broadcaster_ids[:-1]
+    assert results[-1] is None
+    assert client.fetch_streams.await_count == 2
+    batch_sizes = [
+        len(call.kwargs["user_ids"]) for call in client.fetch_streams.await_args_list
+    ]
+    assert batch_sizes == [100, 51]
+
+
+@patch("src.viewers_leaderboard.twitch.stream.get_twitch_client")
+async def test_fetch_current_broadcaster_stream_should_fail_every_caller_of_batch(
+    mock_get_twitch_client: Mock,
+):
+    client = MagicMock()
+    client.fetch_streams = AsyncMock(side_effect=HTTPException("Helix error"))
+    mock_get_twitch_client.return_value = client
+
+    results = await asyncio.gather(
+        fetch_current_broadcaster_stream("1"),
+        fetch_current_broadcaster_stream("2"),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, HTTPException) for result in results)
+    client.fetch_streams.assert_awaited_once()
+
+
+@pytest.fixture
+async def fake_helix():
+    helix = SimpleNamespace(delay=0, streams=[], requests=0)
+
+    async def get_streams(request: web.Request):
+        helix.requests += 1
+        await asyncio.sleep(helix.delay)
+        return web.json_response({"data": helix.streams, "pagination": {}})
+
+    app = web.Application()
+    app.router.add_get("/helix/streams", get_streams)
+    breaker = CircuitBreaker(
+        name="helix_streams",
+        timeout=0.05,
+        failure_threshold=2,
+        recovery_timeout=60,
+        slow_call_threshold=0.05,
+        max_queue_wait=0,
+    )
+
+    async with TestServer(app) as server:
+        client = Client.from_client_credentials(
+            client_id="test-client-id", client_secret="test-client-secret"
+        )
+        client.event_token_expired = AsyncMock(return_value="test-token")
+        # Skips twitchio's token validation against id.twitch.tv
+        client._http.nick = "test"
+
+        with (
+            patch.object(Route, "BASE_URL", str(server.make_url("/helix"))),
+            patch(
+                "src.viewers_leaderboard.twitch.stream.get_twitch_client",
+                return_value=client,
+            ),
+            patch(
+                "src.viewers_leaderboard.twitch.stream.get_helix_breaker",
+                return_value=breaker,
+            ),
+        ):
+            yield helix
+
+        if client._http.session is not None:
+            await client._http.session.close()
+
+
+async def test_get_current_stream_state_should_serve_last_known_state_when_helix_is_slow(
+    fake_helix: SimpleNamespace,
+):
+    fake_helix.streams = [
+        {
+            "id": "stream_123",
+            "user_id": "123",
+            "user_login": "user_123",
+            "user_name": "user_123",
+            "game_id": "123",
+            "game_name": "Test Game",
+            "type": "live",
+            "title": "Test Stream",
+            "viewer_count": 100,
+            "started_at": "2023-01-01T00:00:00Z",
+            "language": "en",
+            "thumbnail_url": "http://example.com/thumbnail.jpg",
+            "tags": [],
+            "tag_ids": [],
+            "is_mature": False,
+        }
+    ]
+    live_state = await get_current_stream_state("123")
+    fake_helix.delay = 0.5
+
+    for _ in range(3):
+        get_stream_state_cache.cache_clear()
+        assert await get_current_stream_state("123") == live_state
+
+    assert fake_helix.requests == 3
+    metrics = get_metrics()
+    assert metrics["counters"]["circuit_breaker.helix_streams.timeouts"] == 2
+    assert metrics["counters"]["circuit_breaker.helix_streams.trips"] == 1
+    assert metrics["counters"]["circuit_breaker.helix_streams.rejected"] == 1
+    assert metrics["counters"]["stream_cache.stale_served"] == 3
+    assert metrics["gauges"]["circuit_breaker.helix_streams.state"] == 2
+
+
+async def test_get_current_stream_state_should_raise_without_last_known_state(
+    fake_helix: SimpleNamespace,
+):
+    fake_helix.delay = 0.5
+
+    with pytest.raises(asyncio.TimeoutError):
+        await get_current_stream_state("123")
+
+
+@patch(
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+    new_callable=AsyncMock,
+)
+async def test_get_current_stream_state_should_share_state_between_workers(
+    fetch_current_broadcaster_stream_mock: AsyncMock,
+    twitch_stream_factory: TwitchStreamFactory,
+    database,
+):
+    stream_mock: TwitchStream = twitch_stream_factory.build()
+    fetch_current_broadcaster_stream_mock.return_value = stream_mock
+    settings = get_settings().model_copy(update={"shared_cache_enabled": True})
+
+    with patch(
+        "src.viewers_leaderboard.twitch.stream.get_settings", return_value=settings
+    ):
+        first = await get_current_stream_state(stream_mock.broadcaster_id)
+        # Another worker starts with an empty local cache
+        get_stream_state_cache.cache_clear()
+        second = await get_current_stream_state(stream_mock.broadcaster_id)
+
+    assert second.stream_hash == first.stream_hash
+    assert second.stream.broadcaster_id == stream_mock.broadcaster_id
+    fetch_current_broadcaster_stream_mock.assert_awaited_once()
+    assert get_metrics()["counters"]["stream_cache.shared.hits"] == 1
@@ -2,77 +2,71 @@ from unittest.mock import patch, AsyncMock, Mock
 import pytest
 from twitchio import HTTPException
 from twitchio.models import User
-from src.viewers_leaderboard.twitch.user import (
-    get_user,
-    UserNotFoundException,
-    AuthenticationError,
-)
+from src.viewers_leaderboard.twitch.breaker import CircuitOpenException
+from src.viewers_leaderboard.twitch.user import get_users_by_id
 
 
-@pytest.fixture
-def mocked_user() -> User:
+def build_user_mock(user_id: int, name: str) -> User:
     mocked_obj = Mock(
-        spec=User,
-        id=12345,
-        profile_image="http://example.com/profile.jpg",
+        spec=User, id=user_id, profile_image=f"http://example.com/{name}.jpg"
     )
-
-    mocked_obj.name = "test_user"
+    mocked_obj.name = name
 
     return mocked_obj
 
 
-@pytest.fixture
-def get_twitch_client_mock(mocked_user: User):
-    def side_effect(names: list[str]):
-        if names == [mocked_user.name]:
-            return [mocked_user]
-        return []
+async def test_get_users_by_id_should_batch_and_deduplicate_lookups():
+    user_ids = [str(i) for i in range(250)]
+    user_ids += user_ids[:10]
+
+    async def fetch_users(ids: list[str]):
+        return [build_user_mock(int(user_id), f"user{user_id}") for user_id in ids]
 
-    mocked_get_users = AsyncMock(side_effect=side_effect)
-    mocked_client = Mock(fetch_users=mocked_get_users)
+    client = Mock(fetch_users=AsyncMock(side_effect=fetch_users))
 
-    with patch("src.viewers_leaderboard.twitch.user.get_twitch_client") as mocked_get:
-        mocked_get.return_value = mocked_client
+    users = await get_users_by_id(user_ids, client)
+
+    assert client.fetch_users.await_count == 3
+    requested = [
+        user_id
+        for call in client.fetch_users.await_args_list
+        for user_id in call.kwargs["ids"]
+    ]
+    assert len(requested) == len(set(requested)) == 250
+    assert all(
+        len(call.kwargs["ids"]) <= 100 for call in client.fetch_users.await_args_list
+    )
+    assert set(users) == set(user_ids)
+    assert users["7"].profile_image == "http://example.com/user7.jpg"
 
-        yield mocked_client
 
+async def test_get_users_by_id_should_map_users_by_id():
+    async def fetch_users(ids: list[str]):
+        return [build_user_mock(int(user_id), f"user{user_id}") for user_id in ids]
 
-async def test_get_user_should_return_user_data(
-    mocked_user: User,
-    get_twitch_client_mock: Mock,
-):
-    user = await get_user(mocked_user.name)
+    client = Mock(fetch_users=AsyncMock(side_effect=fetch_users))
 
-    assert user.id == str(mocked_user.id)
-    assert user.username == mocked_user.name
-    assert user.profile_image == mocked_user.profile_image
+    users = await get_users_by_id(["1", "2", "2"], client)
 
+    client.fetch_users.assert_awaited_once_with(ids=["1", "2"])
+    assert users["1"].username == "user1"
+    assert users["2"].username == "user2"
 
-async def test_get_user_should_raise_user_not_found_for_empty_result(
-    get_twitch_client_mock: Mock,
-):
-    with pytest.raises(UserNotFoundException) as exc_info:
-        await get_user("nonexistent_user")
 
-    assert str(exc_info.value) == "User nonexistent_user not found"
+async def test_get_users_by_id_should_propagate_failed_batches():
+    client = Mock(fetch_users=AsyncMock(side_effect=HTTPException("API error")))
 
+    with pytest.raises(HTTPException):
+        await get_users_by_id(["1", "2"], client)
 
-async def test_get_user_should_raise_user_not_found_for_http_error(
-    get_twitch_client_mock: Mock,
-):
-    get_twitch_client_mock.fetch_users.side_effect = HTTPException("API error")
-    with pytest.raises(UserNotFoundException) as exc_info:
-        await get_user("nonexistent_user")
 
-    assert str(exc_info.value) == "User nonexistent_user not found"
+async def test_get_users_by_id_should_propagate_open_circuit():
+    client = Mock(fetch_users=AsyncMock())
 
+    with patch("src.viewers_leaderboard.twitch.user.get_helix_breaker") as breaker:
+        breaker.return_value.call = AsyncMock(side_effect=CircuitOpenException())
 
-async def test_get_user_should_raise_user_not_found_for_authentication_error(
-    get_twitch_client_mock: Mock,
-):
-    get_twitch_client_mock.fetch_users.side_effect = AuthenticationError("API error")
-    with pytest.raises(UserNotFoundException) as exc_info:
-        await get_user("nonexistent_user")
+        with pytest.raises(CircuitOpenException):
+            await get_users_by_id(["1", "2"], client)
 
-    assert str(exc_info.value) == "User nonexistent_user not found"
+    client.fetch_users.assert_not_awaited()
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch, AsyncMock
+import pytest
+from twitchio import HTTPException
+from src.viewers_leaderboard.twitch.models import TwitchUser as TwitchUserData
+from src.viewers_leaderboard.users.models import TwitchUser
+from src.viewers_leaderboard.users.directory import (
+    record_chatter,
+    get_profile_images,
+    refresh_stale_users,
+)
+
+
+async def test_record_chatter_should_upsert_user_by_id(database):
+    await record_chatter("1", "first_name")
+    await record_chatter("1", "second_name")
+
+    users = await TwitchUser.find_all().to_list()
+
+    assert len(users) == 1
+    assert users[0].id == "1"
+    assert users[0].username == "second_name"
+    assert users[0].refreshed_at is None
+
+
+async def test_get_profile_images_should_join_users_by_id(database):
+    await TwitchUser(id="1", username="user1", profile_image="image1").insert()
+    await TwitchUser(id="2", username="user2").insert()
+
+    profile_images = await get_profile_images(["1", "2", "3"])
+
+    assert profile_images == {"1": "image1", "2": None}
+
+
+@patch(
+    "src.viewers_leaderboard.users.directory.get_users_by_id", new_callable=AsyncMock
+)
+async def test_refresh_stale_users_should_update_profile_images(
+    get_users_by_id_mock: AsyncMock, database
+):
+    fresh_refresh = datetime.now() - timedelta(minutes=1)
+    await TwitchUser(id="1", username="user1").insert()
+    await TwitchUser(
+        id="2", username="user2", profile_image="old", refreshed_at=fresh_refresh
+    ).insert()
+    await TwitchUser(id="3", username="user3").insert()
+    get_users_by_id_mock.return_value = {
+        "1": TwitchUserData(id="1", username="user1", profile_image="new_image")
+    }
+
+    refreshed = await refresh_stale_users()
+
+    assert refreshed == 2
+    assert sorted(get_users_by_id_mock.await_args.args[0]) == ["1", "3"]
+
+    user1 = await TwitchUser.get("1")
+    user2 = await TwitchUser.get("2")
+    user3 = await TwitchUser.get("3")
+    assert user1.profile_image == "new_image"
+    assert user1.refreshed_at is not None
+    assert user2.profile_image == "old"
+    assert user3.profile_image is None
+    assert user3.refreshed_at is not None
+
+
+@patch(
+    "src.viewers_leaderboard.users.directory.get_users_by_id",
+    new_callable=AsyncMock,
+    side_effect=HTTPException("Too Many Requests", status=429),
+)
+async def test_refresh_stale_users_should_keep_users_stale_if_helix_fails(
+    get_users_by_id_mock: AsyncMock, database
+):
+    await TwitchUser(id="1", username="user1", profile_image="image1").insert()
+
+    with pytest.raises(HTTPException):
+        await refresh_stale_users()
+
+    user = await TwitchUser.get("1")
+    assert user.profile_image == "image1"
+    assert user.refreshed_at is None
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, Mock
+import pytest
+from fastapi import HTTPException
+from polyfactory.factories.pydantic_factory import ModelFactory
+from polyfactory.pytest_plugin import register_fixture
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.settings import Settings
+from src.viewers_leaderboard.webhook.dedupe import (
+    check_webhook_message,
+    forget_message,
+)
+from src.viewers_leaderboard.webhook.models import WebhookMessage
+
+
+@register_fixture
+class SettingsFactory(ModelFactory[Settings]): ...
+
+
+def message_timestamp(age: timedelta = timedelta()):
+    return (datetime.now(timezone.utc) - age).isoformat().replace("+00:00", "Z")
+
+
+async def test_check_webhook_message_should_drop_duplicate_message_ids():
+    timestamp = message_timestamp()
+
+    assert await check_webhook_message("message_id", timestamp) is True
+    assert await check_webhook_message("message_id", timestamp) is False
+    assert await check_webhook_message("other_message_id", timestamp) is True
+    assert get_metrics()["counters"]["webhook.duplicate_messages"] == 1
+
+
+async def test_check_webhook_message_should_drop_messages_outside_replay_window():
+    timestamp = message_timestamp(timedelta(minutes=11))
+
+    assert await check_webhook_message("message_id", timestamp) is False
+    assert get_metrics()["counters"]["webhook.stale_messages"] == 1
+
+
+async def test_check_webhook_message_should_accept_nanosecond_timestamps():
+    timestamp = message_timestamp().replace("Z", "123Z")
+
+    assert await check_webhook_message("message_id", timestamp) is True
+
+
+async def test_check_webhook_message_should_raise_400_for_invalid_timestamp():
+    with pytest.raises(HTTPException) as exc_info:
+        await check_webhook_message("message_id", "invalid_timestamp")
+
+    assert exc_info.value.status_code == 400
+
+
+async def test_check_webhook_message_should_accept_messages_without_headers():
+    assert await check_webhook_message(None, None) is True
+    assert await check_webhook_message(None, None) is True
+
+
+@patch("src.viewers_leaderboard.webhook.dedupe.get_settings")
+async def test_check_webhook_message_should_share_seen_messages_through_database(
+    get_settings_mock: Mock, settings_factory: SettingsFactory, database
+):
+    get_settings_mock.return_value = settings_factory.build(
+        webhook_dedupe_shared=True, webhook_dedupe_capacity=100
+    )
+    timestamp = message_timestamp()
+    await WebhookMessage(
+        id="seen_by_other_worker", received_at=datetime.now(timezone.utc)
+    ).insert()
+
+    assert await check_webhook_message("message_id", timestamp) is True
+    assert await check_webhook_message("seen_by_other_worker", timestamp) is False
+    assert await WebhookMessage.get("message_id") is not None
+
+
+@patch("src.viewers_leaderboard.webhook.dedupe.get_settings")
+async def test_forget_message_should_allow_message_to_be_processed_again(
+    get_settings_mock: Mock, settings_factory: SettingsFactory, database
+):
+    get_settings_mock.return_value = settings_factory.build(
+        webhook_dedupe_shared=True, webhook_dedupe_capacity=100
+    )
+    timestamp = message_timestamp()
+
+    await check_webhook_message("message_id", timestamp)
+    await forget_message("message_id")
+
+    assert await check_webhook_message("message_id", timestamp) is True
@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from unittest.mock import patch, AsyncMock
+import pytest
+from polyfactory.factories.pydantic_factory import ModelFactory
+from polyfactory.pytest_plugin import register_fixture
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.ranking.models import LeaderboardTotal, Score, ScoreType
+from src.viewers_leaderboard.twitch.models import TwitchStream
+from src.viewers_leaderboard.twitch.stream import gen_stream_hash
+from src.viewers_leaderboard.webhook.handlers import (
+    handle_cheer_event,
+    handle_raid_event,
+    handle_revocation,
+    handle_stream_offline_event,
+    handle_stream_online_event,
+    handle_subscribe_event,
+)
+from src.viewers_leaderboard.webhook.transport import (
+    CheerEvent,
+    RaidEvent,
+    RevokedWebhookSubscription,
+    StreamOfflineEvent,
+    StreamOnlineEvent,
+    SubscribeEvent,
+)
+
+
+@register_fixture
+class TwitchStreamFactory(ModelFactory[TwitchStream]): ...
+
+
+@pytest.fixture
+def live_stream(twitch_stream_factory: TwitchStreamFactory):
+    stream = twitch_stream_factory.build(broadcaster_id="broadcaster")
+
+    with patch(
+        "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+        new_callable=AsyncMock,
+        return_value=stream,
+    ):
+        yield stream
+
+
+@patch(
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+    new_callable=AsyncMock,
+)
+async def test_stream_online_event_should_prime_stream_state_with_helix_hash(
+    fetch_current_broadcaster_stream_mock: AsyncMock, database
+):
+    helix_stream = TwitchStream(
+        broadcaster_id="broadcaster",
+        started_at=datetime(2024, 12, 14, 16, 45, 30, tzinfo=timezone.utc),
+    )
+    event = StreamOnlineEvent(
+        broadcaster_user_id="broadcaster", started_at="2024-12-14T16:45:30.123456Z"
+    )
+
+    await handle_stream_online_event(event, None)
+    await handle_subscribe_event(
+        SubscribeEvent(broadcaster_user_id="broadcaster", user_id="1", user_name="v"),
+        None,
+    )
+
+    score = await Score.find_one()
+    fetch_current_broadcaster_stream_mock.assert_not_awaited()
+    assert score.last_stream_hash == gen_stream_hash(helix_stream)
+
+
+@patch(
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+    new_callable=AsyncMock,
+)
+async def test_stream_offline_event_should_confirm_offline_stream_with_helix(
+    fetch_current_broadcaster_stream_mock: AsyncMock, database
+):
+    fetch_current_broadcaster_stream_mock.return_value = None
+
+    await handle_stream_offline_event(
+        StreamOfflineEvent(broadcaster_user_id="broadcaster"), None
+    )
+    await handle_subscribe_event(
+        SubscribeEvent(broadcaster_user_id="broadcaster", user_id="1", user_name="v"),
+        None,
+    )
+
+    fetch_current_broadcaster_stream_mock.assert_awaited_once_with("broadcaster")
+    assert await Score.find_all().count() == 0
+
+
+async def test_cheer_event_should_award_points_per_bits(live_stream, database):
+    event = CheerEvent(
+        broadcaster_user_id="broadcaster", user_id="1", user_name="viewer", bits=250
+    )
+
+    await handle_cheer_event(event, None)
+    await handle_cheer_event(event, None)
+
+    score = await Score.find_one(Score.type == ScoreType.CHEER)
+    total = await LeaderboardTotal.find_one()
+    assert score.value == 4
+    assert total.total == 4
+
+
+async def test_cheer_event_should_ignore_anonymous_and_small_cheers(
+    live_stream, database
+):
+    await handle_cheer_event(
+        CheerEvent(broadcaster_user_id="broadcaster", is_anonymous=True, bits=1000),
+        None,
+    )
+    await handle_cheer_event(
+        CheerEvent(
+            broadcaster_user_id="broadcaster", user_id="1", user_name="v", bits=99
+        ),
+        None,
+    )
+
+    assert await Score.find_all().count() == 0
+
+
+async def test_raid_event_should_award_points_to_raiding_broadcaster(
+    live_stream, database
+):
+    event = RaidEvent(
+        from_broadcaster_user_id="raider",
+        from_broadcaster_user_name="Raider",
+        to_broadcaster_user_id="broadcaster",
+        viewers=50,
+    )
+
+    await handle_raid_event(event, None)
+
+    score = await Score.find_one()
+    assert score.type == ScoreType.RAID
+    assert score.broadcaster_user_id == "broadcaster"
+    assert score.viewer_user_id == "raider"
+    assert score.viewer_username == "Raider"
+    assert score.value == 5
+
+
+def test_handle_revocation_should_count_revoked_subscriptions():
+    handle_revocation(
+        RevokedWebhookSubscription(
+            id="1", type="channel.chat.message", status="authorization_revoked"
+        )
+    )
+
+    assert get_metrics()["counters"]["webhook.revocations"] == 1
@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import AsyncMock
+import pytest
+from src.viewers_leaderboard.metrics import get_metrics
+from src.viewers_leaderboard.webhook.queue import (
+    WebhookEventQueue,
+    WebhookQueueFullException,
+)
+
+
+async def test_webhook_event_queue_should_process_events_with_workers():
+    queue = WebhookEventQueue(maxsize=10, workers=2, enqueue_timeout=1)
+    handler = AsyncMock()
+    queue.start()
+
+    await queue.enqueue(handler, "event1")
+    await queue.enqueue(handler, "event2")
+    await queue.stop()
+
+    assert handler.await_count == 2
+    handler.assert_any_await("event1")
+    handler.assert_any_await("event2")
+    assert get_metrics()["counters"]["webhook_queue.processed_events"] == 2
+    assert get_metrics()["summaries"]["webhook_queue.lag_ms"]["count"] == 2
+    assert get_metrics()["gauges"]["webhook_queue.depth"] == 0
+
+
+async def test_webhook_event_queue_should_drain_pending_events_on_stop():
+    queue = WebhookEventQueue(maxsize=10, workers=1, enqueue_timeout=1)
+    processed = []
+
+    async def handler(event):
+        await asyncio.sleep(0.01)
+        processed.append(event)
+
+    for event in range(5):
+        await queue.enqueue(handler, event)
+
+    queue.start()
+    await queue.stop()
+
+    assert processed == [0, 1, 2, 3, 4]
+    assert len(queue) == 0
+
+
+async def test_webhook_event_queue_should_keep_processing_after_handler_failure():
+    queue = WebhookEventQueue(maxsize=10, workers=1, enqueue_timeout=1)
+    handler = AsyncMock(side_effect=[Exception("boom"), None])
+    queue.start()
+
+    await queue.enqueue(handler, "event1")
+    await queue.enqueue(handler, "event2")
+    await queue.stop()
+
+    assert handler.await_count == 2
+    assert get_metrics()["counters"]["webhook_queue.failed_events"] == 1
+    assert get_metrics()["counters"]["webhook_queue.processed_events"] == 1
+
+
+async def test_webhook_event_queue_should_reject_events_when_full():
+    queue = WebhookEventQueue(maxsize=1, workers=1, enqueue_timeout=0.01)
+    handler = AsyncMock()
+
+    await queue.enqueue(handler, "event1")
+
+    with pytest.raises(WebhookQueueFullException):
+        await queue.enqueue(handler, "event2")
+
+    assert len(queue) == 1
+    assert get_metrics()["counters"]["webhook_queue.rejected_events"] == 1
@@ -1,5 +1,5 @@
 from urllib.parse import urlencode
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, AsyncMock, Mock
 import pytest
 from freezegun import freeze_time
@@ -8,15 +8,22 @@ from fastapi.testclient import TestClient
 from polyfactory.factories.pydantic_factory import ModelFactory
 from polyfactory.pytest_plugin import register_fixture
 from src.viewers_leaderboard.main import app
+from src.viewers_leaderboard.metrics import get_metrics
 from src.viewers_leaderboard.webhook.transport import (
     ChallengePayload,
     ChatMessagePayload,
 )
 from src.viewers_leaderboard.ranking.models import Score
+from src.viewers_leaderboard.users.models import TwitchUser
 from src.viewers_leaderboard.twitch.models import TwitchStream
 from src.viewers_leaderboard.twitch.auth import validate_webhook_request
 from src.viewers_leaderboard.twitch.eventsub import WebhookSubscriptionConflictException
 from src.viewers_leaderboard.settings import Settings
+from src.viewers_leaderboard.webhook.queue import WebhookQueueFullException
+from src.viewers_leaderboard.webhook.handlers import (
+    EVENT_HANDLERS,
+    handle_chat_message_event,
+)
 
 
 @pytest.fixture
@@ -69,7 +76,7 @@ async def test_webhook_should_create_score_for_chat_if_doesnt_exist(
     payload: ChatMessagePayload = chat_message_payload_factory.build()
 
     with patch(
-        "src.viewers_leaderboard.webhook.routes.fetch_current_broadcaster_stream",
+        "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
         return_value=stream_mock,
     ):
         response = test_client.post(
@@ -86,6 +93,29 @@ async def test_webhook_should_create_score_for_chat_if_doesnt_exist(
     assert score.value == 1
 
 
+async def test_webhook_should_record_chatter_in_user_directory(
+    chat_message_payload_factory: ChatMessagePayloadFactory,
+    twitch_stream_factory: TwitchStreamFactory,
+    test_client: TestClient,
+):
+    stream_mock: TwitchStream = twitch_stream_factory.build()
+    payload: ChatMessagePayload = chat_message_payload_factory.build()
+
+    with patch(
+        "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+        return_value=stream_mock,
+    ):
+        response = test_client.post(
+            "/webhook",
+            json=payload.model_dump(),
+        )
+
+    user = await TwitchUser.get(payload.event.chatter_user_id)
+
+    assert response.status_code == 200
+    assert user.username == payload.event.chatter_user_name
+
+
 @pytest.mark.parametrize("elapsed_seconds,expected_score", [(300, 2), (2, 1)])
 async def test_webhook_should_increment_score_for_chat_with_5_min_between_msgs(
     elapsed_seconds: int,
@@ -104,7 +134,7 @@ async def test_webhook_should_increment_score_for_chat_with_5_min_between_msgs(
     payload: ChatMessagePayload = chat_message_payload_factory.build()
 
     with patch(
-        "src.viewers_leaderboard.webhook.routes.fetch_current_broadcaster_stream",
+        "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
         return_value=stream_mock,
     ):
 
@@ -124,8 +154,33 @@ async def test_webhook_should_increment_score_for_chat_with_5_min_between_msgs(
     assert score.value == expected_score
 
 
+async def test_webhook_should_invalidate_channel_ranking_when_point_is_awarded(
+    chat_message_payload_factory: ChatMessagePayloadFactory,
+    twitch_stream_factory: TwitchStreamFactory,
+    test_client: TestClient,
+):
+    stream_mock: TwitchStream = twitch_stream_factory.build()
+    payload: ChatMessagePayload = chat_message_payload_factory.build()
+
+    with (
+        patch(
+            "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
+            return_value=stream_mock,
+        ),
+        patch(
+            "src.viewers_leaderboard.webhook.handlers.invalidate_channel_ranking"
+        ) as invalidate_channel_ranking_mock,
+    ):
+        test_client.post("/webhook", json=payload.model_dump())
+        test_client.post("/webhook", json=payload.model_dump())
+
+    invalidate_channel_ranking_mock.assert_called_once_with(
+        payload.event.broadcaster_user_id
+    )
+
+
 @patch(
-    "src.viewers_leaderboard.webhook.routes.fetch_current_broadcaster_stream",
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
     return_value=None,
 )
 async def test_webhook_should_ignore_chat_message_if_stream_is_offline(
@@ -150,7 +205,7 @@ async def test_webhook_should_ignore_chat_message_if_stream_is_offline(
 
 
 @patch(
-    "src.viewers_leaderboard.webhook.routes.fetch_current_broadcaster_stream",
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
     return_value=None,
 )
 async def test_webhook_should_raise_http_error_403_if_validation_fails(
@@ -175,7 +230,7 @@ async def test_webhook_should_raise_http_error_403_if_validation_fails(
 
 
 @patch(
-    "src.viewers_leaderboard.webhook.routes.fetch_current_broadcaster_stream",
+    "src.viewers_leaderboard.twitch.stream.fetch_current_broadcaster_stream",
     new_callable=AsyncMock,
 )
 async def test_webhook_should_use_active_stream_overrides_if_provided_and_env_is_dev(
@@ -184,15 +239,22 @@ async def test_webhook_should_use_active_stream_overrides_if_provided_and_env_is
     settings_factory: SettingsFactory,
     test_client: TestClient,
 ):
-    settings = settings_factory.build(env="dev")
+    settings = settings_factory.build(env="dev", webhook_async_ingest=False)
     payload: ChatMessagePayload = chat_message_payload_factory.build()
     headers = {
         "active-stream-broadcaster-id-override": "test_broadcaster_id",
         "active-stream-started-at-override": "2024-12-14T16:45:30",
     }
 
-    with patch(
-        "src.viewers_leaderboard.webhook.routes.get_settings", return_value=settings
+    with (
+        patch(
+            "src.viewers_leaderboard.webhook.routes.get_settings",
+            return_value=settings,
+        ),
+        patch(
+            "src.viewers_leaderboard.webhook.handlers.get_settings",
+            return_value=settings,
+        ),
     ):
         response = test_client.post(
             "/webhook",
@@ -211,6 +273,138 @@ async def test_webhook_should_use_active_stream_overrides_if_provided_and_env_is
     assert score.value == 1
 
 
+async def test_webhook_should_not_handle_duplicate_messages(
+    chat_message_payload_factory: ChatMessagePayloadFactory,
+    test_client: TestClient,
+):
+    handle_chat_message_event_mock = AsyncMock()
+    payload: ChatMessagePayload = chat_message_payload_factory.build()
+    headers = {
+        "twitch-eventsub-message-id": "message_id",
+        "twitch-eventsub-message-timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+    with patch.dict(
+        EVENT_HANDLERS, {"channel.chat.message": handle_chat_message_event_mock}
+    ):
+        first_response = test_client.post(
+            "/webhook", json=payload.model_dump(), headers=headers
+        )
+        second_response = test_client.post(
+            "/webhook", json=payload.model_dump(), headers=headers
+        )
+
+    assert first_response.status_code == second_response.status_code == 200
+    handle_chat_message_event_mock.assert_awaited_once()
+
+
+async def test_webhook_should_not_handle_messages_outside_replay_window(
+    chat_message_payload_factory: ChatMessagePayloadFactory,
+    test_client: TestClient,
+):
+    handle_chat_message_event_mock = AsyncMock()
+    payload: ChatMessagePayload = chat_message_payload_factory.build()
+    timestamp = datetime.now(timezone.utc) - timedelta(minutes=11)
+    headers = {
+        "twitch-eventsub-message-id": "message_id",
+        "twitch-eventsub-message-timestamp": timestamp.isoformat(),
+    }
+
+    with patch.dict(
+        EVENT_HANDLERS, {"channel.chat.message": handle_chat_message_event_mock}
+    ):
+        response = test_client.post(
+            "/webhook", json=payload.model_dump(), headers=headers
+        )
+
+    assert response.status_code == 200
+    handle_chat_message_event_mock.assert_not_awaited()
+
+
+def test_webhook_should_acknowledge_revocation(test_client: TestClient):
+    payload = {
+        "subscription": {
+            "id": "subscription_id",
+            "type": "channel.chat.message",
+            "status": "authorization_revoked",
+        }
+    }
+
+    response = test_client.post(
+        "/webhook",
+        json=payload,
+        headers={"twitch-eventsub-message-type": "revocation"},
+    )
+
+    assert response.status_code == 200
+    assert get_metrics()["counters"]["webhook.revocations"] == 1
+
+
+def test_webhook_should_acknowledge_notifications_without_handler(
+    test_client: TestClient,
+):
+    payload = {"subscription": {"type": "channel.follow"}, "event": {}}
+
+    response = test_client.post("/webhook", json=payload)
+
+    assert response.status_code == 200
+
+
+async def test_webhook_should_enqueue_chat_message_in_async_ingest_mode(
+    chat_message_payload_factory: ChatMessagePayloadFactory,
+    settings_factory: SettingsFactory,
+    test_client: TestClient,
+):
+    settings = settings_factory.build(webhook_async_ingest=True)
+    payload: ChatMessagePayload = chat_message_payload_factory.build()
+
+    with (
+        patch(
+            "src.viewers_leaderboard.webhook.routes.get_settings",
+            return_value=settings,
+        ),
+        patch(
+            "src.viewers_leaderboard.webhook.routes.get_webhook_event_queue"
+        ) as get_webhook_event_queue_mock,
+    ):
+        enqueue_mock = AsyncMock()
+        get_webhook_event_queue_mock.return_value.enqueue = enqueue_mock
+
+        response = test_client.post("/webhook", json=payload.model_dump())
+
+    assert response.status_code == 200
+    enqueue_mock.assert_awaited_once_with(
+        handle_chat_message_event, payload.event, None
+    )
+    assert await Score.find_all().count() == 0
+
+
+async def test_webhook_should_return_503_when_event_queue_is_full(
+    chat_message_payload_factory: ChatMessagePayloadFactory,
+    settings_factory: SettingsFactory,
+    test_client: TestClient,
+):
+    settings = settings_factory.build(webhook_async_ingest=True)
+    payload: ChatMessagePayload = chat_message_payload_factory.build()
+
+    with (
+        patch(
+            "src.viewers_leaderboard.webhook.routes.get_settings",
+            return_value=settings,
+        ),
+        patch(
+            "src.viewers_leaderboard.webhook.routes.get_webhook_event_queue"
+        ) as get_webhook_event_queue_mock,
+    ):
+        get_webhook_event_queue_mock.return_value.enqueue = AsyncMock(
+            side_effect=WebhookQueueFullException()
+        )
+
+        response = test_client.post("/webhook", json=payload.model_dump())
+
+    assert response.status_code == 503
+
+
 @patch("src.viewers_leaderboard.webhook.routes.get_settings")
 async def test_webhook_subscribe_should_redirect_to_twitch_oauth(
     get_settings_mock: Mock,
@@ -225,7 +419,10 @@ async def test_webhook_subscribe_should_redirect_to_twitch_oauth(
         {
             "client_id": mocked_settings.app_client_id,
             "response_type": "code",
-            "scope": "channel:bot user:bot user:read:chat",
+            "scope": (
+                "channel:bot user:bot user:read:chat bits:read "
+                "channel:read:subscriptions moderator:read:chatters"
+            ),
             "redirect_uri": f"{mocked_settings.app_base_url}/webhook_subscribe_callback",
         }
     )
@@ -242,12 +439,17 @@ async def test_webhook_subscribe_should_redirect_to_twitch_oauth(
     "src.viewers_leaderboard.webhook.routes.subscribe_to_webhooks",
     new_callable=AsyncMock,
 )
+@patch(
+    "src.viewers_leaderboard.webhook.routes.store_broadcaster_token",
+    new_callable=AsyncMock,
+)
 @patch(
     "src.viewers_leaderboard.webhook.routes.get_user_access_token",
     new_callable=AsyncMock,
 )
 async def test_webhook_subscribe_callback_should_subscribe_to_webhooks(
     get_user_access_token_mock: AsyncMock,
+    store_broadcaster_token_mock: AsyncMock,
     subscribe_to_webhooks_mock: AsyncMock,
     test_client: TestClient,
 ):
@@ -257,6 +459,7 @@ async def test_webhook_subscribe_callback_should_subscribe_to_webhooks(
     response = test_client.get(f"/webhook_subscribe_callback?code={auth_code}")
 
     get_user_access_token_mock.assert_awaited_once_with(auth_code)
+    store_broadcaster_token_mock.assert_awaited_once_with(access_token_response)
     subscribe_to_webhooks_mock.assert_awaited_once_with(
         access_token_response.access_token
     )
@@ -269,12 +472,17 @@ async def test_webhook_subscribe_callback_should_subscribe_to_webhooks(
     "src.viewers_leaderboard.webhook.routes.subscribe_to_webhooks",
     new_callable=AsyncMock,
 )
+@patch(
+    "src.viewers_leaderboard.webhook.routes.store_broadcaster_token",
+    new_callable=AsyncMock,
+)
 @patch(
     "src.viewers_leaderboard.webhook.routes.get_user_access_token",
     new_callable=AsyncMock,
 )
 async def test_webhook_subscribe_callback_should_return_already_subscribed_message_if_conflict(
     get_user_access_token_mock: AsyncMock,
+    store_broadcaster_token_mock: AsyncMock,
     subscribe_to_webhooks_mock: AsyncMock,
     test_client: TestClient,
 ):
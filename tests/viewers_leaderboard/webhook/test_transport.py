@@ -1,8 +1,18 @@
+import json
 from datetime import datetime
+from unittest.mock import AsyncMock, Mock
 import pytest
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from src.viewers_leaderboard.webhook.transport import (
+    ChallengePayload,
+    ChatMessagePayload,
+    CheerPayload,
+    RevocationPayload,
+    StreamOnlinePayload,
+    UnknownNotificationPayload,
     parse_active_stream_override_header,
+    parse_webhook_payload,
 )
 from src.viewers_leaderboard.twitch.models import TwitchStream
 
@@ -43,3 +53,98 @@ def test_parse_active_stream_override_header_missing_header():
     )
 
     assert result is None
+
+
+async def test_parse_webhook_payload_should_validate_raw_body():
+    request = Mock(Request)
+    request.body = AsyncMock(
+        return_value=b'{"subscription": {"type": "channel.chat.message"}, '
+        b'"event": {"broadcaster_user_id": "1", "chatter_user_id": "2", '
+        b'"chatter_user_name": "viewer"}}'
+    )
+
+    payload = await parse_webhook_payload(request, "notification")
+
+    assert isinstance(payload, ChatMessagePayload)
+    assert payload.event.chatter_user_name == "viewer"
+
+
+async def test_parse_webhook_payload_should_raise_validation_error_for_invalid_body():
+    request = Mock(Request)
+    request.body = AsyncMock(return_value=b'{"subscription": {}}')
+
+    with pytest.raises(RequestValidationError):
+        await parse_webhook_payload(request, "notification")
+
+
+@pytest.mark.parametrize(
+    "subscription_type,event,expected_payload",
+    [
+        (
+            "channel.cheer",
+            {"broadcaster_user_id": "1", "user_id": "2", "user_name": "v", "bits": 100},
+            CheerPayload,
+        ),
+        (
+            "stream.online",
+            {"broadcaster_user_id": "1", "started_at": "2024-12-14T16:45:30.123Z"},
+            StreamOnlinePayload,
+        ),
+        ("channel.unknown", {}, UnknownNotificationPayload),
+    ],
+)
+async def test_parse_webhook_payload_should_dispatch_on_subscription_type(
+    subscription_type: str, event: dict, expected_payload: type
+):
+    request = Mock(Request)
+    request.body = AsyncMock(
+        return_value=json.dumps(
+            {"subscription": {"type": subscription_type}, "event": event}
+        ).encode()
+    )
+
+    payload = await parse_webhook_payload(request, "notification")
+
+    assert type(payload) is expected_payload
+
+
+@pytest.mark.parametrize(
+    "message_type,body,expected_payload",
+    [
+        (
+            "webhook_callback_verification",
+            {"subscription": {"type": "channel.chat.message"}, "challenge": "abc"},
+            ChallengePayload,
+        ),
+        (
+            "revocation",
+            {
+                "subscription": {
+                    "id": "1",
+                    "type": "channel.chat.message",
+                    "status": "authorization_revoked",
+                }
+            },
+            RevocationPayload,
+        ),
+    ],
+)
+async def test_parse_webhook_payload_should_dispatch_on_message_type(
+    message_type: str, body: dict, expected_payload: type
+):
+    request = Mock(Request)
+    request.body = AsyncMock(return_value=json.dumps(body).encode())
+
+    payload = await parse_webhook_payload(request, message_type)
+
+    assert type(payload) is expected_payload
+
+
+async def test_parse_webhook_payload_should_raise_400_for_unsupported_message_type():
+    request = Mock(Request)
+    request.body = AsyncMock(return_value=b"{}")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await parse_webhook_payload(request, "unsupported")
+
+    assert exc_info.value.status_code == 400